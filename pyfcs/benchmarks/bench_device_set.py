@@ -0,0 +1,39 @@
+""" Benchmark of device setup set() and get_payload(), the per element apply and dump cost 
+
+Usage::
+
+    python bench_device_set.py [n] [repeat]
+"""
+import sys
+import time
+
+from pyfcs.devices.lamp import LampSetup
+from pyfcs.devices.motor import MotorSetup
+
+
+def timeit(func, n, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        for _ in range(n):
+            func()
+        best = min(best, time.perf_counter()-tic)
+    return best/n
+
+
+CASES = [
+    (LampSetup, {'action':'ON', 'intensity':50.0, 'time':10}),
+    (MotorSetup, {'action':'MOVE_ABS', 'pos':12.5, 'unit':'UU'}),
+    (MotorSetup, {'action':'MOVE_BY_NAME', 'name':'HOME'}),
+]
+
+def main(n=20000, repeat=7):
+    for Setup, payload in CASES:
+        setup = Setup.from_dummy('dev')
+        set_time = timeit(lambda: setup.set(payload), n, repeat)
+        dump_time = timeit(setup.get_payload, n, repeat)
+        print(f"{Setup.get_devtype():6s} {payload['action']:13s} set: {set_time*1e6:5.2f} us | get_payload: {dump_time*1e6:5.2f} us")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
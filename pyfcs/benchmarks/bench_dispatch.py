@@ -0,0 +1,74 @@
+""" Benchmark of the payload_parser / payload_maker dispatch of real device classes 
+
+The compiled dispatch trie is compared to the former loop over context keys.
+
+Usage::
+
+    python bench_dispatch.py [repeat]
+"""
+import sys
+import time
+
+from pyfcs.devices.motor import MotorSetup
+from pyfcs.devices.adc import AdcSetup
+from pyfcs.devices.drot import DrotSetup
+from pyfcs.devices.piezo import PiezoSetup
+
+
+def legacy_find_parser(sd, payload):
+    for context_key in sd.parser_context_keys:
+        values = tuple( payload.get( k, None) for k in context_key )
+        try:
+            return context_key, sd.payload_parser_loockup[context_key][values]
+        except KeyError:
+            pass 
+    return tuple(), None        
+
+def legacy_find_maker(sd, setup):
+    for context_key in sd.maker_context_keys:
+        values = tuple( getattr( setup, k, None) for k in context_key )
+        try:
+            return  sd.payload_maker_loockup[context_key][values]
+        except KeyError:
+            pass 
+    return None        
+
+
+def timeit(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter()-tic)
+    return best
+
+
+def main(repeat=20):
+    for Setup in (MotorSetup, AdcSetup, DrotSetup, PiezoSetup):
+        sd = Setup.__setup_definition__
+        # one payload per known context, plus a miss 
+        payloads = [dict(zip(keys, values)) for keys in sd.parser_context_keys for values in sd.payload_parser_loockup[keys]]
+        payloads.append({'action':'UNKNOWN'})
+        for payload in payloads:
+            assert sd.find_payload_parser_method(payload) == legacy_find_parser(sd, payload)
+        setups = []
+        for payload in payloads[:-1]:
+            setup = Setup.from_dummy('dev')
+            for k, v in payload.items():
+                setattr(setup, k, v)
+            assert sd.find_payload_maker_method(setup) == legacy_find_maker(sd, setup)
+            setups.append(setup)
+        
+        n = 1000 
+        legacy = timeit(lambda: [legacy_find_parser(sd, p) for _ in range(n) for p in payloads], repeat)
+        trie = timeit(lambda: [sd.find_payload_parser_method(p) for _ in range(n) for p in payloads], repeat)
+        legacy_maker = timeit(lambda: [legacy_find_maker(sd, s) for _ in range(n) for s in setups], repeat)
+        trie_maker = timeit(lambda: [sd.find_payload_maker_method(s) for _ in range(n) for s in setups], repeat)
+        per_parser = 1e9/(n*len(payloads))
+        per_maker = 1e9/(n*max(1, len(setups)))
+        print(f"{Setup.get_devtype():8s} parser: loop {legacy*per_parser:7.0f} ns, trie {trie*per_parser:7.0f} ns (x{legacy/trie:.1f}) | "
+              f"maker: loop {legacy_maker*per_maker:7.0f} ns, trie {trie_maker*per_maker:7.0f} ns (x{legacy_maker/trie_maker:.1f})")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,37 @@
+""" Benchmark of DevMgr payload ingestion: schema validated vs trusted single pass 
+
+Usage::
+
+    python bench_payload_ingestion.py [nelements] [repeat]
+"""
+import sys
+import time
+
+from pyfcs.devmgr_setup import DevMgrSetup
+from pyfcs.core.api import DummyInterface
+
+
+def timeit(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter()-tic)
+    return best
+
+
+def main(nelements=500, repeat=10):
+    payload = [{'id':f'lamp{i}', 'param':{'lamp':{'action':'ON', 'intensity':10.0, 'time':10}}}
+                for i in range(nelements)]
+    setup = DevMgrSetup(DummyInterface())
+    setup.set_payload(payload) # compile validators and parser caches once
+    setup.set_payload(payload, trusted=True)
+
+    validated = timeit(lambda: setup.set_payload(payload), repeat)
+    trusted = timeit(lambda: setup.set_payload(payload, trusted=True), repeat)
+    print(f"{nelements} elements: set_payload {validated*1e3:.2f} ms, "
+          f"trusted {trusted*1e3:.2f} ms (x{validated/trusted:.1f})")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,45 @@
+""" Benchmark of payload validation: jsonschema.validate vs cached validators 
+
+The cached validator of a DevMgr schema validates each element against its 
+devtype schema only, the full one evaluates the oneOf of all devtypes.
+
+Usage::
+
+    python bench_payload_validation.py [nelements] [repeat]
+"""
+import sys
+import time
+
+import jsonschema
+
+from pyfcs.devmgr_setup import DevMgrSetup
+from pyfcs.core.tools.payload_receiver import PayloadReceiver, get_validator
+
+
+def timeit(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter()-tic)
+    return best
+
+
+def main(nelements=500, repeat=10):
+    schema = DevMgrSetup.get_schema()
+    payload = [{'id':f'lamp{i}', 'param':{'lamp':{'action':'ON', 'intensity':10.0, 'time':10}}}
+                for i in range(nelements)]
+    receiver = PayloadReceiver(schema)
+
+    cold = timeit(lambda: jsonschema.validate(payload, schema), repeat)
+    receiver.validate(payload) # compile once
+    warm = timeit(lambda: receiver.validate(payload), repeat)
+    full_validator = get_validator(schema)
+    full = timeit(lambda: full_validator.is_valid(payload), repeat)
+    many = timeit(lambda: receiver.validate_many([payload[i:i+1] for i in range(nelements)]), repeat)
+    print(f"{nelements} elements: jsonschema.validate {cold*1e3:.2f} ms, cached {warm*1e3:.2f} ms "
+          f"(x{cold/warm:.1f}), cached full schema {full*1e3:.2f} ms, validate_many of single elements {many*1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,50 @@
+""" Benchmark of DevMgr setup buffer building 
+
+Compare a full buffer re-build with the re-build after one device changed.
+The MAL must be installed, no server is needed (simulated interface).
+
+Usage::
+
+    python bench_setup_buffer.py [ndevices] [repeat]
+"""
+import sys
+import time
+
+import pyfcs.devices # register the devices
+from pyfcs.core.api import SimServer, SimInterface, create_setup_class
+
+
+def timeit(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter()-tic)
+    return best
+
+
+def main(ndevices=200, repeat=20):
+    devices = {f"lamp{i}":"lamp" for i in range(ndevices)}
+    interface = SimInterface(SimServer(devices))
+    setup = create_setup_class("Bench", devices)(interface)
+    for devname in devices:
+        setup.get(devname).switch_on(50.0, 10)
+
+    def full_rebuild():
+        for device_setup in setup:
+            device_setup._element_cache = None
+        setup.get_buffer()
+
+    def one_changed():
+        setup.get("lamp0").intensity += 1.0
+        setup.get_buffer()
+
+    setup.get_buffer()
+    full = timeit(full_rebuild, repeat)
+    incremental = timeit(one_changed, repeat)
+    print(f"{ndevices} devices: full {full*1e3:.2f} ms, one changed {incremental*1e3:.2f} ms, "
+          f"speedup x{full/incremental:.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,49 @@
+""" Benchmark of the memory used by device setups: slot buffers vs dictionaries
+
+Usage::
+
+    python bench_setup_memory.py [n]
+"""
+import sys
+import tracemalloc
+
+from pyfcs.devices.lamp import LampSetup
+from pyfcs.devices.motor import MotorSetup
+
+
+def dict_based(cls):
+    # instances with a __dict__ and a plain dictionary as parameter buffer 
+    def __init__(self, *args, **kwargs):
+        cls.__init__(self, *args, **kwargs)
+        self._params_buffer = {}
+    return type(cls.__name__, (cls,), {'__init__': __init__})
+
+
+def measure(cls, payload, n):
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    setups = []
+    for i in range(n):
+        setup = cls.from_dummy(f'dev{i}')
+        setup.set(payload)
+        setups.append(setup)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (size-start)/n, len(setups)
+
+
+CASES = [
+    (LampSetup, {'action':'ON', 'intensity':50.0, 'time':10}),
+    (MotorSetup, {'action':'MOVE_ABS', 'pos':12.5, 'unit':'UU'}),
+]
+
+def main(n=10000):
+    for Compact, payload in CASES:
+        dict_size, _ = measure(dict_based(Compact), payload, n)
+        compact_size, _ = measure(Compact, payload, n)
+        print(f"{Compact.get_devtype():6s} dict: {dict_size:7.1f} B/setup, "
+              f"slots: {compact_size:7.1f} B/setup ({100*(1-compact_size/dict_size):.0f}% less)")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -1,5 +1,5 @@
 """ All Public method and classes of the core structure """
-from .interface  import ConsulInterface, Interface, DummyInterface 
+from .interface  import ConsulInterface, Interface, DummyInterface, Pipeline, SingleFlight, RetryPolicy, DeadlineExceeded, warmup_interfaces, async_warmup_interfaces
 
 from .device import (
         parser, 
@@ -12,12 +12,17 @@ from .device import (
     )
 
 from .devmgr import (
-        BaseDevMgrSetup, 
-        DevMgrFactories , 
+        BaseDevMgrSetup, SetupTemplate, 
+        DevMgrFactories , warm_all, async_warm_all, 
         BaseDevMgrCommands, BaseDevMgrAsyncCommands, 
         create_command_classes, create_command_class, create_async_command_class, new_command, get_devtypes_from_interface , create_setup_class
     )
 
-from .tools import  StatusHandler, StatusWaiter, Empty 
+from .tools import  (
+        StatusHandler, StatusWaiter, Empty, MetricsRegistry, get_metrics_registry, PayloadElementError, 
+        SchemaCache, get_schema_cache, set_schema_cache, export_schema
+    )
 
 from .assembly  import (BaseAssemblySetup, BaseAssemblyCommand, BaseAssemblyAsyncCommand)
+
+from .simulator import SimServer, SimInterface, DevtypeBehaviour, SimulatedError, SimulatedTimeout
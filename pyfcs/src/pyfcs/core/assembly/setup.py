@@ -9,14 +9,18 @@ from abc import abstractmethod
 from functools import partial
 from typing import Any, Iterator
 
+from typing import TYPE_CHECKING
+
 from ifw.fcf.clib import log
-from ModFcfif.Fcfif import VectorfcfifSetupElem
 
 from pyfcs.core.define import  BufferGetter, ClientInterfacer,  DeviceClassGetter
 from pyfcs.core.device import DeviceProperty, BaseDeviceSetup,  create_schema, register
 
 from pyfcs.core.devmgr import BaseDevMgrSetup 
 
+if TYPE_CHECKING:
+    from ModFcfif.Fcfif import VectorfcfifSetupElem
+
 
 DeviceSetupMeta = type(BaseDeviceSetup)
 
@@ -189,6 +193,7 @@ class BaseAssemblySetup( metaclass=AssemblySetupMeta): # must follow SetupEntity
     get_element_payload = BaseDeviceSetup.get_element_payload 
     get_parameter_payload = BaseDeviceSetup.get_parameter_payload
     get_payload = BaseDeviceSetup.get_payload 
+    iter_payload = BaseDeviceSetup.iter_payload 
     
     setup = BaseDeviceSetup.setup 
     create_setup_command = BaseDeviceSetup.create_setup_command
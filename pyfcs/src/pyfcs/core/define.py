@@ -1,9 +1,11 @@
 from __future__ import annotations
 from enum import Enum
-from typing import Any, Callable, Coroutine
+from typing import TYPE_CHECKING, Any, Callable, Coroutine
 from typing_extensions import Protocol, runtime_checkable
-from elt.pymal.rr import ClientModule
-from ModFcfif.Fcfif import VectorfcfifSetupElem, SetupElem
+
+if TYPE_CHECKING:
+    from elt.pymal.rr import ClientModule
+    from ModFcfif.Fcfif import VectorfcfifSetupElem, SetupElem
 
 
 
@@ -5,6 +5,88 @@ from typing import Any, Callable
 from .method_decorator import get_payload_maker_info, get_payload_parser_info, is_payload_maker, is_setup_method, is_payload_parser
 from .parameter import ParamProperty 
 
+
+@dataclass
+class DispatchNode:
+    """ Node of a context dispatch trie 
+
+    Context keys are walked in their (sorted) tuple order, each level matching the 
+    value of one key. A node holds the method found when the path up to it matches. 
+    """
+    # (priority, context_keys, method_name), lowest priority wins 
+    result: tuple[int, tuple[str,...], str] | None = None 
+    # context key -> context value -> child node 
+    children: dict[str, dict[Any, 'DispatchNode']] = field(default_factory=dict)
+
+    def match(self, get: Callable[[str],Any])->tuple[int, tuple[str,...], str] | None:
+        """ Return the highest priority result matching the values given by get(key) """
+        best = self.result 
+        for key, branches in self.children.items():
+            child = branches.get( get(key) )
+            if child is not None:
+                found = child.match(get)
+                if found is not None and (best is None or found[0] < best[0]):
+                    best = found 
+        return best 
+
+
+class DispatchTable:
+    """ Dispatch trie with a memo of results by context values (payload parsers) 
+
+    Each distinct key of the trie is read once, the tuple of values gives the 
+    result directly after the first match. Unhashable values are matched on the 
+    trie without memo. At most ``max_memo`` value tuples are remembered.
+    """
+    max_memo = 1024 
+
+    def __init__(self, root: DispatchNode):
+        self.root = root 
+        self.keys: tuple[str,...] = tuple(_trie_keys(root))
+        self.memo: dict[tuple, tuple[int, tuple[str,...], str] | None] = {}
+
+    def match(self, get: Callable[[str],Any])->tuple[int, tuple[str,...], str] | None:
+        """ Same as DispatchNode.match """
+        values = tuple([get(key) for key in self.keys])
+        try:
+            return self.memo[values]
+        except KeyError:
+            pass 
+        except TypeError: # unhashable value 
+            return self.root.match(dict(zip(self.keys, values)).get)
+        found = self.root.match(dict(zip(self.keys, values)).get)
+        if len(self.memo) < self.max_memo:
+            self.memo[values] = found 
+        return found 
+
+def _trie_keys(node: DispatchNode, keys: list[str] | None = None)->list[str]:
+    # distinct keys of a trie, in walk order 
+    if keys is None:
+        keys = []
+    for key, branches in node.children.items():
+        if key not in keys:
+            keys.append(key)
+        for child in branches.values():
+            _trie_keys(child, keys)
+    return keys 
+
+
+def compile_dispatch(loockup: dict[tuple,dict], ordered_keys: list[tuple])->DispatchNode:
+    """ Compile a context loockup into a dispatch trie 
+
+    The match is the same as trying each context keys of ``ordered_keys`` in order 
+    and returning the first one for which ``loockup[context_keys][values]`` exists.
+    """
+    root = DispatchNode()
+    for priority, context_keys in enumerate(ordered_keys):
+        for values, method_name in loockup[context_keys].items():
+            node = root 
+            for key, value in zip(context_keys, values):
+                node = node.children.setdefault(key, {}).setdefault(value, DispatchNode())
+            if node.result is None:
+                node.result = (priority, context_keys, method_name)
+    return root 
+
+
 @dataclass
 class SetupClassDefinition:
     """ Object use to handle special attibutes of a DeviceSetup class
@@ -35,9 +117,12 @@ class SetupClassDefinition:
         # TODO: Check if the ordering is correct or if we need to conserve the 
         # order of method declaration
         self.parser_context_keys = sorted( self.payload_parser_loockup, key=lambda t: len(t), reverse=True)
+        self._parser_dispatch = DispatchTable(compile_dispatch( self.payload_parser_loockup, self.parser_context_keys))
     
     def _reorder_maker_keys(self):
         self.maker_context_keys = sorted( self.payload_maker_loockup, key=lambda t: len(t), reverse=True)
+        # no memo: reading a setup attribute parses its value, the trie reads only the needed ones 
+        self._maker_dispatch = compile_dispatch( self.payload_maker_loockup, self.maker_context_keys)
  
 
     def merge(self, setup_def: 'SetupClassDefinition')->None:
@@ -116,13 +201,10 @@ class SetupClassDefinition:
             assert (context, name) == ( ("action", "unit"), "move_abs_uu" )
             
         """
-        for context_key in self.parser_context_keys:
-            values = tuple( payload.get( k, None) for k in context_key )
-            try:
-                return context_key, self.payload_parser_loockup[context_key][values]
-            except KeyError:
-                pass 
-        return tuple(), None        
+        found = self._parser_dispatch.match( payload.get )
+        if found is None:
+            return tuple(), None 
+        return found[1], found[2]
     
     def add_payload_maker_method(self, name: str, maker: Callable)->None:
         """ Add a new payload maker method 
@@ -168,13 +250,10 @@ class SetupClassDefinition:
             
 
         """
-        for context_key in self.maker_context_keys:
-            values = tuple( getattr( setup, k, None) for k in context_key )
-            try:
-                return  self.payload_maker_loockup[context_key][values]
-            except KeyError:
-                pass 
-        return None        
+        found = self._maker_dispatch.match( lambda k: getattr(setup, k, None) )
+        if found is None:
+            return None 
+        return found[2]
 
 
     def add_parameter(self, name:str, param: ParamProperty):
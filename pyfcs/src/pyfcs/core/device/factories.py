@@ -2,6 +2,7 @@ from __future__ import annotations
 from pyfcs.core.interface import ConsulInterface, DummyInterface, Interface
 
 class DeviceFactoryMethods:
+    __slots__ = ()
     @classmethod
     def from_uri(cls, device_id: str,  uri: str, timeout:int =60000):
         """
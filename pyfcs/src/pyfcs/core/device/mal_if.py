@@ -1,12 +1,16 @@
 from __future__ import annotations
-from ModFcfif.Fcfif import SetupElem
+from typing import TYPE_CHECKING
 
 from abc import ABC, ABCMeta, abstractmethod
 from dataclasses import dataclass
 from enum import EnumMeta
 from typing import Any, Callable
+from pyfcs.core import middleware as mw 
 from pyfcs.core.define import ClientInterfacer
 
+if TYPE_CHECKING:
+    from ModFcfif.Fcfif import SetupElem
+
 class BaseValueProperty:
     pass 
 
@@ -90,7 +94,7 @@ class BaseMalIf(ABC, metaclass=MalIfMeta): # must follow DeviceInterface Protoco
         self.interface = interface 
         if element is None:
             fcfmal = interface.get_mal()
-            self.element = fcfmal.createDataEntity(SetupElem)
+            self.element = fcfmal.createDataEntity(mw.SetupElem)
             self.container = self.element.getDevice()
             
             # yes we need to do that to set the dataentity correctly 
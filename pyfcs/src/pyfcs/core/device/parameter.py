@@ -4,11 +4,12 @@ from enum import EnumMeta
 from typing import Any, Callable, Optional, Type
 from typing_extensions import Protocol
 
-from .parser import BaseParser , StringParser, parse_parser, ParsingError
+from .parser import BaseParser , StringParser, parse_parser, ParsingError, _slots
 
 
 class ParamParentProtocol(Protocol):
     _params_buffer : dict 
+    _element_cache : Any # cached Mal element, set to None when a parameter changes 
 
 def set_and_record(param_name:str, setter: Callable, param_set : set[str], value: Any)->None:
     try:
@@ -32,7 +33,7 @@ class MethodNameSetter:
     def __call__(self, device, value):
         getattr( device, self.method)(value)
 
-@dataclass
+@dataclass(**_slots)
 class ParamProperty:
     parser: BaseParser = StringParser
     name: str | None   = None 
@@ -52,17 +53,27 @@ class ParamProperty:
             value = parent._params_buffer[self.name]
         except KeyError:
             return None
-        return self.parse_out(value)
+        # parse_out inlined, this is the payload dump path 
+        try:
+            return self.parser.parse_out(value) 
+        except ParsingError as err:
+            raise ParsingError( f"parameter {self.name!r}: {err}") from err
     
     def __set__(self, parent: ParamParentProtocol, value: Any)-> None:
         if value is None:
             # setting None is equivalent to deleting the param
             parent._params_buffer.pop(self.name, None) 
         else:
-            parent._params_buffer[self.name] = self.parse_in( value)
+            # parse_in inlined, this is the set path 
+            try:
+                parent._params_buffer[self.name] = self.parser.parse_in(value)
+            except ParsingError as err:
+                raise ParsingError( f"parameter {self.name!r}: {err}") from err
+        parent._element_cache = None 
     
     def __delete__(self, parent):
         parent._params_buffer.pop(self.name, None) 
+        parent._element_cache = None 
 
     def parse_in(self, value):
         try:
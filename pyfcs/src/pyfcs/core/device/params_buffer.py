@@ -0,0 +1,176 @@
+"""
+@copyright EFISOFT
+@brief Compact storage of device setup parameter values
+
+Each DeviceSetup class has a ParamLayout giving a fixed slot index to each of
+its parameters (assigned by DeviceSetupMeta). The values of an instance are
+kept in a list of that size with a bitmask of the slots which are set. The
+insertion order is packed in an integer, one code of ``layout.bits`` bits per
+name. ParamsBuffer behaves as the dictionary used before (``_params_buffer``).
+Its version is incremented at each change, the setup uses it to know if its
+cached Mal element is still valid.
+"""
+from __future__ import annotations
+from collections.abc import MutableMapping
+from typing import Any, Iterable, Iterator
+
+
+class ParamLayout:
+    """ Fixed slot index of parameter names
+
+    Args:
+        names (Iterable): parameter names (as in the buffer) in slot order
+    """
+    __slots__ = ('names', 'index', 'extra_code', 'bits')
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: tuple[str,...] = tuple(names)
+        self.index: dict[str,int] = {name:i for i,name in enumerate(self.names)}
+        # insertion order codes: slot index + 1, extra_code for names not in the layout
+        self.extra_code = len(self.names)+1
+        self.bits = self.extra_code.bit_length()
+
+    def __len__(self)->int:
+        return len(self.names)
+
+    def __repr__(self)->str:
+        return f"ParamLayout({self.names!r})"
+
+
+_missing = object()
+
+class ParamsBuffer(MutableMapping):
+    """ dict like container of parameter values with fixed slots
+
+    Names not in the layout are accepted and kept in an extra dictionary.
+    Iteration follows the insertion order, as a dictionary.
+    """
+    __slots__ = ('_layout', '_values', '_mask', '_order', '_extra', '_version')
+
+    def __init__(self, layout: ParamLayout, data: Any = None):
+        self._layout = layout
+        self._values: list[Any] = [None]*len(layout.names)
+        self._mask = 0
+        self._order = 0 # packed insertion order codes, the last one in the lowest bits
+        self._extra: dict[str,Any] | None = None
+        self._version = 0 # incremented at each change
+        if data:
+            self.update(data)
+
+    def _codes(self)->list[int]:
+        # insertion order codes, oldest first
+        bits = self._layout.bits
+        mask = (1 << bits) - 1
+        order = self._order
+        codes = []
+        while order:
+            codes.append(order & mask)
+            order >>= bits
+        codes.reverse()
+        return codes
+
+    def _remove_code(self, code: int, occurrence: int = 0)->None:
+        codes = self._codes()
+        positions = [p for p, c in enumerate(codes) if c == code]
+        del codes[positions[occurrence]]
+        order, bits = 0, self._layout.bits
+        for c in codes:
+            order = order << bits | c
+        self._order = order
+
+    def __getitem__(self, name: str)->Any:
+        i = self._layout.index.get(name)
+        if i is not None and self._mask >> i & 1:
+            return self._values[i]
+        if i is None and self._extra is not None:
+            return self._extra[name]
+        raise KeyError(name)
+
+    def get(self, name: str, default: Any = None)->Any:
+        i = self._layout.index.get(name)
+        if i is None:
+            return default if self._extra is None else self._extra.get(name, default)
+        return self._values[i] if self._mask >> i & 1 else default
+
+    def __setitem__(self, name: str, value: Any)->None:
+        self._version += 1
+        layout = self._layout
+        i = layout.index.get(name)
+        if i is None:
+            if self._extra is None:
+                self._extra = {}
+            new = name not in self._extra
+            self._extra[name] = value
+            code = layout.extra_code
+        else:
+            new = not self._mask >> i & 1
+            self._values[i] = value
+            self._mask |= 1 << i
+            code = i+1
+        if new:
+            self._order = self._order << layout.bits | code
+
+    def __delitem__(self, name: str)->None:
+        i = self._layout.index.get(name)
+        if i is None:
+            if self._extra is None or name not in self._extra:
+                raise KeyError(name)
+            self._remove_code(self._layout.extra_code, list(self._extra).index(name))
+            del self._extra[name]
+        elif self._mask >> i & 1:
+            self._remove_code(i+1)
+            self._values[i] = None
+            self._mask &= ~(1 << i)
+        else:
+            raise KeyError(name)
+        self._version += 1
+
+    def pop(self, name: str, default: Any = _missing)->Any:
+        try:
+            value = self[name]
+        except KeyError:
+            if default is _missing:
+                raise
+            return default
+        del self[name]
+        return value
+
+    def __contains__(self, name: object)->bool:
+        i = self._layout.index.get(name)
+        if i is None:
+            return self._extra is not None and name in self._extra
+        return bool(self._mask >> i & 1)
+
+    def __iter__(self)->Iterator[str]:
+        names = self._layout.names
+        extras = iter(list(self._extra)) if self._extra else None
+        return iter([names[code-1] if code <= len(names) else next(extras) for code in self._codes()])
+
+    def __len__(self)->int:
+        return bin(self._mask).count("1") + (len(self._extra) if self._extra else 0)
+
+    def clear(self)->None:
+        self._version += 1
+        if self._mask:
+            self._values = [None]*len(self._layout.names)
+            self._mask = 0
+        self._order = 0
+        self._extra = None
+
+    def copy(self)->ParamsBuffer:
+        new = ParamsBuffer(self._layout)
+        new._values = list(self._values)
+        new._mask = self._mask
+        new._order = self._order
+        new._extra = None if self._extra is None else dict(self._extra)
+        return new
+
+    def __eq__(self, other: object)->bool:
+        if isinstance(other, ParamsBuffer) and other._layout is self._layout and not (self._extra or other._extra):
+            return self._mask == other._mask and self._values == other._values
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self)->str:
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
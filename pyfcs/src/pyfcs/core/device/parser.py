@@ -1,6 +1,7 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, EnumMeta
+import sys
 from functools import partial
 from typing import Any, Iterable, Optional, Type
 from collections import UserList 
@@ -16,7 +17,11 @@ def enum_map(enumerator, prefix="")->dict[str,Enum]:
 class ParsingError(ValueError):
     pass
 
+# parsers have no __dict__ when possible (python >= 3.10)
+_slots = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 class BaseParser:
+    __slots__ = ()
     def parse_in(self, value):
         return value 
     def parse_out(self, value):
@@ -25,7 +30,7 @@ class BaseParser:
     def get_schema(self):
         return {}
 
-@dataclass 
+@dataclass(**_slots)
 class StringParser(BaseParser):
     minLength: int = None
     maxLength: int = None
@@ -67,13 +72,14 @@ class StringParser(BaseParser):
         return schema  
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_slots)
 class StringMapParser(BaseParser):
     map: dict[str,Any]
+    rmap: dict[Any,str] = field(init=False, repr=False, compare=False)
      
     def __post_init__(self):
         # inverse dictionary 
-        self.rmap = dict( zip( self.map.values(), self.map.keys() ))  
+        object.__setattr__(self, 'rmap', dict( zip( self.map.values(), self.map.keys() )))
         
     def parse_in(self, value):
         try:
@@ -92,11 +98,12 @@ class StringMapParser(BaseParser):
 
 
 class EnumNameParser(StringMapParser):
+    __slots__ = ()
     def __init__(self, enumerator:EnumMeta, prefix=""):
         super().__init__( enum_map( enumerator, prefix))
 
 
-@dataclass
+@dataclass(**_slots)
 class EnumParser(BaseParser):
     enumerator: EnumMeta
     def parse_in(self, value):
@@ -111,7 +118,7 @@ class EnumParser(BaseParser):
 
 
 
-@dataclass
+@dataclass(**_slots)
 class FloatParser(BaseParser):
     minimum: Optional[float] = None
     maximum: Optional[float] = None 
@@ -159,7 +166,7 @@ class FloatParser(BaseParser):
             schema['multipleOf'] = self.multipleOf
         return schema 
 
-@dataclass
+@dataclass(**_slots)
 class IntParser(FloatParser):
     minimum: Optional[int] = None
     maximum: Optional[int] = None 
@@ -216,7 +223,7 @@ class ListWithParser(UserList):
         self.data += [self._parse(item) for item in other] 
         return self
 
-@dataclass
+@dataclass(**_slots)
 class ListParser(BaseParser):
     element_parser: BaseParser 
     
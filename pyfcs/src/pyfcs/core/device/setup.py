@@ -2,23 +2,25 @@ from __future__ import annotations
 
 from abc import ABC, ABCMeta, abstractclassmethod, abstractmethod
 from dataclasses import dataclass, field
-from functools import partial
-from typing import Any, Callable, Dict, Union
-
-
-from ModFcfif.Fcfif import SetupElem, VectorfcfifSetupElem
-from elt import pymal
-
+from functools import lru_cache
+import json
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Union
 
+from pyfcs.core import middleware as mw 
 from pyfcs.core.define import ClientInterfacer
 from pyfcs.core.interface import SetupCommand  
 from pyfcs.core.tools import BufferHolder 
+from pyfcs.core.tools.schema_cache import source_digest
 
 from .method_decorator import get_payload_parser_info, _empty
 from .parameter import ParamProperty
 from .mal_if import BaseMalIf
 from .factories import DeviceFactoryMethods
 from .class_inspector import SetupClassDefinition 
+from .params_buffer import ParamLayout, ParamsBuffer
+
+if TYPE_CHECKING:
+    from ModFcfif.Fcfif import SetupElem, VectorfcfifSetupElem
 
 
 PayloadElement = Dict[ str, Union[str,Dict[str,Any]]]
@@ -31,6 +33,82 @@ def get_parameters(cls: type[BaseDeviceSetup])->set[str]:
     """ Return a set of parameter names of a DeviceSetup Class """
     return cls.__setup_definition__.parameters 
 
+@lru_cache(maxsize=None)
+def _parameter_names(cls: type[BaseDeviceSetup])->tuple[frozenset[str], tuple[str,...]]:
+    # (all parameter names, required parameter names) as they appear in payloads 
+    names, required = set(), []
+    for param_name in cls.__setup_definition__.parameters:
+        param = getattr(cls, param_name)
+        name = param.name or param_name 
+        names.add(name)
+        if param.required:
+            required.append(name)
+    return frozenset(names), tuple(required)
+
+def _is_number(value: Any)->bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+# JSON schema type -> python value check, as done by jsonschema (draft 7)
+_json_type_checks: dict[str, Callable[[Any],bool]] = {
+    'number': _is_number, 
+    'integer': lambda v: _is_number(v) and (isinstance(v, int) or v.is_integer()), 
+    'string': lambda v: isinstance(v, str), 
+    'boolean': lambda v: isinstance(v, bool), 
+    'array': lambda v: isinstance(v, list), 
+    'object': lambda v: isinstance(v, dict), 
+    'null': lambda v: v is None, 
+}
+
+def _check_json_type(schema: dict, value: Any)->str|None:
+    # error message if value does not match the 'type' (and array 'items') of a parameter schema 
+    json_type = schema.get('type')
+    if json_type is not None:
+        types = [json_type] if isinstance(json_type, str) else json_type
+        if not any(_json_type_checks.get(t, lambda v:True)(value) for t in types):
+            return f"{value!r} is not of type {', '.join(map(repr, types))}"
+    items = schema.get('items')
+    if isinstance(items, dict) and isinstance(value, list):
+        for item in value:
+            error = _check_json_type(items, item)
+            if error:
+                return error 
+    return None 
+
+@lru_cache(maxsize=None)
+def _parameter_schemas(cls: type[BaseDeviceSetup])->dict[str,dict]:
+    # parameter name (as in payloads) -> parameter schema 
+    schemas = {}
+    for param_name in cls.__setup_definition__.parameters:
+        param = getattr(cls, param_name)
+        schemas[param.name or param_name] = param.get_schema()
+    return schemas 
+
+def check_parameter_payload(cls: type[BaseDeviceSetup], payload: dict[str,Any])->None:
+    """ Check a parameter payload against the class definition without JSON schema 
+
+    Checks what the parsers and payload_parser methods do not: unknown and 
+    required parameters and the JSON type of values (e.g. a bool or a string 
+    is not a number). 
+
+    Raises:
+        ValueError: if the payload is not a dictionary, has unknown parameters, misses 
+            required parameters or has values of the wrong type 
+    """
+    if not isinstance(payload, dict):
+        raise ValueError(f"expecting a dictionary as {cls.get_devtype()} parameters got a {type(payload)}")
+    names, required = _parameter_names(cls)
+    unknown = [k for k in payload if k not in names]
+    if unknown:
+        raise ValueError(f"unknown parameter(s) {', '.join(map(repr,unknown))} for {cls.get_devtype()}")
+    missing = [k for k in required if k not in payload]
+    if missing:
+        raise ValueError(f"missing required parameter(s) {', '.join(map(repr,missing))} for {cls.get_devtype()}")
+    schemas = _parameter_schemas(cls)
+    for name, value in payload.items():
+        error = _check_json_type(schemas[name], value)
+        if error:
+            raise ValueError(f"parameter {name!r} of {cls.get_devtype()}: {error}")
+
 def create_schema(cls: type[BaseDeviceSetup])->dict:
     """ Build the schema definition for a DeviceSetup class 
 
@@ -65,6 +143,29 @@ def create_schema(cls: type[BaseDeviceSetup])->dict:
     return definitions  
 
 
+def describe_setup_class(cls: type[BaseDeviceSetup])->str:
+    """ Return a text description of everything the schema of a DeviceSetup class depends on 
+
+    Used as a cache key (see pyfcs.core.tools.schema_cache) 
+    """
+    scd = cls.__setup_definition__
+    lines = [
+        f"{cls.__module__}.{cls.__qualname__} devtype={cls.get_devtype()!r}", 
+        f"schema from {cls.get_schema.__module__}.{cls.get_schema.__qualname__} {source_digest(cls.get_schema)}", 
+        f"generators {source_digest(create_schema)} {source_digest(_create_allOf_schema)}"
+    ]
+    # parameters are described by their generated schema, parser reprs may contain addresses 
+    for param_name in sorted(scd.parameters):
+        param = getattr(cls, param_name)
+        schema = json.dumps(param.get_schema(), sort_keys=True, default=str)
+        lines.append(f"{param_name}: name={param.name!r} required={param.required!r} {schema}")
+    for context_keys in scd.parser_context_keys:
+        for values, method_name in scd.payload_parser_loockup[context_keys].items():
+            info = get_payload_parser_info( getattr(cls, method_name) )
+            lines.append(f"{context_keys!r}={values!r}: {method_name} {info!r}")
+    return "\n".join(lines)
+
+
 def _create_allOf_schema(cls: type[BaseDeviceSetup])->list[dict]:
     """ generate the 'allOf' part of a schema definition from the payload_parser methods """
 
@@ -100,6 +201,18 @@ def _create_allOf_schema(cls: type[BaseDeviceSetup])->list[dict]:
     return allOf
 
 
+def _create_param_layout(bases: tuple, namespace: dict[str,Any])->ParamLayout:
+    """ Parameter slots: the ones of the base classes keep their index, new ones are appended """
+    names: dict[str,None] = {}
+    for cls in bases:
+        for name in getattr(cls, '__param_layout__', ParamLayout()).names:
+            names.setdefault(name)
+    for key, obj in namespace.items():
+        if isinstance(obj, ParamProperty):
+            names.setdefault(obj.name or key)
+    return ParamLayout(names)
+
+
 class DeviceSetupMeta(ABCMeta):
     """" MetaClass for a DeviceSetup class  """ 
     def __new__(mcs, clsname, bases, namespace, **kwargs):  
@@ -120,12 +233,16 @@ class DeviceSetupMeta(ABCMeta):
             
         namespace['__setup_definition__'] = setup_definition
         namespace['__schema__'] = None # force None Will be build from get_schema 
+        namespace['__param_layout__'] = _create_param_layout(bases, namespace)
         return super().__new__( mcs, clsname, bases, namespace, **kwargs)
 
 
 class BaseDeviceSetup(ABC, DeviceFactoryMethods,  metaclass=DeviceSetupMeta): # Must Follow SetupEntity Protocol
+    # Sub-classes without __slots__ have a __dict__ as usual, declare ``__slots__ = ()`` 
+    # to keep instances compact 
+    __slots__ = ('interface', '_id', '_params_buffer', '_element_cache')
     devtype = None
-    _params_buffer: dict 
+    _params_buffer: ParamsBuffer # dict like, see pyfcs.core.device.params_buffer 
     MalIf = BaseMalIf 
 
     def __init__(self,
@@ -133,8 +250,20 @@ class BaseDeviceSetup(ABC, DeviceFactoryMethods,  metaclass=DeviceSetupMeta): #
         device_id: str, 
       )->None:
         self.interface = interface 
+        self._params_buffer = ParamsBuffer(self.__param_layout__)
+        # (buffer, buffer version, Mal SetupElem built from it), None when it needs to be re-built 
+        self._element_cache: tuple[ParamsBuffer, int, SetupElem] | None = None 
         self.id = device_id
-        self._params_buffer = {}
+
+    @property
+    def id(self)->str:
+        """ device identifier """
+        return self._id 
+    
+    @id.setter
+    def id(self, device_id: str)->None:
+        self._id = device_id 
+        self._element_cache = None 
 
     @classmethod
     def get_devtype(cls):
@@ -176,6 +305,7 @@ class BaseDeviceSetup(ABC, DeviceFactoryMethods,  metaclass=DeviceSetupMeta): #
     def clear(self):
         """ Clear the setup buffer. Reseted at its init state """
         self._params_buffer.clear()
+        self._element_cache = None 
 
     def set(self, __payload_dict__={}, **payload):
         """ Set a parameters  payload add it to the device setup buffer  
@@ -215,8 +345,8 @@ class BaseDeviceSetup(ABC, DeviceFactoryMethods,  metaclass=DeviceSetupMeta): #
             for key in context_keys:
                 payload.pop(key)
 
-            # use partial in order to deal with positional argument by name 
-            partial(getattr(self, validator), **payload )()
+            # remaining parameters are given by name 
+            getattr(self, validator)(**payload)
 
     def get_parameter_payload(self,all=False)->dict[str,Any]:
         """ get the parameter payload 
@@ -263,9 +393,13 @@ class BaseDeviceSetup(ABC, DeviceFactoryMethods,  metaclass=DeviceSetupMeta): #
 
         """
         if force or self.is_setup_valid():
-            return [self.get_element_payload()] 
-        else:
-            return []
+            return [self.get_element_payload()]
+        return []
+
+    def iter_payload(self, force: bool=False)->Iterator[PayloadElement]:
+        """ Iterate over the payload elements of the device setup buffer (see get_payload) """
+        if force or self.is_setup_valid():
+            yield self.get_element_payload()
     
     def load_buffer(self, element: SetupElem| VectorfcfifSetupElem | BaseDeviceSetup)->None:
         """ Update the current setup from an existing buffer 
@@ -274,7 +408,7 @@ class BaseDeviceSetup(ABC, DeviceFactoryMethods,  metaclass=DeviceSetupMeta): #
             buffer_element (SetupElement,  VectorfcfifSetupElem, DeviceSetup):
                  If a Vector is given, it must be of len == 1
         """
-        if isinstance( element, VectorfcfifSetupElem):
+        if isinstance( element, mw.VectorfcfifSetupElem):
             if len(element)>1:
                  raise ValueError("The receive Vector Setup Elem has a len greater than one ")
             if not len(element):
@@ -288,6 +422,7 @@ class BaseDeviceSetup(ABC, DeviceFactoryMethods,  metaclass=DeviceSetupMeta): #
             malif = self.MalIf( self.interface, element)
             self._params_buffer.update( malif.get_values() )
             self.id = malif.get_id()
+        self._element_cache = None 
 
     def get_malif(self)->MalIf:
         """ Build and return a device mal interface for this device """
@@ -297,8 +432,21 @@ class BaseDeviceSetup(ABC, DeviceFactoryMethods,  metaclass=DeviceSetupMeta): #
         return malif 
     
     def get_element_buffer(self)->SetupElem:
-        """ Return the Mal SetupElem of the curent device setup buffer """
-        return self.get_malif().element 
+        """ Return the Mal SetupElem of the curent device setup buffer 
+
+        The element is cached and re-built only when a parameter (including a direct 
+        change of ``_params_buffer``) or the id changed. A cached element is never modified, 
+        buffers already returned are not affected by later changes. 
+        """
+        buffer = self._params_buffer 
+        version = getattr(buffer, '_version', None)
+        cache = self._element_cache 
+        if cache is not None and cache[0] is buffer and cache[1] == version:
+            return cache[2]
+        element = self.get_malif().element 
+        if version is not None: # a plain dict cannot tell if it changed 
+            self._element_cache = (buffer, version, element)
+        return element 
         
     def get_buffer(self)->VectorfcfifSetupElem:
         """ Return the Cii/Mal buffer for the device 
@@ -308,7 +456,7 @@ class BaseDeviceSetup(ABC, DeviceFactoryMethods,  metaclass=DeviceSetupMeta): #
         Resturns:
             buffer (VectorfcfifSetupElem): Mal buffer vector 
         """
-        buffer= VectorfcfifSetupElem()
+        buffer= mw.VectorfcfifSetupElem()
         if self.is_setup_valid():
             buffer.append( self.get_element_buffer())
         return buffer
@@ -3,6 +3,7 @@ from .setup import BaseDevMgrSetup
 from .app_commands import AppCommands, AppAsyncCommands 
 from .std_commands import StdCommands, StdAsyncCommands 
 from .daq_commands import DaqCommands, DaqAsyncCommands
-from .factories import DevMgrFactories
+from .factories import DevMgrFactories, warm_all, async_warm_all
 from .class_maker import create_command_classes, create_command_class, create_async_command_class, new_command, get_devtypes_from_interface, create_setup_class
 
+from .template import SetupTemplate
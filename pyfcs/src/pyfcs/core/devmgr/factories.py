@@ -1,5 +1,11 @@
 from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from inspect import iscoroutinefunction
+from typing import Iterable
+
 from pyfcs.core.interface import DummyInterface, ConsulInterface, Interface
+from pyfcs.core.interface.warmup import ALL_KINDS
 
 class DevMgrFactories:
     """ A set of Handy class method to build Object instances """
@@ -38,5 +44,75 @@ class DevMgrFactories:
         """ ClassMethod: Build an instance with a Dummy Interface for test purposes """
         return cls( DummyInterface() )
 
+    def warm(self, 
+            kinds: Iterable[str] = ALL_KINDS, 
+            asynchronous: bool|None = False, 
+            devtypes: bool = True, 
+            max_workers: int|None = None
+        ):
+        """ Pre-create the interface clients and prefetch the devtype map concurrently 
+
+        Args:
+            kinds (Iterable[str], optional): client kinds ('App', 'Std', 'Daq'). Default all 
+            asynchronous (bool|None, optional): False (default) synchronous clients, 
+                True asynchronous clients, None both of them 
+            devtypes (bool, optional): If True (default) the devname->devtype map is 
+                asked to the server. Ignored for asynchronous objects (see async_warm)
+            max_workers (int, optional): maximum number of threads used for clients creation 
+        
+        Returns:
+            self, to allow ``DevMgrCommands.from_consul('fcs1-req').warm()``
+        """
+        with ThreadPoolExecutor(2) as executor:
+            futures = [executor.submit(self.interface.warmup, kinds, asynchronous, max_workers)]
+            if devtypes and not iscoroutinefunction(self.get_devtypes):
+                futures.append( executor.submit(self.get_devtypes) )
+            for future in futures:
+                future.result()
+        return self 
+
+    async def async_warm(self, 
+            kinds: Iterable[str] = ALL_KINDS, 
+            asynchronous: bool|None = True, 
+            devtypes: bool = True
+        ):
+        """ Asynchronous version of warm. Default is to create asynchronous clients """
+        coroutines = [self.interface.async_warmup(kinds, asynchronous)]
+        if devtypes:
+            if iscoroutinefunction(self.get_devtypes):
+                coroutines.append( self.get_devtypes() )
+            else:
+                coroutines.append( asyncio.get_running_loop().run_in_executor(None, self.get_devtypes) )
+        await asyncio.gather(*coroutines)
+        return self 
+
+
+def warm_all(
+        objects: Iterable[DevMgrFactories], 
+        kinds: Iterable[str] = ALL_KINDS, 
+        asynchronous: bool|None = False, 
+        devtypes: bool = True
+    )->None:
+    """ Warm several device manager objects in parallel 
+
+    The start-up time is then roughly the one of the slowest server. 
+
+    Exemple::
 
+        fcs_list = [DevMgrCommands.from_consul(f'fcs{i}-req') for i in range(1,6)]
+        warm_all( fcs_list )
+    """
+    objects = list(objects)
+    if not objects:
+        return 
+    with ThreadPoolExecutor(len(objects)) as executor:
+        list(executor.map(lambda o: o.warm(kinds, asynchronous, devtypes), objects))
 
+async def async_warm_all(
+        objects: Iterable[DevMgrFactories], 
+        kinds: Iterable[str] = ALL_KINDS, 
+        asynchronous: bool|None = True, 
+        devtypes: bool = True
+    )->None:
+    """ Asynchronous version of warm_all """
+    await asyncio.gather( *(o.async_warm(kinds, asynchronous, devtypes) for o in objects) )
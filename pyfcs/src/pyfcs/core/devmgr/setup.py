@@ -1,15 +1,27 @@
 from __future__ import annotations
-from typing import Any, Callable, Dict, List, Type
+from collections.abc import Sequence
+from functools import partial
+import json
+import operator
+import os
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Type
 
-from ModFcfif.Fcfif import VectorfcfifSetupElem
 from ifw.fcf.clib import log
+from jsonschema.exceptions import ValidationError
 
+from pyfcs.core import middleware as mw 
 from pyfcs.core.device import DeviceProperty, BaseDeviceSetup, register 
-from pyfcs.core.tools import PayloadReceiver, BufferHolder 
+from pyfcs.core.device.setup import check_parameter_payload, describe_setup_class
+from pyfcs.core.tools import PayloadReceiver, PayloadElementError, BufferHolder 
+from pyfcs.core.tools.payload_receiver import collect_results, portable_error, run_in_pool
+from pyfcs.core.tools.schema_cache import fingerprint, get_schema_cache, source_digest
 from pyfcs.core.define import ClientInterfacer, DeviceClassGetter, SetupEntity
-from pyfcs.core.interface import SetupCommand 
+from pyfcs.core.interface import SetupCommand, DummyInterface
 from pyfcs.core.generator import  AllSetupMethodGenerator
 
+if TYPE_CHECKING:
+    from ModFcfif.Fcfif import VectorfcfifSetupElem
+
 
 def populate_schema(cls: type[SetupEntity], definitions: dict)->None:
     """ Populate a schema definition with the schema definition of the DeviceSetup class 
@@ -148,15 +160,117 @@ class DevMgrSetupMeta(type):
 
 
 
+DUPLICATE_POLICIES = ("append", "replace", "error")
+
+def _fingerprint(device_setup: SetupEntity)->str|None:
+    """ Return a fingerprint of what a device setup sends, None if it sends nothing 
+
+    It is built from the parameter buffers (and the ones of assembly devices), 
+    without dumping the payload. 
+    """
+    params = getattr(device_setup, '_params_buffer', None)
+    if params is None: # other setup entities 
+        payload = device_setup.get_payload()
+        return json.dumps(payload, sort_keys=True, default=str) if payload else None 
+    if not device_setup.is_setup_valid():
+        return None 
+    members = getattr(device_setup, '_device_cash', None) or {}
+    return repr((
+            type(device_setup).__qualname__, device_setup.id, sorted(params.items()), 
+            [(devname, sorted(ds._params_buffer.items())) for devname, ds in members.items()]
+        ))
+
+# parsed payload as sent back by worker processes: 
+# (device id, setup class, parameter buffer, member devices of an assembly)
+ParsedElement = tuple[str, Type[SetupEntity], Dict[str,Any], Dict[str,tuple]]
+
+_worker_setup: BaseDevMgrSetup | None = None 
+
+def _member_buffers(device_setup: SetupEntity)->dict[str,tuple]:
+    # assemblies keep the setups of their DeviceProperty devices in _device_cash 
+    members = getattr(device_setup, '_device_cash', None) or {}
+    return {devname:(type(ds), dict(ds._params_buffer)) for devname, ds in members.items()}
+
+def _init_worker(cls: type[BaseDevMgrSetup])->None:
+    global _worker_setup
+    _worker_setup = cls(DummyInterface())
+    _worker_setup.payload_receiver.validator # compile once per process 
+
+def _parse_in_worker(args: tuple[List[Dict[str,Any]], bool])->tuple[list[ParsedElement]|None, Exception|None]:
+    payload, trusted = args 
+    try:
+        devices = _worker_setup._parse_payload(payload, trusted)
+        # parsed values as in the buffer, they are not parsed again 
+        parsed = [(ds.id, type(ds), dict(ds._params_buffer), _member_buffers(ds)) for ds in devices]
+    except Exception as err:
+        return None, portable_error(err)
+    return parsed, None 
+
+
+class BufferView(Sequence):
+    """ Read only ordered view of the device setups of a DevMgr setup (``setup._buffer``) """
+    __slots__ = ('_setup',)
+
+    def __init__(self, setup: BaseDevMgrSetup):
+        self._setup = setup 
+
+    def __getitem__(self, item):
+        return self._setup[item]
+
+    def __len__(self)->int:
+        return len(self._setup)
+
+    def __iter__(self)->Iterator[SetupEntity]:
+        return iter(self._setup)
+
+    def __eq__(self, other: object)->bool:
+        if isinstance(other, (list, tuple, BufferView)):
+            return list(self) == list(other)
+        return NotImplemented 
+
+    __hash__ = None 
+
+    def __repr__(self)->str:
+        return repr(list(self))
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("the setup buffer view is read only, use the add, remove or clear methods of the setup")
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only 
+    __setitem__ = __delitem__ = __iadd__ = _read_only 
+
+
 class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=False):
-    """ Class manage the buffer of the setup request """
+    """ Class manage the buffer of the setup request 
+    
+    Device setups are kept in insertion order (the order of the Setup buffer) and 
+    indexed by device id.
+
+    Args:
+        interface: client interface 
+        duplicate (str, optional): policy when a device setup is added with an id already 
+            in the buffer and without override: 
+                - 'append' (default) both are kept and sent 
+                - 'replace' the existing one is replaced 
+                - 'error' a ValueError is raised 
+    """
     _devtypes_map = None # Will be filled at request from server 
     
-    def __init__(self, interface: ClientInterfacer):
+    def __init__(self, interface: ClientInterfacer, duplicate: str = "append"):
+        if duplicate not in DUPLICATE_POLICIES:
+            raise ValueError(f"duplicate must be one of {DUPLICATE_POLICIES} got {duplicate!r}")
         self.interface = interface 
-        self._buffer: list[SetupEntity] = [] 
+        self.duplicate = duplicate 
+        self._entries: dict[int, SetupEntity] = {} # slot -> device setup, in insertion order 
+        self._index: dict[str, list[int]] = {} # device id -> slots 
+        self._next_slot = 0 
+        self._sent: dict[str,str] | None = None # device id -> fingerprint of last successful setup 
         self.payload_receiver = PayloadReceiver(self.get_schema())
 
+    @property
+    def _buffer(self)->BufferView:
+        """ ordered device setups (read only view) """
+        return BufferView(self)
+
     @classmethod 
     def get_schema(cls)->dict:
         """ Class Method: return the class JSON schema 
@@ -168,23 +282,67 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
         if schema:
             return schema
 
-        schema = create_empty_schema()
+        cache = get_schema_cache()
+        if cache is None:
+            schema = cls._create_schema()
+        else:
+            schema = cache.get_or_create( cls.get_schema_fingerprint(), cls._create_schema)
+            # device classes can re-use their part 
+            for devtype in cls.__devtypes__:
+                Setup = cls.__register__.setup_class(devtype)
+                if getattr(Setup, "__schema__", True) is None:
+                    Setup.__schema__ = schema['definitions'][Setup.get_devtype()]
         
+        # save for next time. Maybe it shall be in Meta??
+        cls.__schema__ = schema 
+        return schema  
 
+    @classmethod 
+    def _create_schema(cls)->dict:
+        schema = create_empty_schema()
         definitions = schema['definitions']
-        
         for devtype in cls.__devtypes__:
             populate_schema( cls.__register__.setup_class(devtype), definitions)
-        
-        # save for next time. Maybe it shall be in Meta??
-        cls.__schema__ = schema 
-        return schema  
+        return schema 
+
+    @classmethod 
+    def get_schema_fingerprint(cls)->str:
+        """ Class Method: return a digest of what the class JSON schema is generated from """
+        return fingerprint(
+                source_digest(create_empty_schema), source_digest(populate_schema), source_digest(cls._create_schema), 
+                *(describe_setup_class(cls.__register__.setup_class(devtype)) for devtype in cls.__devtypes__)
+            )
 
     def __iter__(self):
-        return self._buffer.__iter__()
+        return iter(list(self._entries.values()))
 
     def __getitem__(self, item):
-        return self._buffer[item] 
+        if isinstance(item, slice):
+            return list(self._entries.values())[item]
+        i = operator.index(item)
+        n = len(self._entries)
+        if i < 0:
+            i += n 
+        if not 0 <= i < n:
+            raise IndexError("setup buffer index out of range")
+        self._compact()
+        return self._entries[i] 
+
+    def _compact(self)->None:
+        # renumber the slots 0..n-1 after removals, so a position is a slot 
+        if len(self._entries) == self._next_slot:
+            return 
+        new_slots = {slot:i for i, slot in enumerate(self._entries)}
+        self._entries = {new_slots[slot]:ds for slot, ds in self._entries.items()}
+        for slots in self._index.values():
+            slots[:] = [new_slots[slot] for slot in slots]
+        self._next_slot = len(self._entries)
+
+    def __len__(self)->int:
+        return len(self._entries)
+
+    def __contains__(self, devname: str)->bool:
+        return devname in self._index
     
 
     def get_devtypes(self)->dict[str,str]:
@@ -222,7 +380,9 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
     
     def clear(self):
         """ Clear the current setup buffer """
-        self._buffer.clear()
+        self._entries.clear()
+        self._index.clear()
+        self._next_slot = 0 
     
     def _clear_callback(self, err=None):
         """ A callback for the command executor 
@@ -233,6 +393,37 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
         else:
             log.info("setup command execution failed, buffer wasn't cleaned")
 
+    def _setup_callback(self, fingerprints: dict[str,str], keep: bool, err=None):
+        """ Setup command callback: record what was sent and clear the buffer on success """
+        if err is None and self._sent is not None:
+            self._sent.update(fingerprints)
+        if not keep:
+            self._clear_callback(err)
+
+    def reset_delta(self)->None:
+        """ Forget what was sent, the next ``setup(delta=True)`` sends all devices """
+        if self._sent is not None:
+            self._sent.clear()
+
+    def _prepare_setup(self, keep: bool, delta: bool)->tuple[VectorfcfifSetupElem, Callable|None]:
+        # Return the buffer to send and the callback of the setup command 
+        entries = list(self._entries.values())
+        if delta and self._sent is None:
+            self._sent = {} # delta tracking starts at first delta setup 
+        if self._sent is None:
+            return self._build_buffer(entries), (None if keep else self._clear_callback)
+        
+        fingerprints = {}
+        to_send = []
+        for ds in entries:
+            digest = _fingerprint(ds)
+            if digest is None:
+                continue 
+            fingerprints[ds.id] = digest
+            if not delta or self._sent.get(ds.id) != digest:
+                to_send.append(ds)
+        return self._build_buffer(to_send), partial(self._setup_callback, fingerprints, keep)
+
     def add_new(self, 
             devname:str , 
             devtype: str| Type[BaseDeviceSetup] |  None =None, 
@@ -281,16 +472,36 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
         for device_setup in devices:
             self._add_one( device_setup, override=override)
     
-    def _add_one(self, device_setup: SetupEntity, override: bool = False)->None:
-        found  = 0
-        if override:
-            for i,item in enumerate(self._buffer):
-                if item.id == device_setup.id:
-                    self._buffer[i] = device_setup 
-                    found += 1
-        if not found:
-            self._buffer.append(device_setup)
-        return found 
+    def _add_one(self, device_setup: SetupEntity, override: bool = False)->int:
+        slots = self._index.get(device_setup.id)
+        if slots:
+            policy = "replace" if override else self.duplicate 
+            if policy == "error":
+                raise ValueError(f"device {device_setup.id!r} is already in the setup buffer")
+            if policy == "replace":
+                # keep the position of the first one, drop the other duplicates  
+                first, *others = slots 
+                self._entries[first] = device_setup 
+                for slot in others:
+                    del self._entries[slot]
+                del slots[1:]
+                return 1 + len(others)
+        slot = self._next_slot 
+        self._next_slot += 1 
+        self._entries[slot] = device_setup 
+        self._index.setdefault(device_setup.id, []).append(slot)
+        return 0 
+
+    def remove(self, devname: str)->int:
+        """ Remove all device setups with the given id from the buffer 
+
+        Returns:
+            n (int): number of removed device setups 
+        """
+        slots = self._index.pop(devname, [])
+        for slot in slots:
+            del self._entries[slot]
+        return len(slots)
     
     def _get_device(self, devname:str , devtype: str | None = None)->BaseDeviceSetup:
         # necessary because in interface with DeviceProperty 
@@ -341,49 +552,235 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
 
             buffer.get('lamp1').switch_on( 20.0, 10)
         """
-        for device_setup in self._buffer:
-            if device_setup.id == devname:
-                return device_setup
+        slots = self._index.get(devname)
+        if slots:
+            return self._entries[slots[0]]
         return self.add_new( devname, devtype, override=False)
 
 
-    def set_payload(self, payload: List[Dict[str,Any]], override: bool = True )->None:
+    def set_payload(self, payload: List[Dict[str,Any]], override: bool = True, trusted: bool = False)->None:
         """ Set an incoming payload to the setup buffer 
 
         Args:
             payload (list): A payload (probably comming from a json data)
             override (optional, bool): If True (default), the setup buffer 
                 definition of an existing device will be overided. Added otherwise  
+            trusted (optional, bool): If True the payload is not validated against the 
+                JSON schema. The structure, parameter names and required parameters are checked 
+                and values are validated by the device parsers in a single pass. 
+                A ValueError is raised instead of a ValidationError. 
         """
-        # payload validated agains schema 
-        payload = self.payload_receiver.parse( payload )
+        if trusted:
+            self._check_payload_structure( payload )
+        else:
+            # payload validated agains schema 
+            payload = self.payload_receiver.parse( payload )
         self._set_safe_payload( payload, override ) 
 
+    def _check_payload_structure(self, payload: List[Dict[str,Any]])->None:
+        """ Check what the JSON schema checks and the device parsers do not """
+        if not isinstance(payload, list):
+            raise ValueError(f"expecting a list as payload got a {type(payload)}")
+        for i, element in enumerate(payload):
+            self._check_element_structure(i, element)
+
+    def _check_element_structure(self, i: int, element: Dict[str,Any])->None:
+        if not isinstance(element, dict) or element.keys() != {'id', 'param'}:
+            raise ValueError(f"Item #{i} is not a valid payload, expecting a dictionary with 'id' and 'param' keys")
+        param = element['param']
+        if not isinstance(element['id'], str) or not isinstance(param, dict):
+            raise ValueError(f"Item #{i} is not a valid payload, 'id' must be a string and 'param' a dictionary")
+        if len(param) != 1:
+            raise ValueError(f"Item #{i} is not a valid payload, expecting exactly one device type in param got {list(param)}")
+        (devtype, param_payload), = param.items()
+        if devtype not in self.__devtypes__:
+            raise ValueError(f"Item #{i} is not a valid payload, unknown device type {devtype!r}")
+        try:
+            check_parameter_payload( self.__register__.setup_class(devtype), param_payload)
+        except ValueError as err:
+            raise ValueError(f"Item #{i} ({element['id']!r}) is not a valid payload: {err}") from None 
+
     def _set_safe_payload(self, payload: List[Dict[str,Any]], override: bool = True )->None:
         """ Add an alreadyvalidated payload to the buffer """
         devices_to_add = [] # add them only at the end if no failure  
         for i,element in enumerate(payload):
+            devices_to_add.extend( self._new_from_element(i, element) )
+        # everything went well we can add them 
+        self.add(*devices_to_add, override=override)
+
+    def _new_from_element(self, i: int, element: Dict[str,Any])->list[SetupEntity]:
+        """ Return new device setups (not added) from one validated payload element """
+        try:
+            param = element['param']
+            device_id = element['id']
+        except KeyError as err:
+            raise ValueError(f"Item #{i} is not a valid payload ") from err
+
+        log.debug("element: %s", element)
+        log.debug("id: %s", device_id)
+        log.debug("param: %s", param)
+        
+        devices = []
+        for devtype, param_payload in param.items():
             try:
-                param = element['param']
-                device_id = element['id']
-            except KeyError as err:
-                raise ValueError(f"Item #{i} is not a valid payload ") from err
-
-            log.debug("element: %s", element)
-            log.debug("id: %s", device_id)
-            log.debug("param: %s", param)
-            
-            for devtype, param_payload in param.items():
+                device_setup = self.new(device_id, devtype)
+                device_setup.set( **param_payload )
+            except Exception as err:
+                log.error( f"Problem when setting the payload parameters {param_payload} in device  {device_id!r} as {devtype}  ")
+                raise ValueError( f"Seting up {device_id!r} as {devtype} failed" ) from err
+            else:
+                devices.append( device_setup )
+        return devices 
+
+    def _parse_payload(self, payload: List[Dict[str,Any]], trusted: bool = False)->list[SetupEntity]:
+        """ Validate a payload and return its new device setups, not added to the buffer """
+        if trusted:
+            self._check_payload_structure( payload )
+        else:
+            payload = self.payload_receiver.parse( payload )
+        devices = []
+        for i, element in enumerate(payload):
+            devices.extend( self._new_from_element(i, element) )
+        return devices 
+
+    def set_many_payloads(self, 
+            payloads: Iterable[List[Dict[str,Any]]], 
+            workers: int | None = None, 
+            override: bool = True, 
+            trusted: bool = False, 
+            return_exceptions: bool = False, 
+            chunksize: int = 16
+        )->list[list[str]|Exception]:
+        """ Validate, parse and add a batch of payloads, optionally in a pool of processes 
+
+        Validation and parameter parsing (payload_parser methods included) are done 
+        by the workers, each one initialised once with this setup class and its device 
+        register. The parsed parameters are then set in order to this setup buffer. 
+        Each payload is added entirely or not at all. 
+
+        Args:
+            payloads (Iterable): payloads as accepted by set_payload 
+            workers (int, optional): number of worker processes. None or 1 works in this process 
+            override (bool, optional): see set_payload 
+            trusted (bool, optional): see set_payload 
+            return_exceptions (bool, optional): If True, failing payloads are skipped and their 
+                error returned in place. Otherwise the first error is raised and nothing is added 
+            chunksize (int, optional): number of payloads sent at once to a worker 
+
+        Returns:
+            results (list): for each payload the list of added device names or the error 
+
+        Exemple::
+
+            fcs = DevMgrSetup(DummyInterface())
+            results = fcs.set_many_payloads(payloads, workers=8, return_exceptions=True)
+        """
+        payloads = list(payloads)
+        in_workers = workers is not None and workers > 1 and len(payloads) > 1 
+        if not in_workers:
+            parsed, errors = [], []
+            for payload in payloads:
                 try:
-                    device_setup = self.new(device_id, devtype)
-                    device_setup.set( **param_payload )
-                except Exception as err:
-                    log.error( f"Problem when setting the payload parameters {param_payload} in device  {device_id!r} as {devtype}  ")
-                    raise ValueError( f"Seting up {device_id!r} as {devtype} failed" ) from err
+                    devices = self._parse_payload(payload, trusted)
+                except (ValueError, ValidationError) as err:
+                    parsed.append(None)
+                    errors.append(err)
                 else:
-                    devices_to_add.append( device_setup )
-        # everything went well we can add them 
-        self.add(*devices_to_add, override=override)
+                    parsed.append(devices)
+                    errors.append(None)
+        else:
+            replies = run_in_pool(_parse_in_worker, [(p, trusted) for p in payloads], 
+                                  workers, _init_worker, (type(self),), chunksize)
+            parsed = [devices for devices, _ in replies]
+            errors = [error for _, error in replies]
+
+        results = collect_results(parsed, errors, return_exceptions)
+        for i, devices in enumerate(results):
+            if isinstance(devices, Exception):
+                continue 
+            if in_workers:
+                devices = self._new_from_parsed(devices)
+            self.add(*devices, override=override)
+            results[i] = [ds.id for ds in devices]
+        return results 
+
+    def _new_from_parsed(self, parsed: list[ParsedElement])->list[SetupEntity]:
+        # parameters were parsed and checked by a worker, load them as load_buffer does 
+        devices = []
+        for device_id, Setup, params, members in parsed:
+            device_setup = Setup(self.interface, device_id)
+            device_setup._params_buffer.update(params)
+            device_setup._element_cache = None 
+            for devname, (MemberSetup, member_params) in members.items():
+                member = MemberSetup(self.interface, devname)
+                member._params_buffer.update(member_params)
+                device_setup._device_cash[devname] = member 
+            devices.append(device_setup)
+        return devices 
+
+    def iter_load_payload(self, 
+            source: str | os.PathLike | IO[str], 
+            chunk_size: int = 256, 
+            override: bool = True, 
+            trusted: bool = False
+        )->Iterator[list[str]]:
+        """ Stream a JSON array or NDJSON payload file into the setup buffer, chunk by chunk 
+
+        Elements are read and validated one by one, each chunk of ``chunk_size`` 
+        elements is added to the buffer before reading further. The caller can 
+        send a setup between chunks. A failing chunk is not added, previous 
+        chunks stay in the buffer.
+
+        Args:
+            source: file path or text file like object 
+            chunk_size (int, optional): number of elements added at once 
+            override (bool, optional): see set_payload 
+            trusted (bool, optional): see set_payload 
+
+        Yields:
+            devnames (list): device names of each chunk added to the buffer 
+
+        Raises:
+            PayloadElementError: with the index, offset and line of the faulty element 
+
+        Exemple::
+
+            fcs = DevMgrSetup.from_consul('fcs1-req')
+            for devnames in fcs.iter_load_payload('calibration_plan.ndjson', chunk_size=50):
+                fcs.setup()
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be >= 1 got {chunk_size}")
+        devices: list[SetupEntity] = []
+        for element in self.payload_receiver.iter_json(source, validate=not trusted):
+            try:
+                if trusted:
+                    self._check_element_structure(element.index, element.value)
+                devices.extend( self._new_from_element(element.index, element.value) )
+            except ValueError as err:
+                raise PayloadElementError(str(err), element.index, element.offset, element.line) from err 
+            if len(devices) >= chunk_size:
+                self.add(*devices, override=override)
+                yield [ds.id for ds in devices]
+                devices = []
+        if devices:
+            self.add(*devices, override=override)
+            yield [ds.id for ds in devices]
+
+    def load_payload(self, 
+            source: str | os.PathLike | IO[str], 
+            chunk_size: int = 256, 
+            override: bool = True, 
+            trusted: bool = False
+        )->int:
+        """ Stream a JSON array or NDJSON payload file into the setup buffer 
+
+        Same as iter_load_payload but load the whole file. 
+
+        Returns:
+            n (int): number of device setups added 
+        """
+        return sum( len(devnames) for devnames in self.iter_load_payload(source, chunk_size, override, trusted) )
     
     def get_buffer(self) -> VectorfcfifSetupElem:
         """ Build and return the buffer 
@@ -395,9 +792,17 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
             buffer: VectorfcfifSetupElem ready to be sent by Mal client Setup method    
         
         """
-        buffer =  VectorfcfifSetupElem()
-        for ds in self._buffer:
-            buffer.extend( ds.get_buffer() )
+        return self._build_buffer(self._entries.values())
+
+    def _build_buffer(self, entries)->VectorfcfifSetupElem:
+        buffer =  mw.VectorfcfifSetupElem()
+        for ds in entries:
+            if isinstance(ds, BaseDeviceSetup):
+                # use the cached element, avoid building one vector per device 
+                if ds.is_setup_valid():
+                    buffer.append( ds.get_element_buffer() )
+            else:
+                buffer.extend( ds.get_buffer() )
         return buffer 
 
     def get_payload(self, force: bool=False)->list[dict[str,Any]]:
@@ -406,7 +811,44 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
         Returns:
             payload : list of dictionary 
         """
-        return sum( (ds.get_payload(force) for ds in self._buffer) , [])
+        return list(self.iter_payload(force))
+
+    def iter_payload(self, force: bool=False)->Iterator[dict[str,Any]]:
+        """ Iterate over the payload elements of this setup buffer 
+
+        Elements are generated one by one, nothing is materialised. 
+        """
+        for ds in list(self._entries.values()):
+            yield from ds.iter_payload(force)
+
+    def dump_payload(self, fp: IO[str], force: bool=False, lines: bool = False)->int:
+        """ Stream the payload as JSON into a file like object (with a write method)
+
+        Args:
+            fp: file like object (file, socket file, StringIO, ...)
+            force (bool, optional): see get_payload 
+            lines (bool, optional): If True write one JSON element per line (ndjson) 
+                instead of a JSON array 
+
+        Returns:
+            n (int): number of written elements 
+        """
+        n = 0 
+        if lines:
+            for element in self.iter_payload(force):
+                fp.write( json.dumps(element) )
+                fp.write( "\n" )
+                n += 1 
+            return n 
+
+        fp.write("[")
+        for element in self.iter_payload(force):
+            if n:
+                fp.write(",\n ")
+            fp.write( json.dumps(element) )
+            n += 1
+        fp.write("]\n")
+        return n 
     
     def load_buffer(self, buffer: VectorfcfifSetupElem, override=True)->None:
         """ Update the current Setup from a buffer (VectorfcfifSetupElem) 
@@ -439,7 +881,7 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
             new.load_buffer( element )
 
 
-    def setup(self, keep: bool = False)->str:
+    def setup(self, keep: bool = False, delta: bool = False)->str:
         """ Send the current setup to the server 
         
         Args:
@@ -449,17 +891,23 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
                 ..note:: 
 
                     In case of error during setup the setup buffer is never cleared. 
+            delta (optional, bool): if True, only devices with a setup different from the 
+                last successful one are sent. Use ``reset_delta()`` to force a full resend.
+                Once a delta setup was sent, every setup (delta or not) computes a 
+                fingerprint of each device from its parameter buffer. 
 
         Returns:
             mgs (str): Server Setup message 
 
         """
-        callback = None if keep else self._clear_callback
-
+        buffer, callback = self._prepare_setup(keep, delta)
+        if delta and not len(buffer):
+            if callback: callback(None) 
+            return ""
         with self.interface.command('App', 'Setup', callback) as setup:
-            setup( self.get_buffer() )
+            return setup( buffer )
     
-    async def async_setup(self, keep: bool=False):
+    async def async_setup(self, keep: bool=False, delta: bool = False):
         """ Send the current setup to the server asynchroniously  
         
         Args:
@@ -469,16 +917,21 @@ class BaseDevMgrSetup( metaclass=DevMgrSetupMeta, devtypes=[], generate_methods=
                 ..note:: 
 
                     In case of error during setup the setup buffer is never cleared. 
+            delta (optional, bool): if True, only devices with a setup different from the 
+                last successful one are sent. Use ``reset_delta()`` to force a full resend.
+                Once a delta setup was sent, every setup (delta or not) computes a 
+                fingerprint of each device from its parameter buffer. 
 
         Returns:
             mgs (str): Server Setup message 
 
         """
-
-        callback = None if keep else self._clear_callback
-
+        buffer, callback = self._prepare_setup(keep, delta)
+        if delta and not len(buffer):
+            if callback: callback(None) 
+            return ""
         async with self.interface.command('App', 'Setup', callback) as asetup:
-            await asetup( self.get_buffer() )
+            return await asetup( buffer )
         
     def create_setup_command(self, froze: bool = True, callback: Callable| None =None)-> SetupCommand:
         """ deport the setup command in a new object to be executed later  
@@ -0,0 +1,182 @@
+"""
+@copyright EFISOFT
+@brief Setup templates: pre-built setup buffers with patchable parameter slots
+
+Exemple::
+
+    from pyfcs import DevMgrSetup
+    from pyfcs.core.api import SetupTemplate
+
+    fcs = DevMgrSetup.from_consul('fcs1-req')
+    fcs.motor1.move_abs(0.0)
+    fcs.lamp1.switch_on(50, 10)
+
+    template = SetupTemplate.from_setup(fcs)
+    for pos in range(10):
+        template['motor1', 'pos'] = pos
+        template['lamp1', 'intensity'] = 50+pos
+        template.setup()
+
+Only parameters set when the template is built are slots. Values are parsed
+as with the device setup (e.g. enumerators, units) but payload parser methods
+are not called: the structure of the setup is fixed and the parameters selecting
+a payload parser method (e.g. action) are not slots.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Mapping
+
+from pyfcs.core import middleware as mw
+from pyfcs.core.define import ClientInterfacer, DeviceClassGetter
+from pyfcs.core.device import BaseMalIf, ParamProperty, register
+from pyfcs.core.interface import SetupCommand
+
+from .class_maker import get_devtypes_from_interface
+
+if TYPE_CHECKING:
+    from ModFcfif.Fcfif import SetupElem, VectorfcfifSetupElem
+    from .setup import BaseDevMgrSetup
+
+
+@dataclass
+class TemplateSlot:
+    """ One patchable parameter of a template element """
+    malif: BaseMalIf
+    param: ParamProperty
+
+    def set(self, value: Any)->None:
+        setattr(self.malif, self.param.name, self.param.parse_in(value))
+
+    def get(self)->Any:
+        return self.param.parse_out(getattr(self.malif, self.param.name))
+
+
+def _param_properties(cls: type)->dict[str,ParamProperty]:
+    # parameter name (as in buffer) -> ParamProperty, without the context keys of payload parsers 
+    sd = cls.__setup_definition__
+    context_keys = {key for keys in sd.parser_context_keys for key in keys}
+    properties = {}
+    for attr in sd.parameters:
+        prop = getattr(cls, attr)
+        name = prop.name or attr
+        if name not in context_keys:
+            properties[name] = prop
+    return properties
+
+
+class SetupTemplate:
+    """ A setup buffer built once, with named (devname, parameter) slots patched in place
+
+    The template holds its own Mal elements, the source setup or buffer is not modified.
+
+    Args:
+        interface: client interface used to send the setup
+        buffer (VectorfcfifSetupElem): source buffer
+        devtypes (Mapping or Callable): devname -> devtype map or function
+        register (optional): device class register. Default is the global register
+    """
+    def __init__(self,
+            interface: ClientInterfacer,
+            buffer: VectorfcfifSetupElem,
+            devtypes: Mapping[str,str] | Callable[[str],str],
+            register: DeviceClassGetter = register
+        ):
+        self.interface = interface
+        get_devtype = devtypes.__getitem__ if isinstance(devtypes, Mapping) else devtypes
+        self._elements: list[SetupElem] = []
+        self._slots: dict[tuple[str,str], list[TemplateSlot]] = {}
+
+        for element in buffer:
+            devname = element.getId()
+            Setup = register.setup_class(get_devtype(devname))
+            device_setup = Setup(interface, devname)
+            device_setup.load_buffer(element)
+            # a new element owned by the template
+            malif = device_setup.get_malif()
+            self._elements.append(malif.element)
+            properties = _param_properties(Setup)
+            for name in device_setup._params_buffer:
+                if name in properties:
+                    self._slots.setdefault((devname, name), []).append(TemplateSlot(malif, properties[name]))
+
+    @classmethod
+    def from_setup(cls, setup: BaseDevMgrSetup)->SetupTemplate:
+        """ Build a template from the current state of a DevMgr setup """
+        return cls(setup.interface, setup.get_buffer(), setup.get_devtype, setup.__register__)
+
+    @classmethod
+    def from_command(cls,
+            command: SetupCommand,
+            devtypes: Mapping[str,str] | Callable[[str],str] | None = None
+        )->SetupTemplate:
+        """ Build a template from a setup command (e.g. ``create_setup_command(froze=True)``)
+
+        Args:
+            command (SetupCommand): setup command
+            devtypes (optional): devname -> devtype map or function. If not given
+                the server is asked
+        """
+        if devtypes is None:
+            devtypes = get_devtypes_from_interface(command.interface)
+        return cls(command.interface, command.get_buffer(), devtypes)
+
+    @property
+    def slots(self)->list[tuple[str,str]]:
+        """ list of (devname, parameter) slots """
+        return list(self._slots)
+
+    def _get_slots(self, slot: tuple[str,str])->list[TemplateSlot]:
+        try:
+            return self._slots[slot]
+        except KeyError:
+            raise KeyError(f"{slot!r} is not a slot of this template") from None
+
+    def __setitem__(self, slot: tuple[str,str], value: Any)->None:
+        for s in self._get_slots(slot):
+            s.set(value)
+
+    def __getitem__(self, slot: tuple[str,str])->Any:
+        return self._get_slots(slot)[0].get()
+
+    def __iter__(self)->Iterator[tuple[str,str]]:
+        return iter(self._slots)
+
+    def update(self, __values__: Mapping[tuple[str,str],Any] = {}, **device_values: dict[str,Any])->None:
+        """ Patch several slots
+
+        Exemple::
+
+            template.update({('motor1','pos'):10.0, ('lamp1','intensity'):40})
+            template.update(motor1={'pos':10.0}, lamp1={'intensity':40})
+        """
+        for slot, value in __values__.items():
+            self[slot] = value
+        for devname, values in device_values.items():
+            for name, value in values.items():
+                self[devname, name] = value
+
+    def get_buffer(self)->VectorfcfifSetupElem:
+        """ Return the Mal buffer with the current slot values """
+        buffer = mw.VectorfcfifSetupElem()
+        for element in self._elements:
+            buffer.append(element)
+        return buffer
+
+    def setup(self)->str:
+        """ Send the template setup """
+        with self.interface.command('App', 'Setup') as setup:
+            return setup(self.get_buffer())
+
+    async def async_setup(self)->str:
+        """ Send the template setup asynchronously """
+        async with self.interface.command('App', 'Setup') as asetup:
+            return await asetup(self.get_buffer())
+
+    def create_setup_command(self, callback: Callable|None = None)->SetupCommand:
+        """ Return a SetupCommand following the template (patches made later are sent) """
+        return SetupCommand(self.interface, self, callback)
+
+    def __repr__(self)->str:
+        cls = self.__class__
+        name = (cls.__module__ + '.' + cls.__qualname__ )
+        return f"<{name} at 0x{id(self):x} slots={self.slots!r}>"
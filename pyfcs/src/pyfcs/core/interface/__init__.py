@@ -1,4 +1,8 @@
 from .interface import ConsulInterface, Interface, DummyInterface
 from .command import Command
-from .setup_command import SetupCommand 
+from .setup_command import SetupCommand, SetupCommandGroup, SetupGroupError
+from .pipeline import Pipeline
+from .singleflight import SingleFlight
+from .retry import RetryPolicy, DeadlineExceeded
 
+from .warmup import warmup_interfaces, async_warmup_interfaces
@@ -1,17 +1,31 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+import sys
+import time
 import traceback 
 import functools
 from io import StringIO
-from typing import Any, Callable, Coroutine
-from pymalcpp import MalException
-from elt import pymal 
-
+from typing import TYPE_CHECKING, Any, Callable, Coroutine
 from ifw.fcf.clib import log
 
+from .. import middleware as mw 
 from ..define import ClientInterfacer, ClientKind
-from ..tools import cash_property
+from ..tools.metrics import metrics_registry
+
+if TYPE_CHECKING:
+    from .retry import RetryPolicy
+    from .singleflight import SingleFlight
+
+# Start times of the commands entered in the current context (thread or task).
+# Command objects are cached and shared, so the start time cannot be stored on them
+_start_times: ContextVar[tuple[float,...]] = ContextVar('_start_times', default=())
+
+_kw_only = {'kw_only': True} if sys.version_info >= (3, 10) else {}
+
+def _is_timeout(exc_val)->bool:
+    return isinstance(exc_val, TimeoutError) or mw.is_instance(exc_val, 'TimeoutException')
 
 @dataclass 
 class Command:
@@ -27,6 +41,8 @@ class Command:
         callback (optional, Callable): A callback method with signature f(err)
             where ``err`` is None in case of success or is an exception instance 
             in case of error 
+        retry (optional, RetryPolicy): retry policy of this command. Default is the 
+            interface retry policy if any 
 
     Exemple::
 
@@ -51,6 +67,8 @@ class Command:
     client_kind: ClientKind
     method_name: str 
     callback: Callable|None = None
+    # keyword only: positional arguments of CommandWithArgs (args, kwargs) follow callback 
+    retry: RetryPolicy|None = field(default=None, **_kw_only)
      
     
     
@@ -58,12 +76,12 @@ class Command:
         """ log execution error of the command """
         method_info = f"{self.method_name} on {self.client_kind} interface" 
 
-        if isinstance(exc_val, MalException):
+        if mw.is_instance(exc_val, 'MalException'):
             if hasattr(exc_val, 'getDesc'): # some Mal Exception does not have getDesc 
                 log.error(f"Got exception from command {method_info}:\n      {exc_val.getDesc()}")
             else:
                 log.error(f"Got exception from command {method_info}") 
-        elif isinstance(exc_val,pymal.TimeoutException):
+        elif _is_timeout(exc_val):
             log.error(f"Got a timeout exception from command {method_info} after {self.interface.timeout} [ms]")
         else:
             log.error(f"Got an exception when handling command {method_info}:\n      {exc_val}")
@@ -74,27 +92,110 @@ class Command:
                 
     
 
-    @cash_property
+    # (client, method) pairs. The method is re-built only if the interface 
+    # returns a new client (e.g. the service moved to an other uri)
+    _bound_method = None 
+    _bound_async_method = None 
+
+    def _get_singleflight(self)->SingleFlight|None:
+        singleflight = getattr(self.interface, 'singleflight', None)
+        if singleflight is not None and singleflight.accepts(ClientKind(self.client_kind).value, self.method_name):
+            return singleflight 
+        return None 
+    
+    def _get_retry(self)->RetryPolicy|None:
+        retry = self.retry or getattr(self.interface, 'retry', None)
+        if retry is not None and retry.applies(ClientKind(self.client_kind).value, self.method_name):
+            return retry 
+        return None 
+
+    def _singleflight_prefix(self)->tuple:
+        return (self.interface.uri, ClientKind(self.client_kind).value, self.method_name) 
+
+    def _method_within(self, method: Callable)->Callable[[float|None],Callable]:
+        # function of one attempt limited to the remaining time of the retry deadline 
+        from .retry import attempt_timeout 
+        def get_method(remaining: float|None)->Callable:
+            timeout = attempt_timeout(remaining, self.interface.timeout)
+            if timeout is None:
+                return method 
+            def method_with_timeout(*args, **kwargs):
+                with self.interface.client_with_timeout(self.client_kind, timeout) as client:
+                    return getattr(client, self.method_name)(*args, **kwargs)
+            return method_with_timeout 
+        return get_method 
+
+    def _make_method(self, client)->Callable:
+        method = getattr(client, self.method_name)
+        retry = self._get_retry()
+        if retry and retry.deadline is not None and hasattr(self.interface, 'client_with_timeout'):
+            method = retry.wrap_within(self._method_within(method))
+        elif retry:
+            method = retry.wrap(method)
+        singleflight = self._get_singleflight()
+        if singleflight:
+            return singleflight.wrap(self._singleflight_prefix(), method)
+        return method 
+
+    def _make_async_method(self, client)->Coroutine:
+        raw_method = getattr(client, self.method_name)
+        async def wrapped_async_method(*args, **kwargs):
+            return await raw_method(*args, **kwargs).create_future()
+        retry = self._get_retry()
+        if retry:
+            wrapped_async_method = retry.wrap_async(wrapped_async_method)
+        singleflight = self._get_singleflight()
+        if singleflight:
+            return singleflight.wrap_async(self._singleflight_prefix(), wrapped_async_method)
+        return wrapped_async_method
+
+    @property
     def method(self)->Callable:
         client = self.interface.get_client(self.client_kind, asynchronous=False)
-        method =  getattr(client, self.method_name)
-        return method        
+        bound = self._bound_method
+        if bound is None or bound[0] is not client:
+            bound = (client, self._make_method(client))
+            self._bound_method = bound 
+        return bound[1]        
             
-    @cash_property
+    @property
     def async_method(self)->Coroutine:
         client = self.interface.get_client(self.client_kind, asynchronous=True)
-        raw_method = getattr(client, self.method_name)
-        async def wrapped_async_method(*args, **kwargs):
-            return await raw_method(*args, **kwargs).create_future()
-        return wrapped_async_method
+        bound = self._bound_async_method
+        if bound is None or bound[0] is not client:
+            bound = (client, self._make_async_method(client))
+            self._bound_async_method = bound 
+        return bound[1]
+
+    def _start_timer(self)->None:
+        if metrics_registry.enabled:
+            _start_times.set( _start_times.get() + (time.perf_counter(),) )
+
+    def _stop_timer(self, exc_val)->None:
+        starts = _start_times.get()
+        if not starts:
+            return 
+        duration = time.perf_counter() - starts[-1]
+        _start_times.set( starts[:-1] )
+        metrics_registry.observe( 
+                (self.interface.uri, ClientKind(self.client_kind).value, self.method_name), 
+                duration, 
+                error = exc_val is not None, 
+                timeout = exc_val is not None and _is_timeout(exc_val)
+            )
 
     def __enter__(self):
-        return self.method 
+        method = self.method
+        self._start_timer()
+        return method 
     
     async def __aenter__(self):
-        return self.async_method
+        method = self.async_method
+        self._start_timer()
+        return method
     
     def __exit__(self, exc_type, exc_val, exc_tb ):
+        self._stop_timer(exc_val)
         if exc_type:
             self.log_error(exc_type,  exc_val, exc_tb)
         
@@ -102,6 +203,7 @@ class Command:
             self.callback(exc_val) 
         
     async def __aexit__(self, exc_type, exc_val, exc_tb ):
+        self._stop_timer(exc_val)
         if exc_type:
             self.log_error(exc_type,  exc_val, exc_tb)
         
@@ -123,9 +225,14 @@ class Command:
                 self.client_kind, 
                 self.method_name, 
                 self.callback,
-                args, kwargs               
+                retry=self.retry,
+                args=args, kwargs=kwargs               
             )
 
+    def with_retry(self, retry: RetryPolicy|None)->Command:
+        """ Return a copy of this command with the given retry policy """
+        return replace(self, retry=retry)
+
 class DummyCommand(Command):
     def method(self, *args, **kwargs):
         print(f"Dummy method {self.client_kind}, {self.method_name} called with arguments args={args}, kwargs={kwargs}")
@@ -151,13 +258,11 @@ class CommandWithArgs(Command):
     args: tuple = field( default_factory=tuple)
     kwargs: dict[str,Any] = field( default_factory=dict) 
     
-    @cash_property
-    def method(self):
-        return functools.partial(super().method, *self.args, **self.kwargs) 
+    def _make_method(self, client):
+        return functools.partial(super()._make_method(client), *self.args, **self.kwargs) 
 
-    @cash_property
-    def async_method(self):
-        return functools.partial(super().async_method, *self.args, **self.kwargs) 
+    def _make_async_method(self, client):
+        return functools.partial(super()._make_async_method(client), *self.args, **self.kwargs) 
 
     def partial(self, *args, **kwargs):
         return CommandWithArgs( 
@@ -165,6 +270,7 @@ class CommandWithArgs(Command):
                 self.client_kind, 
                 self.method_name, 
                 self.callback,
-                self.args+ args, {**self.kwargs, **kwargs}               
+                retry=self.retry,
+                args=self.args+ args, kwargs={**self.kwargs, **kwargs}               
             )
 
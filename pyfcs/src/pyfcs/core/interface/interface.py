@@ -3,83 +3,83 @@
 @brief Fcs Interface object for all Fcs Client objects 
 """
 from __future__ import annotations
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable
+import functools
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
 from typing_extensions import Protocol
 
-# elt ~~~~
-from ModFcfif.Fcfif.AppCmds import AppCmdsSync, AppCmdsAsync
-from  acli.mal_client import MalClient
-from elt.pymal import loadMal, CiiFactory
-from elt.pymal.rr import ClientModule
-from elt.pymal.CiiFactoryModule import CiiFactory
-from ModMetadaqif.Metadaqif.MetaDaq import MetaDaqSync, MetaDaqAsync
-from ModStdif.Stdif.StdCmds import StdCmdsAsync, StdCmdsSync
-from stooUtils.consul import ConsulClient as _ConsulClient 
-from  consul import Consul 
+# elt ~~~~ (imported on first client creation)
+if TYPE_CHECKING:
+    from acli.mal_client import MalClient
+    from elt.pymal.rr import ClientModule
+    from elt.pymal.CiiFactoryModule import CiiFactory
 
 # ~~~~
-from ..tools import cash_property
+from .. import middleware as mw 
 from ..define import ClientKind 
 
 from .command import  Command, DummyCommand 
+from .mal_registry import get_factory
+from .pipeline import Pipeline
+from .pool import ClientKey, get_client_pool
+from .resolver import ConsulClient, get_resolver
+from .retry import RetryPolicy
+from .singleflight import SingleFlight
+from .warmup import ALL_KINDS, warmup_interfaces, async_warmup_interfaces
 
-# ### PATCH TO Correct bug in v4 
-# TODO: Remove patch at v5 
-class ConsulClient(_ConsulClient):
-    def __init__(self, host='localhost', port=8500):
-       self._cons = Consul(host=host, port=port)       
-# ###### ###### ###### ###### ##########
 
 
 class _InterfacePrivate:
     # Some shared method for creating clients 
     def _create_factory(self)->CiiFactory:
-        """ Create a new CiiFactory for the interface """
-        mapping = loadMal('zpb', {'zpb.domain': '100'})
-        factory = CiiFactory.getInstance()
-        factory.registerMal('zpb', mapping)
-        return factory 
+        """ Return the CiiFactory for the interface 
+
+        The 'zpb' MAL is loaded and registered only once per process 
+        (see :mod:`pyfcs.core.interface.mal_registry`)
+        """
+        return get_factory('zpb', {'zpb.domain': '100'})
     
     def _get_app_uri_and_factory(self):
         return '{}/AppCmds'.format(self.uri), self._create_factory() 
     
-    def _create_app_cii(self)-> MalClient:
+    def _create_app_cii(self, timeout: int|None = None)-> MalClient:
         """ Create a Cii MalClient for the interface with synchronious Command """
         uri, factory = self._get_app_uri_and_factory()
         # Timeout is in milliseconds
-        return  MalClient(uri, factory, AppCmdsSync, int(self.timeout) / 1000)
+        return  mw.MalClient(uri, factory, mw.AppCmdsSync, int(timeout or self.timeout) / 1000)
     
-    def _create_async_app_cii(self)->MalClient:
+    def _create_async_app_cii(self, timeout: int|None = None)->MalClient:
         """ Create a Cii MalClient for the interface with asynchronious Command """
         uri, factory = self._get_app_uri_and_factory()
         # Timeout is in milliseconds
-        return  MalClient(uri, factory, AppCmdsAsync, int(self.timeout) / 1000)
+        return  mw.MalClient(uri, factory, mw.AppCmdsAsync, int(timeout or self.timeout) / 1000)
     
     # ~~~~~ DAQ ~~~~~~~~~~~~~~~~~~~~~~ 
     def _get_daq_uri_and_factory(self):
         return '{}/MetaDaq'.format(self.uri), self._create_factory() 
 
-    def _create_daq_cii(self)->MalClient:
+    def _create_daq_cii(self, timeout: int|None = None)->MalClient:
         uri, factory = self._get_daq_uri_and_factory()
-        return MalClient(uri, factory, MetaDaqSync, int(self.timeout) / 1000)
+        return mw.MalClient(uri, factory, mw.MetaDaqSync, int(timeout or self.timeout) / 1000)
      
-    def _create_async_daq_cii(self)->MalClient:
+    def _create_async_daq_cii(self, timeout: int|None = None)->MalClient:
         uri, factory = self._get_daq_uri_and_factory() 
-        return MalClient(uri, factory, MetaDaqAsync, int(self.timeout) / 1000)
+        return mw.MalClient(uri, factory, mw.MetaDaqAsync, int(timeout or self.timeout) / 1000)
     
     # ~~~~~ Std ~~~~~~~~~~~~~~~~~~~~~~ 
     def _get_std_uri_and_factory(self):
         return '{}/StdCmds'.format(self.uri), self._create_factory() 
 
-    def _create_std_cii(self)->MalClient:
+    def _create_std_cii(self, timeout: int|None = None)->MalClient:
         uri, factory = self._get_std_uri_and_factory() 
-        return MalClient(uri, factory, StdCmdsSync, int(self.timeout) / 1000)
+        return mw.MalClient(uri, factory, mw.StdCmdsSync, int(timeout or self.timeout) / 1000)
     
-    def _create_async_std_cii(self)->MalClient:
+    def _create_async_std_cii(self, timeout: int|None = None)->MalClient:
         uri, factory = self._get_std_uri_and_factory()
-        return MalClient(uri, factory, StdCmdsAsync, int(self.timeout) / 1000)
+        return mw.MalClient(uri, factory, mw.StdCmdsAsync, int(timeout or self.timeout) / 1000)
 
 class BaseInterface:
     
@@ -157,68 +157,188 @@ class BaseInterface:
             self.__dict__[(client_kind,method_name)] = cmd 
             return cmd 
 
-    @cash_property
+    def pipeline(self, max_in_flight: int = 16, timeout: float|None = None)->Pipeline:
+        """ Return a new pipeline to send many async requests with a concurrency limit 
+
+        Args:
+            max_in_flight (int, optional): maximum number of pending requests 
+            timeout (float, optional): per request timeout in seconds. Default is the interface timeout 
+
+        Exemple::
+
+            async with interface.pipeline(max_in_flight=8) as pipe:
+                for devname in ['lamp1', 'lamp2', 'motor1']:
+                    await pipe.submit('App', 'DevStatus', [devname])
+            statuses = pipe.results 
+        """
+        return Pipeline(self, max_in_flight, timeout)
+
+    # ~~~~~ Pooled clients ~~~~~~~~~~~~~~~~~~~~~~
+    def _get_cii(self, client_kind: str, asynchronous: bool)->MalClient:
+        """ Return the pooled Cii / Mal Client for a client kind 
+
+        The client is acquired from the process wide pool the first time and 
+        kept (leased) by the interface until close() is called. A new client 
+        is acquired if the uri changed or if the pool invalidated the client. 
+        """
+        key = ClientKey(self.uri, ClientKind(client_kind).value, asynchronous, self.timeout)
+        pool = get_client_pool()
+        leases = self.__dict__.setdefault('_leases', {})
+        try:
+            lease_key, cii = leases[(key.client_kind, asynchronous)]
+        except KeyError:
+            pass 
+        else:
+            if lease_key == key and pool.holds(key, cii):
+                return cii 
+        
+        # one lock per client, clients of the interface can be created concurrently
+        locks = self.__dict__.setdefault('_leases_locks', {})
+        lock = locks.get((key.client_kind, asynchronous)) or locks.setdefault((key.client_kind, asynchronous), threading.Lock())
+        with lock:
+            old = leases.get((key.client_kind, asynchronous))
+            if old is not None and old[0] == key and pool.holds(key, old[1]):
+                return old[1]
+            constructor = getattr(self, _cii_constructors[(key.client_kind, asynchronous)])
+            cii = pool.acquire(key, constructor)
+            leases[(key.client_kind, asynchronous)] = (key, cii)
+        if old is not None:
+            pool.release(*old)
+        return cii 
+
+    @contextmanager
+    def client_with_timeout(self, 
+            client_kind: str, 
+            timeout: int, 
+            asynchronous: bool = False
+        )->Iterator[ClientModule.Client]:
+        """ Context manager returning a pooled client with an other timeout (ms) 
+
+        Used for one attempt of a command limited by a deadline (see RetryPolicy). 
+        The client is released at exit. 
+        """
+        key = ClientKey(self.uri, ClientKind(client_kind).value, asynchronous, timeout)
+        constructor = functools.partial(getattr(self, _cii_constructors[(key.client_kind, asynchronous)]), timeout)
+        pool = get_client_pool()
+        cii = pool.acquire(key, constructor)
+        try:
+            yield cii.get_mal_client()
+        finally:
+            pool.release(key, cii)
+    
+    def close(self)->None:
+        """ Release all clients leased by this interface 
+
+        Released clients are closed by the pool after its idle timeout, unless 
+        they are still used by an other interface. 
+        Cached commands are dropped, they will be rebuilt on demand.
+        """
+        leases = self.__dict__.pop('_leases', {})
+        for key in [k for k in self.__dict__ if isinstance(k, tuple)]:
+            del self.__dict__[key]
+        pool = get_client_pool()
+        for lease_key, cii in leases.values():
+            pool.release(lease_key, cii)
+    
+    def warmup(self, 
+            kinds: Iterable[str] = ALL_KINDS, 
+            asynchronous: bool|None = False, 
+            max_workers: int|None = None
+        )->None:
+        """ Pre-create concurrently the clients of this interface 
+
+        Args:
+            kinds (Iterable[str], optional): client kinds ('App', 'Std', 'Daq'). Default all 
+            asynchronous (bool|None, optional): False (default) synchronous clients, 
+                True asynchronous clients, None both of them 
+            max_workers (int, optional): maximum number of threads 
+        """
+        warmup_interfaces([self], kinds, asynchronous, max_workers)
+
+    async def async_warmup(self, 
+            kinds: Iterable[str] = ALL_KINDS, 
+            asynchronous: bool|None = True
+        )->None:
+        """ Pre-create concurrently the clients of this interface (asynchronous version) """
+        await async_warmup_interfaces([self], kinds, asynchronous)
+
+    def __enter__(self):
+        return self 
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
     def cii(self)->MalClient:
         """ App Cii / Mal Client """
-        return self._create_app_cii()
+        return self._get_cii(ClientKind.App, False)
 
-    @cash_property
+    @property
     def client(self)->ClientModule.Client:
         """ App Client """
         return self.cii.get_mal_client()
     
-    @cash_property
+    @property
     def async_cii(self)->MalClient:
         """ Async App Cii / Mal Client """
-        return self._create_async_app_cii()
+        return self._get_cii(ClientKind.App, True)
 
-    @cash_property
+    @property
     def async_client(self)->ClientModule.Client:
         """ Async App client """
         return self.async_cii.get_mal_client()
     
-    @cash_property
+    @property
     def std_cii(self)->MalClient:
         """ Standard Cii / Mal Client """
-        return self._create_std_cii()
+        return self._get_cii(ClientKind.Std, False)
 
-    @cash_property
+    @property
     def std_client(self)->ClientModule.Client:
         """ Standard command Client """
         return self.std_cii.get_mal_client()
     
-    @cash_property
+    @property
     def async_std_cii(self)->MalClient:
         """ Async Standard Cii / Mal Client """
-        return self._create_async_std_cii()
+        return self._get_cii(ClientKind.Std, True)
 
-    @cash_property
+    @property
     def async_std_client(self)->ClientModule.Client:
         """ Async Standard command client """
         return self.async_std_cii.get_mal_client()
     
-    @cash_property
+    @property
     def daq_cii(self)->MalClient:
         """ DAQ Cii / Mal Client """
-        return self._create_daq_cii()
+        return self._get_cii(ClientKind.Daq, False)
 
-    @cash_property
+    @property
     def daq_client(self)->ClientModule.Client:
         """ DAQ command Client """
         return self.daq_cii.get_mal_client()
     
-    @cash_property
+    @property
     def async_daq_cii(self)->MalClient:
         """ Async DAQ Cii / Mal Client """
-        return self._create_async_daq_cii()
+        return self._get_cii(ClientKind.Daq, True)
 
-    @cash_property
+    @property
     def async_daq_client(self)->ClientModule.Client:
         """ Async DAQ command  client """
         return self.async_daq_cii.get_mal_client()
     
 
 
+# (client_kind, asynchronous) -> name of the _InterfacePrivate constructor 
+_cii_constructors = {
+    (ClientKind.App.value, False): '_create_app_cii', 
+    (ClientKind.App.value, True): '_create_async_app_cii', 
+    (ClientKind.Std.value, False): '_create_std_cii', 
+    (ClientKind.Std.value, True): '_create_async_std_cii', 
+    (ClientKind.Daq.value, False): '_create_daq_cii', 
+    (ClientKind.Daq.value, True): '_create_async_daq_cii', 
+}
 
 
 @dataclass(frozen=True) # Frozen assure hashable object 
@@ -226,6 +346,8 @@ class Interface(_InterfacePrivate, BaseInterface):
     """ Fcs Interface based on an input uri """
     uri: str 
     timeout: int = 10000
+    singleflight: SingleFlight|None = field(default=None, compare=False)
+    retry: RetryPolicy|None = field(default=None, compare=False)
 
 
 @dataclass(frozen=True)
@@ -235,14 +357,21 @@ class ConsulInterface(_InterfacePrivate, BaseInterface):
     timeout: int = 10000
     consul_host: str = 'localhost' 
     consul_port: int = 8500
+    singleflight: SingleFlight|None = field(default=None, compare=False)
+    retry: RetryPolicy|None = field(default=None, compare=False)
 
-    @cash_property
+    @property
     def uri(self)->str:
-        """ server uri from consul service """
-        return ConsulClient(
+        """ server uri from consul service 
+
+        Resolution is cached process wide with a time to live 
+        (see :mod:`pyfcs.core.interface.resolver`)
+        """
+        return get_resolver().resolve(
+                self.service, 
                 self.consul_host, 
                 self.consul_port
-            ).get_uri(self.service) 
+            )
 
 
 
@@ -265,6 +394,12 @@ class DummyInterface(BaseInterface):
     def get_mal(self, client_kind: str = ClientKind.App) -> ClientModule.Client:
         return DummyMal()
 
+    def warmup(self, *args, **kwargs)->None:
+        """ Dummy -> nothing to warm up """
+
+    async def async_warmup(self, *args, **kwargs)->None:
+        """ Dummy -> nothing to warm up """
+
     @property
     def uri(self)->str:
         return 'dummy' 
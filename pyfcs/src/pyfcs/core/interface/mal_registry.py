@@ -0,0 +1,143 @@
+"""
+@copyright EFISOFT
+@brief Process wide registry of loaded MAL and CiiFactory
+
+Loading a MAL (e.g. 'zpb') and registering it into the CiiFactory is costly.
+The registry makes sure this is done only once per process for a given
+MAL kind and set of properties.
+
+Exemple::
+
+    from pyfcs.core.interface.mal_registry import get_factory, registry_info, reset_registry
+
+    factory = get_factory('zpb', {'zpb.domain': '100'})
+    assert factory is get_factory('zpb', {'zpb.domain': '100'})
+
+    registry_info() # -> [MalRegistryEntry(kind='zpb', properties={'zpb.domain': '100'}, ...)]
+    reset_registry() # e.g. in test teardown
+
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from .. import middleware as mw
+
+if TYPE_CHECKING:
+    from elt.pymal.CiiFactoryModule import CiiFactory
+
+
+DEFAULT_MAL_KIND = 'zpb'
+DEFAULT_MAL_PROPERTIES = {'zpb.domain': '100'}
+
+@dataclass
+class MalRegistryEntry:
+    """ Hold a loaded MAL and the factory in which it is registered """
+    kind: str
+    properties: dict[str,str]
+    mal: Any
+    factory: CiiFactory
+    created: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+def _registry_key(kind: str, properties: dict[str,str]|None)->tuple:
+    return (kind, tuple(sorted((properties or {}).items())))
+
+
+class MalRegistry:
+    """ Thread safe registry of MAL and CiiFactory keyed by MAL kind and properties
+
+    Args:
+        loader (Callable, optional): function with signature f(kind, properties)
+            returning the loaded mal. Default is ``elt.pymal.loadMal``
+        factory_getter (Callable, optional): function returning the CiiFactory.
+            Default is ``CiiFactory.getInstance``
+    """
+    def __init__(self,
+            loader: Callable|None = None,
+            factory_getter: Callable|None = None
+        ):
+        # default are resolved at first use so the MAL is not imported before 
+        self._loader = loader 
+        self._factory_getter = factory_getter 
+        self._entries: dict[tuple, MalRegistryEntry] = {}
+        self._lock = threading.Lock()
+
+    def get_entry(self,
+            kind: str = DEFAULT_MAL_KIND,
+            properties: dict[str,str]|None = None
+        )->MalRegistryEntry:
+        """ Return the registry entry for a MAL kind and properties
+
+        The MAL is loaded and registered the first time only.
+        """
+        if properties is None:
+            properties = DEFAULT_MAL_PROPERTIES
+        key = _registry_key(kind, properties)
+        # fast path without lock, dict access is atomic
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    loader = self._loader or mw.loadMal
+                    factory_getter = self._factory_getter or mw.CiiFactory.getInstance
+                    mal = loader(kind, dict(properties))
+                    factory = factory_getter()
+                    factory.registerMal(kind, mal)
+                    entry = MalRegistryEntry(kind, dict(properties), mal, factory)
+                    self._entries[key] = entry
+        entry.hits += 1
+        return entry
+
+    def get_factory(self,
+            kind: str = DEFAULT_MAL_KIND,
+            properties: dict[str,str]|None = None
+        )->CiiFactory:
+        """ Return a CiiFactory where the MAL of the given kind is registered """
+        return self.get_entry(kind, properties).factory
+
+    def get_mal(self,
+            kind: str = DEFAULT_MAL_KIND,
+            properties: dict[str,str]|None = None
+        )->Any:
+        """ Return the loaded MAL of the given kind (can be used to create data entities) """
+        return self.get_entry(kind, properties).mal
+
+    def info(self)->list[MalRegistryEntry]:
+        """ Return a list of all registered entries """
+        with self._lock:
+            return list(self._entries.values())
+
+    def reset(self)->None:
+        """ Forget all registered MAL. Next call to get_factory will reload the MAL
+
+        Mostly intended for tests. Already created clients are not affected.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self)->int:
+        return len(self._entries)
+
+
+mal_registry = MalRegistry()
+
+def get_factory(kind: str = DEFAULT_MAL_KIND, properties: dict[str,str]|None = None)->CiiFactory:
+    """ Return the process wide CiiFactory with the given MAL registered """
+    return mal_registry.get_factory(kind, properties)
+
+def get_mal(kind: str = DEFAULT_MAL_KIND, properties: dict[str,str]|None = None)->Any:
+    """ Return the process wide loaded MAL of the given kind """
+    return mal_registry.get_mal(kind, properties)
+
+def registry_info()->list[MalRegistryEntry]:
+    """ Return the list of MAL entries loaded in this process """
+    return mal_registry.info()
+
+def reset_registry()->None:
+    """ Reset the process wide MAL registry (for tests) """
+    mal_registry.reset()
@@ -0,0 +1,139 @@
+"""
+@copyright EFISOFT
+@brief Bounded concurrency pipelining of async requests on one interface
+
+Exemple::
+
+    async def status_of_all(interface, devnames):
+        async with interface.pipeline(max_in_flight=16) as pipe:
+            for devname in devnames:
+                await pipe.submit('App', 'DevStatus', [devname])
+        return pipe.results # in submission order
+
+    # or in one call
+    replies = await interface.pipeline().map('App', 'DevStatus', [ ([d],) for d in devnames])
+
+"""
+from __future__ import annotations
+import asyncio
+from typing import Any, Callable, Iterable
+
+from ..define import ClientInterfacer
+from .command import Command
+
+
+class Pipeline:
+    """ Submit many requests to the async clients of one interface, with backpressure
+
+    At most ``max_in_flight`` requests are sent and not yet replied. ``submit``
+    waits for a free slot before sending the request.
+
+    Requests are executed as the interface commands (see ``interface.command``), 
+    with their retry policy, single flight, metrics and error logging. The 
+    client is taken from the interface at each request. 
+
+    Args:
+        interface (ClientInterfacer): interface used to get the async clients
+        max_in_flight (int, optional): maximum number of pending requests. Default 16
+        timeout (float, optional): default per request timeout in seconds.
+            Default is the interface timeout
+    """
+    def __init__(self,
+            interface: ClientInterfacer,
+            max_in_flight: int = 16,
+            timeout: float|None = None
+        ):
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be >= 1 got {max_in_flight}")
+        self.interface = interface
+        self.max_in_flight = max_in_flight
+        self.timeout = interface.timeout/1000. if timeout is None else timeout
+        self.results: list[Any] = []
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._pending: list[asyncio.Future] = []
+        self._in_flight = 0
+
+    @property
+    def in_flight(self)->int:
+        """ Number of requests sent and not yet replied """
+        return self._in_flight
+
+    async def submit(self,
+            client_kind: str,
+            method_name: str,
+            *args,
+            timeout: float|None = None, 
+            callback: Callable|None = None
+        )->asyncio.Future:
+        """ Send one request as soon as a slot is free
+
+        Args:
+            client_kind (str): one of 'Std', 'Daq', or 'App'
+            method_name (str): client method name
+            *args: method arguments
+            timeout (float, optional): request timeout in seconds, default is the pipeline timeout
+            callback (Callable, optional): command callback with signature f(err) 
+
+        Returns:
+            future (asyncio.Future): resolved with the reply
+        """
+        command = self.interface.command(client_kind, method_name, callback)
+        await self._semaphore.acquire()
+        self._in_flight += 1
+        task = asyncio.ensure_future(
+                self._run(command, args, self.timeout if timeout is None else timeout)
+            )
+        self._pending.append(task)
+        return task
+
+    async def _run(self, command: Command, args: tuple, timeout: float)->Any:
+        try:
+            async with command as method:
+                return await asyncio.wait_for(method(*args), timeout)
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    async def gather(self, return_exceptions: bool = False)->list[Any]:
+        """ Wait for all submitted requests and return replies in submission order
+
+        The pipeline can be re-used after gather.
+
+        Args:
+            return_exceptions (bool, optional): If True, failed requests are returned as
+                exception instances, otherwise the first exception is raised
+        """
+        pending, self._pending = self._pending, []
+        try:
+            self.results = await asyncio.gather(*pending, return_exceptions=return_exceptions)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+        return self.results
+
+    async def map(self,
+            client_kind: str,
+            method_name: str,
+            arguments: Iterable[tuple],
+            return_exceptions: bool = False
+        )->list[Any]:
+        """ Submit one request per argument tuple and return replies in order """
+        for args in arguments:
+            await self.submit(client_kind, method_name, *args)
+        return await self.gather(return_exceptions)
+
+    def cancel(self)->None:
+        """ Cancel all pending requests """
+        pending, self._pending = self._pending, []
+        for task in pending:
+            task.cancel()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type:
+            self.cancel()
+        else:
+            await self.gather()
@@ -0,0 +1,284 @@
+"""
+@copyright EFISOFT
+@brief Pool of Mal clients shared between Interface objects
+
+Mal clients are pooled by (uri, client kind, sync/async, timeout). Two equal
+interfaces, or two interfaces pointing to the same server, share the same
+client. Clients are reference counted: when no interface uses a client anymore
+it stays in the pool until it is idle for more than ``idle_timeout`` seconds.
+Invalidated clients still in use are closed when their last user releases them,
+interfaces notice the invalidation and acquire a new client.
+
+Exemple::
+
+    from pyfcs.core.api import Interface
+    from pyfcs.core.interface.pool import get_client_pool
+
+    with Interface('zpb.rr://127.0.0.1:12081/fcs', 10000) as fcs1:
+        fcs1.command('Std', 'GetState').exec()
+    # clients are released here and closed after the idle timeout
+
+    get_client_pool().close() # close everything (e.g. at program exit)
+
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any, Callable
+
+from ifw.fcf.clib import log
+
+
+@dataclass(frozen=True)
+class ClientKey:
+    """ Key of a pooled client """
+    uri: str
+    client_kind: str
+    asynchronous: bool
+    timeout: int
+
+
+@dataclass
+class PoolEntry:
+    """ A pooled Mal client with its reference count """
+    key: ClientKey
+    cii: Any
+    refcount: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    valid: bool = True
+
+
+class ClientPoolFull(RuntimeError):
+    """ Raised when the pool reached its maximum size and no client can be evicted """
+
+
+def close_cii(cii: Any)->None:
+    """ Close a Mal client (MalClient) if it offers a close method """
+    close = getattr(cii, 'close', None)
+    if close is None:
+        try:
+            close = getattr(cii.get_mal_client(), 'close', None)
+        except Exception:
+            close = None
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as err:
+        log.error(f"Error when closing Mal client: {err}")
+
+
+class ClientPool:
+    """ Thread safe and reference counted pool of Mal clients
+
+    Args:
+        max_size (int, optional): maximum number of clients in the pool. When reached,
+            the least recently used idle client is evicted. If no client is idle
+            ClientPoolFull is raised.
+        idle_timeout (float, optional): time in seconds after which an unused client
+            (refcount==0) is closed. None means unused clients are kept until close()
+        closer (Callable, optional): function called to close a client. Default is close_cii
+    """
+    def __init__(self,
+            max_size: int = 256,
+            idle_timeout: float|None = 300.0,
+            closer: Callable[[Any],None]|None = None
+        ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._closer = closer or close_cii
+        self._entries: dict[ClientKey, PoolEntry] = {}
+        self._invalidated: list[PoolEntry] = [] # still in use, closed at the last release
+        self._pending: dict[ClientKey, threading.Event] = {} # clients being created
+        self._lock = threading.RLock()
+
+    def acquire(self, key: ClientKey, constructor: Callable[[],Any])->Any:
+        """ Return the pooled client matching key, create it if needed
+
+        The reference count of the client is incremented. Each acquire must be
+        matched by a release.
+
+        Args:
+            key (ClientKey): client key
+            constructor (Callable): called without argument to create a new client
+
+        The client is created outside the pool lock, concurrent acquires of the 
+        same key wait for it, acquires of other keys are not blocked. 
+
+        Returns:
+            cii: the Mal client
+        """
+        while True:
+            to_close = []
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refcount += 1
+                    entry.last_used = time.monotonic()
+                    return entry.cii
+                pending = self._pending.get(key)
+                if pending is None:
+                    to_close = self._reap()
+                    try:
+                        if len(self._entries)+len(self._pending) >= self.max_size:
+                            to_close.append(self._evict_one())
+                    except ClientPoolFull:
+                        self._close_all(to_close)
+                        raise
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # an other thread creates the client, use it or retry if it failed
+            pending.wait()
+
+        self._close_all(to_close)
+        try:
+            cii = constructor()
+        except BaseException:
+            with self._lock:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+            pending.set()
+            raise
+        with self._lock:
+            entry = PoolEntry(key, cii, refcount=1)
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+                self._entries[key] = entry
+            else: # invalidated during creation, closed at its release
+                entry.valid = False
+                self._invalidated.append(entry)
+        pending.set()
+        return cii
+
+    def release(self, key: ClientKey, cii: Any = None)->None:
+        """ Decrement the reference count of a pooled client
+
+        Args:
+            key (ClientKey): client key
+            cii (optional): the acquired client. Needed to release a client which
+                has been invalidated meanwhile, default is the current client of key
+
+        Releasing an unknown client is ignored.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (cii is not None and entry.cii is not cii):
+                to_close = self._release_invalidated(key, cii)
+            else:
+                entry.refcount = max(0, entry.refcount-1)
+                entry.last_used = time.monotonic()
+                to_close = self._reap()
+        self._close_all(to_close)
+
+    def holds(self, key: ClientKey, cii: Any)->bool:
+        """ True if cii is the valid pooled client of key 
+
+        An interface uses it to notice that its client was invalidated. 
+        """
+        entry = self._entries.get(key)
+        return entry is not None and entry.cii is cii
+
+    def reap(self)->int:
+        """ Close all clients unused for more than idle_timeout
+
+        Returns:
+            n (int): number of closed clients
+        """
+        with self._lock:
+            to_close = self._reap()
+        self._close_all(to_close)
+        return len(to_close)
+
+    def invalidate(self, uri: str|None = None)->int:
+        """ Remove clients of the given uri (all clients if uri is None)
+
+        Unused clients are closed. Clients still in use are closed when they are 
+        released for the last time. Interfaces holding them acquire new ones the 
+        next time they need a client.
+
+        Returns:
+            n (int): number of invalidated clients
+        """
+        with self._lock:
+            keys = [k for k in self._entries if uri is None or k.uri == uri]
+            entries = [self._entries.pop(k) for k in keys]
+            # clients being created are invalidated when they are ready 
+            for k in [k for k in self._pending if uri is None or k.uri == uri]:
+                self._pending.pop(k).set()
+            for entry in entries:
+                entry.valid = False
+            self._invalidated.extend(e for e in entries if e.refcount > 0)
+        for entry in entries:
+            if entry.refcount <= 0:
+                self._closer(entry.cii)
+        return len(entries)
+
+    def close(self)->None:
+        """ Close all pooled clients, even the ones in use """
+        with self._lock:
+            entries = list(self._entries.values()) + self._invalidated
+            self._entries.clear()
+            self._invalidated = []
+            for pending in self._pending.values():
+                pending.set()
+            self._pending.clear()
+        for entry in entries:
+            entry.valid = False
+            self._closer(entry.cii)
+
+    def info(self)->list[PoolEntry]:
+        """ Return a list of pool entries (for inspection) """
+        with self._lock:
+            return list(self._entries.values())
+
+    def __len__(self)->int:
+        return len(self._entries)
+
+    def __contains__(self, key: ClientKey)->bool:
+        return key in self._entries
+
+    def __enter__(self)->ClientPool:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _close_all(self, ciis: list[Any])->None:
+        # called without the lock, closing a client can be slow
+        for cii in ciis:
+            self._closer(cii)
+
+    # ~~~~~~~~~ internal, lock must be held ~~~~~~~~~~
+    # they return the clients to close after the lock is released
+    def _release_invalidated(self, key: ClientKey, cii: Any)->list[Any]:
+        for entry in self._invalidated:
+            if entry.key == key and (cii is None or entry.cii is cii):
+                entry.refcount -= 1
+                if entry.refcount <= 0:
+                    self._invalidated.remove(entry)
+                    return [entry.cii]
+                break
+        return []
+
+    def _reap(self)->list[Any]:
+        if self.idle_timeout is None:
+            return []
+        limit = time.monotonic() - self.idle_timeout
+        keys = [k for k,e in self._entries.items() if e.refcount<=0 and e.last_used<limit]
+        return [self._entries.pop(k).cii for k in keys]
+
+    def _evict_one(self)->Any:
+        idle = [e for e in self._entries.values() if e.refcount<=0]
+        if not idle:
+            raise ClientPoolFull(f"Mal client pool is full ({self.max_size} clients in use)")
+        entry = min(idle, key=lambda e: e.last_used)
+        del self._entries[entry.key]
+        return entry.cii
+
+
+client_pool = ClientPool()
+
+def get_client_pool()->ClientPool:
+    """ Return the process wide client pool used by interfaces """
+    return client_pool
@@ -0,0 +1,220 @@
+"""
+@copyright EFISOFT
+@brief Process wide, TTL cached, resolution of consul services into uri
+
+Exemple::
+
+    from pyfcs.core.interface.resolver import get_resolver
+
+    resolver = get_resolver()
+    uri = resolver.resolve('fcs1-req')
+    uris = resolver.resolve_all(['fcs1-req', 'fcs2-req', 'fcs3-req'])
+
+    # re-resolve all known services every 10 seconds in a background thread
+    resolver.start_refresher(10.0)
+
+When a service resolves to a new uri, the Mal clients of the old uri are
+removed from the client pool. Interfaces acquire new ones on their next command.
+"""
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Iterable
+
+from ifw.fcf.clib import log
+
+from .. import middleware as mw
+from .pool import get_client_pool
+
+
+@lru_cache(maxsize=None)
+def _consul_client_class()->type:
+    # ### PATCH TO Correct bug in v4
+    # TODO: Remove patch at v5
+    class ConsulClient(mw.StooConsulClient):
+        def __init__(self, host='localhost', port=8500):
+           self._cons = mw.Consul(host=host, port=port)
+    # ###### ###### ###### ###### ##########
+    return ConsulClient
+
+def ConsulClient(host: str = 'localhost', port: int = 8500):
+    """ Build a stooUtils ConsulClient (patched for v4), consul is imported on first call """
+    return _consul_client_class()(host, port)
+
+
+@dataclass
+class ResolvedUri:
+    """ A cached resolution """
+    uri: str
+    expires: float
+
+
+def _invalidate_pool(service: str, old_uri: str, new_uri: str)->None:
+    log.info(f"Service {service!r} moved from {old_uri} to {new_uri}")
+    get_client_pool().invalidate(old_uri)
+
+
+class ConsulResolver:
+    """ Resolve consul services into uri with a time to live cache
+
+    Args:
+        ttl (float, optional): cache time to live in seconds. Default 30s
+        client_factory (Callable, optional): function f(host, port) returning an
+            object with a get_uri(service) method. Default is ConsulClient
+        on_change (Callable, optional): function f(service, old_uri, new_uri) called
+            when a service is resolved to a different uri.
+            Default closes the pooled clients of the old uri.
+    """
+    def __init__(self,
+            ttl: float = 30.0,
+            client_factory: Callable|None = None,
+            on_change: Callable[[str,str,str],None]|None = _invalidate_pool
+        ):
+        self.ttl = ttl
+        self._client_factory = client_factory or ConsulClient
+        self.on_change = on_change
+        self._cache: dict[tuple[str,str,int], ResolvedUri] = {}
+        self._clients: dict[tuple[str,int], object] = {}
+        self._lock = threading.Lock()
+        self._refresher: threading.Thread|None = None
+        self._stop_event = threading.Event()
+
+    def _get_consul(self, consul_host: str, consul_port: int):
+        # called from the resolve_all threads and the refresher thread 
+        with self._lock:
+            try:
+                return self._clients[(consul_host, consul_port)]
+            except KeyError:
+                client = self._client_factory(consul_host, consul_port)
+                self._clients[(consul_host, consul_port)] = client
+                return client
+
+    def _query(self, service: str, consul_host: str, consul_port: int)->str:
+        key = (service, consul_host, consul_port)
+        uri = self._get_consul(consul_host, consul_port).get_uri(service)
+        with self._lock:
+            old = self._cache.get(key)
+            self._cache[key] = ResolvedUri(uri, time.monotonic()+self.ttl)
+        if old is not None and old.uri != uri and self.on_change:
+            self.on_change(service, old.uri, uri)
+        return uri
+
+    def resolve(self,
+            service: str,
+            consul_host: str = 'localhost',
+            consul_port: int = 8500,
+        )->str:
+        """ Return the uri of a consul service
+
+        Consul is only queried if the cached value is older than the ttl
+        """
+        cached = self._cache.get((service, consul_host, consul_port))
+        if cached is not None and cached.expires > time.monotonic():
+            return cached.uri
+        return self._query(service, consul_host, consul_port)
+
+    def resolve_all(self,
+            services: Iterable[str],
+            consul_host: str = 'localhost',
+            consul_port: int = 8500,
+            max_workers: int|None = None
+        )->dict[str,str]:
+        """ Resolve concurrently several services
+
+        Args:
+            services (Iterable[str]): consul service names
+            consul_host (str, optional): consul host
+            consul_port (int, optional): consul port
+            max_workers (int, optional): max number of threads. Default one per service
+
+        Returns:
+            uris (dict): service -> uri
+        """
+        services = list(services)
+        if not services:
+            return {}
+        with ThreadPoolExecutor(max_workers or len(services)) as executor:
+            uris = executor.map(lambda s: self.resolve(s, consul_host, consul_port), services)
+            return dict(zip(services, uris))
+
+    async def async_resolve_all(self,
+            services: Iterable[str],
+            consul_host: str = 'localhost',
+            consul_port: int = 8500
+        )->dict[str,str]:
+        """ Resolve concurrently several services, asynchronous version of resolve_all """
+        services = list(services)
+        loop = asyncio.get_running_loop()
+        uris = await asyncio.gather( *(
+            loop.run_in_executor(None, self.resolve, s, consul_host, consul_port) for s in services
+        ))
+        return dict(zip(services, uris))
+
+    def refresh(self)->None:
+        """ Query consul again for all cached services """
+        with self._lock:
+            keys = list(self._cache)
+        for service, consul_host, consul_port in keys:
+            try:
+                self._query(service, consul_host, consul_port)
+            except Exception as err:
+                log.error(f"Cannot refresh consul service {service!r}: {err}")
+
+    def invalidate(self, service: str|None = None)->None:
+        """ Remove a service (or all if None) from the cache """
+        with self._lock:
+            if service is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == service]:
+                    del self._cache[key]
+
+    def start_refresher(self, period: float|None = None)->None:
+        """ Start a daemon thread refreshing all cached services every period seconds
+
+        Args:
+            period (float, optional): refresh period in second. Default is the ttl
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        period = self.ttl if period is None else period
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(period):
+                self.refresh()
+        self._refresher = threading.Thread(target=run, name="pyfcs-consul-refresher", daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self)->None:
+        """ Stop the refresher thread if started """
+        self._stop_event.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    async def async_refresher(self, period: float|None = None)->None:
+        """ Coroutine refreshing all cached services every period seconds
+
+        To be run as a task, e.g.  ``task = asyncio.create_task(resolver.async_refresher(10))``
+        """
+        period = self.ttl if period is None else period
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(period)
+            await loop.run_in_executor(None, self.refresh)
+
+
+consul_resolver = ConsulResolver()
+
+def get_resolver()->ConsulResolver:
+    """ Return the process wide consul resolver """
+    return consul_resolver
+
+def resolve_all(services: Iterable[str], consul_host: str = 'localhost', consul_port: int = 8500)->dict[str,str]:
+    """ Resolve concurrently several consul services with the process wide resolver """
+    return consul_resolver.resolve_all(services, consul_host, consul_port)
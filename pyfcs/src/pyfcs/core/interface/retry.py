@@ -0,0 +1,185 @@
+"""
+@copyright EFISOFT
+@brief Deadline aware retry policy for commands
+
+Exemple::
+
+    from pyfcs.core.api import Interface, RetryPolicy
+
+    policy = RetryPolicy(max_attempts=4, backoff=0.05, deadline=2.0)
+    interface = Interface('zpb.rr://localhost:12081/fcs', retry=policy)
+
+    # Read-only commands are retried on timeout and Mal exceptions,
+    # Setup is never retried unless marked as idempotent:
+    setup_policy = RetryPolicy(idempotent={('App','Setup')})
+
+With a deadline, each attempt is limited to the remaining time: asynchronous
+attempts are cancelled, synchronous ones use a pooled client with a shorter
+timeout (see attempt_timeout).
+"""
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass, field
+import functools
+import random
+import time
+from typing import Any, Callable, Coroutine, Iterator
+
+from ifw.fcf.clib import log
+
+from .. import middleware as mw
+from .singleflight import READ_ONLY_METHODS
+
+
+class DeadlineExceeded(TimeoutError):
+    """ Raised when the overall deadline of a retry policy is reached """
+
+
+def _is_timeout(err: BaseException)->bool:
+    return isinstance(err, TimeoutError) or mw.is_instance(err, 'TimeoutException')
+
+def attempt_timeout(remaining: float|None, timeout: int)->int|None:
+    """ Return the client timeout (ms) of an attempt, None if the usual timeout fits 
+
+    The remaining time is rounded down to a power of two milliseconds. Each 
+    timeout is a pooled client, this keeps them few (at most log2(timeout) per 
+    client kind and uri) and re-used. 
+
+    Args:
+        remaining (float|None): remaining time before the deadline in seconds 
+        timeout (int): usual client timeout in milliseconds 
+    """
+    if remaining is None:
+        return None 
+    ms = int(remaining*1000)
+    if ms >= timeout:
+        return None 
+    return 1 << (max(ms, 1).bit_length()-1)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """ Define how and when a failed command is retried
+
+    Args:
+        max_attempts (int, optional): maximum number of attempts (including the first)
+        backoff (float, optional): delay in seconds before the first retry
+        multiplier (float, optional): backoff multiplier between consecutive retries
+        max_backoff (float, optional): maximum delay between two attempts
+        jitter (float, optional): fraction [0-1] of the delay randomly removed
+        deadline (float, optional): overall time budget in seconds for all attempts.
+            Asynchronous attempts are cancelled when the deadline is reached.
+        retry_on (tuple, optional): retryable exceptions, classes or names of lazy
+            middleware classes (see pyfcs.core.middleware)
+        methods (frozenset, optional): (client_kind, method_name) which can be retried.
+            Default are read-only methods
+        idempotent (frozenset, optional): additional (client_kind, method_name) to be
+            retried, e.g. {('App','Setup')} when setups are known to be idempotent
+    """
+    max_attempts: int = 3
+    backoff: float = 0.05
+    multiplier: float = 2.0
+    max_backoff: float = 2.0
+    jitter: float = 0.5
+    deadline: float|None = None
+    retry_on: tuple = ('TimeoutException', 'MalException', TimeoutError)
+    methods: frozenset = READ_ONLY_METHODS
+    idempotent: frozenset = field(default_factory=frozenset)
+
+    def applies(self, client_kind: str, method_name: str)->bool:
+        """ True if the given command can be retried """
+        return (client_kind, method_name) in self.methods or (client_kind, method_name) in self.idempotent
+
+    def is_retryable(self, err: BaseException)->bool:
+        """ True if the exception is a retryable one """
+        if isinstance(err, DeadlineExceeded):
+            return False
+        for exc in self.retry_on:
+            if isinstance(exc, str):
+                if mw.is_instance(err, exc):
+                    return True
+            elif isinstance(err, exc):
+                return True
+        return False
+
+    def delays(self)->Iterator[float]:
+        """ Iterate over the delays before each retry """
+        delay = self.backoff
+        for _ in range(self.max_attempts-1):
+            yield delay*(1.0 - self.jitter*random.random())
+            delay = min(delay*self.multiplier, self.max_backoff)
+
+    def _give_up(self, err: BaseException, delay: float|None, end: float|None)->bool:
+        if delay is None or not self.is_retryable(err):
+            return True
+        if end is not None and time.monotonic()+delay >= end:
+            return True
+        return False
+
+    def call(self, func: Callable, *args, **kwargs)->Any:
+        """ Call func(*args, **kwargs) with retries
+
+        Note: func cannot be interrupted, the deadline only prevents new attempts.
+        See call_within to limit each attempt.
+        """
+        return self.call_within(lambda remaining: func, *args, **kwargs)
+
+    def call_within(self, get_func: Callable[[float|None],Callable], *args, **kwargs)->Any:
+        """ Call get_func(remaining)(*args, **kwargs) with retries
+
+        get_func receives the time in seconds remaining before the deadline (None 
+        without deadline) and returns the function of one attempt, e.g. a client 
+        method with a timeout limited to the remaining time. 
+        """
+        end = None if self.deadline is None else time.monotonic()+self.deadline
+        delays = self.delays()
+        attempt = 1
+        while True:
+            try:
+                remaining = None if end is None else end - time.monotonic()
+                return get_func(remaining)(*args, **kwargs)
+            except Exception as err:
+                delay = next(delays, None)
+                if self._give_up(err, delay, end):
+                    if end is not None and _is_timeout(err) and time.monotonic()+(delay or 0.0) >= end:
+                        raise DeadlineExceeded(f"Deadline of {self.deadline}s reached after {attempt} attempt(s)") from err
+                    raise
+                log.info(f"Attempt {attempt} failed with {err!r}, retrying in {delay:.3f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    async def async_call(self, coro_func: Callable[..., Coroutine], *args, **kwargs)->Any:
+        """ Asynchronous version of call, each attempt is limited to the remaining time """
+        end = None if self.deadline is None else time.monotonic()+self.deadline
+        delays = self.delays()
+        attempt = 1
+        while True:
+            try:
+                if end is None:
+                    return await coro_func(*args, **kwargs)
+                remaining = end - time.monotonic()
+                try:
+                    return await asyncio.wait_for(coro_func(*args, **kwargs), remaining)
+                except asyncio.TimeoutError:
+                    if time.monotonic() >= end:
+                        raise DeadlineExceeded(f"Deadline of {self.deadline}s reached after {attempt} attempt(s)") from None
+                    raise
+            except Exception as err:
+                delay = next(delays, None)
+                if self._give_up(err, delay, end):
+                    raise
+                log.info(f"Attempt {attempt} failed with {err!r}, retrying in {delay:.3f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def wrap(self, func: Callable)->Callable:
+        """ Return func with retries """
+        return functools.partial(self.call, func)
+
+    def wrap_within(self, get_func: Callable[[float|None],Callable])->Callable:
+        """ Return a function calling get_func(remaining) with retries, see call_within """
+        return functools.partial(self.call_within, get_func)
+
+    def wrap_async(self, coro_func: Callable[..., Coroutine])->Callable[..., Coroutine]:
+        """ Return coro_func with retries """
+        return functools.partial(self.async_call, coro_func)
@@ -1,18 +1,20 @@
 from __future__ import annotations
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from functools import partial
-from typing import Any, Callable, Coroutine, Iterator
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Iterator
 from typing_extensions import Protocol
 
 import asyncio
 
-from ModFcfif.Fcfif import ExceptionErr as AppExceptionErr
-from ModFcfif.Fcfif import VectorfcfifSetupElem
-from elt.pymal import TimeoutException
 from ifw.fcf.clib import log
 
-
+from .. import middleware as mw 
 from ..define import  ClientInterfacer, BufferGetter, SetupMember
+from ..tools.buffer import BufferHolder
+
+if TYPE_CHECKING:
+    from ModFcfif.Fcfif import VectorfcfifSetupElem
 from .command import Command 
 
 
@@ -73,6 +75,20 @@ class SetupCommand: # must be compliant to CommandExecutor Protocol
         return reply 
 
 
+class SetupGroupError(RuntimeError):
+    """ Raised when at least one setup of a SetupCommandGroup failed 
+
+    Attributes:
+        replies (dict): interface -> reply of successful setups 
+        errors (dict): interface -> exception of failed setups 
+    """
+    def __init__(self, replies: dict[ClientInterfacer,str], errors: dict[ClientInterfacer,BaseException]):
+        self.replies = replies 
+        self.errors = errors 
+        details = "\n".join( f"    {getattr(i, 'uri', i)}: {e!r}" for i,e in errors.items())
+        super().__init__( f"{len(errors)} setup(s) failed out of {len(errors)+len(replies)}:\n{details}")
+
+
 @dataclass
 class SetupCommandGroup:
     setups : list[SetupMember]
@@ -106,27 +122,91 @@ class SetupCommandGroup:
             setup_dict.setdefault( setup.interface, []).append(setup)
         return setup_dict
     
-    def exec(self):
-        replies = {}
+    def _setup_commands(self)->dict[ClientInterfacer,SetupCommand]:
+        """ Merge buffers per interface and return one SetupCommand per interface """
+        commands = {}
         for interface, setups in self._setup_dict.items():
-            buffer = VectorfcfifSetupElem()
-
+            buffer = mw.VectorfcfifSetupElem()
             for setup in setups:
                 buffer.extend( setup.get_buffer() )
-            replies[interface] = SetupCommand(interface, buffer).exec()
+            commands[interface] = SetupCommand(interface, BufferHolder(buffer))
+        return commands 
+
+    def exec(self, 
+            max_workers: int|None = None, 
+            fail_fast: bool = False, 
+            group_error: bool = False
+        )->dict[ClientInterfacer,str]:
+        """ Execute in parallel the setups of all interfaces 
+
+        Args:
+            max_workers (int, optional): maximum number of threads. Default one per interface 
+            fail_fast (bool, optional): If True the first error is raised as soon as 
+                it happens, setups not yet sent are cancelled and the ones in progress are 
+                not waited. Otherwise (default) all setups are executed before raising 
+            group_error (bool, optional): If True a SetupGroupError with all replies and 
+                errors is raised when any setup failed. Otherwise (default) the exception 
+                of the first failing interface is raised 
+
+        Returns:
+            replies (dict): interface -> setup reply 
+        """
+        commands = self._setup_commands()
+        if len(commands) <= 1 or max_workers == 1:
+            replies, errors = self._sequential_exec(commands, fail_fast)
+        else:
+            replies, errors = self._parallel_exec(commands, max_workers, fail_fast)
+        if errors:
+            if group_error:
+                raise SetupGroupError(replies, errors)
+            for interface, err in list(errors.items())[1:]:
+                log.error(f"Setup of {getattr(interface, 'uri', interface)} failed: {err!r}")
+            raise next(iter(errors.values()))
+        return replies 
+
+    def _parallel_exec(self, 
+            commands: dict[ClientInterfacer,SetupCommand], 
+            max_workers: int|None, 
+            fail_fast: bool
+        )->tuple[dict[ClientInterfacer,str], dict[ClientInterfacer,BaseException]]:
+        replies, errors = {}, {}
+        # not a with block: its exit would wait for the setups in progress 
+        executor = ThreadPoolExecutor(max_workers or len(commands))
+        try:
+            futures = {executor.submit(command.exec):interface for interface, command in commands.items()}
+            if fail_fast:
+                done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    if future.exception() is not None:
+                        raise future.exception()
+            for future, interface in futures.items():
+                try:
+                    replies[interface] = future.result()
+                except Exception as err:
+                    errors[interface] = err 
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return replies, errors 
+
+    def _sequential_exec(self, 
+            commands: dict[ClientInterfacer,SetupCommand], 
+            fail_fast: bool
+        )->tuple[dict[ClientInterfacer,str], dict[ClientInterfacer,BaseException]]:
+        replies, errors = {}, {}
+        for interface, command in commands.items():
+            try:
+                replies[interface] = command.exec()
+            except Exception as err:
+                if fail_fast:
+                    raise 
+                errors[interface] = err
+        return replies, errors 
 
     async def async_exec(self):
-        coroutines = []
-        for interface, setups in self._setup_dict.items():
-            buffer = VectorfcfifSetupElem()
-            for setup in setups:
-                buffer.extend( setup.get_buffer() )
-            coroutines.append( SetupCommand(interface, buffer).async_exec() )
-
-        return await asyncio.gather( *coroutines )
+        return await asyncio.gather( *(command.async_exec() for command in self._setup_commands().values()) )
     
     def log_error(self,  exc_type, exc_val, exc_tb):
-        return Command.log_error(self, exc_type, exc_val, exc_tb)
+        log.error(f"Got an exception when executing a setup group:\n      {exc_val}")
 
 
     def __enter__(self):
@@ -0,0 +1,198 @@
+"""
+@copyright EFISOFT
+@brief Coalescing of concurrent identical read-only requests
+
+When a SingleFlight object is given to an interface, concurrent identical
+read-only commands (same server, method and arguments) share one request
+and its reply. Optionally, replies are kept in a short time to live cache.
+
+Exemple::
+
+    from pyfcs.core.api import Interface, SingleFlight
+
+    interface = Interface('zpb.rr://localhost:12081/fcs', singleflight=SingleFlight(ttl=0.1))
+
+    # 10 waiters polling DevStatus at the same time make only one request
+"""
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass, field
+import functools
+import threading
+import time
+from typing import Any, Callable, Coroutine, Iterable
+
+
+#: (client_kind, method_name) of commands without side effects
+READ_ONLY_METHODS = frozenset({
+    ('App', 'DevStatus'),
+    ('App', 'DevInfo'),
+    ('Std', 'GetState'),
+    ('Std', 'GetStatus'),
+    ('Std', 'GetVersion'),
+    ('Daq', 'GetDaqStatus'),
+})
+
+
+def freeze(obj: Any)->Any:
+    """ Return an hashable version of arguments, raise TypeError if not possible """
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(o) for o in obj)
+    if isinstance(obj, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, (set, frozenset)):
+        return frozenset(freeze(o) for o in obj)
+    hash(obj)
+    return obj
+
+
+@dataclass
+class _Call:
+    # one in flight synchronous call
+    event: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: BaseException|None = None
+
+
+class SingleFlight:
+    """ Share in flight read-only requests between concurrent callers
+
+    Args:
+        ttl (float, optional): time in seconds a successful reply is re-used
+            after it is received. Default 0, only in flight requests are shared
+        methods (Iterable, optional): (client_kind, method_name) pairs which can be
+            coalesced. Default READ_ONLY_METHODS
+    """
+    def __init__(self,
+            ttl: float = 0.0,
+            methods: Iterable[tuple[str,str]] = READ_ONLY_METHODS
+        ):
+        self.ttl = ttl
+        self.methods = frozenset(methods)
+        self.calls = 0 # number of requests actually sent
+        self.shared = 0 # number of calls served by an other call or the cache
+        self._lock = threading.Lock()
+        self._in_flight: dict[tuple, _Call] = {}
+        self._async_in_flight: dict[tuple, asyncio.Future] = {}
+        self._cache: dict[tuple, tuple[float, Any]] = {}
+
+    def accepts(self, client_kind: str, method_name: str)->bool:
+        """ True if the method can be coalesced """
+        return (client_kind, method_name) in self.methods
+
+    def clear(self)->None:
+        """ Clear the reply cache """
+        with self._lock:
+            self._cache.clear()
+
+    def _cached(self, key: tuple)->tuple[bool, Any]:
+        # must be called with lock
+        if self.ttl > 0:
+            try:
+                expires, result = self._cache[key]
+            except KeyError:
+                pass
+            else:
+                if expires > time.monotonic():
+                    self.shared += 1
+                    return True, result
+                del self._cache[key]
+        return False, None
+
+    def _store(self, key: tuple, result: Any)->None:
+        # must be called with lock
+        if self.ttl > 0:
+            self._cache[key] = (time.monotonic()+self.ttl, result)
+
+    def call(self, prefix: tuple, func: Callable, *args, **kwargs)->Any:
+        """ Call func(*args, **kwargs) or wait the result of an identical call in flight
+
+        Args:
+            prefix (tuple): identify the target, e.g. (uri, client_kind, method_name)
+            func (Callable): function doing the request
+        """
+        try:
+            key = prefix + (freeze(args), freeze(kwargs))
+        except TypeError:
+            return func(*args, **kwargs)
+
+        with self._lock:
+            found, result = self._cached(key)
+            if found:
+                return result
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if call.error is None:
+                    self._store(key, call.result)
+            call.event.set()
+        return call.result
+
+    async def async_call(self, prefix: tuple, coro_func: Callable[..., Coroutine], *args, **kwargs)->Any:
+        """ Asynchronous version of call """
+        try:
+            key = prefix + (freeze(args), freeze(kwargs))
+        except TypeError:
+            return await coro_func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop),) + key
+        with self._lock:
+            found, result = self._cached(key)
+            if found:
+                return result
+            future = self._async_in_flight.get(loop_key)
+            leader = future is None
+            if leader:
+                future = self._async_in_flight[loop_key] = loop.create_future()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            # shield: a cancelled follower must not cancel the shared request
+            return await asyncio.shield(future)
+
+        try:
+            result = await coro_func(*args, **kwargs)
+        except BaseException as err:
+            with self._lock:
+                del self._async_in_flight[loop_key]
+            if isinstance(err, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(err)
+                future.exception() # followers may not exist, avoid 'never retrieved' warnings
+            raise
+        with self._lock:
+            del self._async_in_flight[loop_key]
+            self._store(key, result)
+        future.set_result(result)
+        return result
+
+    def wrap(self, prefix: tuple, func: Callable)->Callable:
+        """ Return a function coalescing calls to func """
+        return functools.partial(self.call, prefix, func)
+
+    def wrap_async(self, prefix: tuple, coro_func: Callable[..., Coroutine])->Callable[..., Coroutine]:
+        """ Return a coroutine function coalescing calls to coro_func """
+        return functools.partial(self.async_call, prefix, coro_func)
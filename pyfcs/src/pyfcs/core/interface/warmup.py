@@ -0,0 +1,80 @@
+"""
+@copyright EFISOFT
+@brief Concurrent pre-creation of interface clients
+
+Exemple::
+
+    from pyfcs.core.api import ConsulInterface
+    from pyfcs.core.interface.warmup import warmup_interfaces
+
+    interfaces = [ConsulInterface(f'fcs{i}-req') for i in range(1,6)]
+    warmup_interfaces(interfaces, kinds=['App', 'Std'])
+    # consul resolution and client creation are done in parallel
+    # the first command of each interface is now fast
+
+"""
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Sequence
+
+from ..define import ClientInterfacer, ClientKind
+
+ALL_KINDS = (ClientKind.App, ClientKind.Std, ClientKind.Daq)
+
+
+def _client_requests(
+        interfaces: Sequence[ClientInterfacer],
+        kinds: Iterable[str],
+        asynchronous: bool|None
+    )->list[tuple[ClientInterfacer,str,bool]]:
+    modes = (False, True) if asynchronous is None else (asynchronous,)
+    kinds = list(kinds)
+    return [(i, k, a) for i in interfaces for k in kinds for a in modes]
+
+
+def warmup_interfaces(
+        interfaces: Iterable[ClientInterfacer],
+        kinds: Iterable[str] = ALL_KINDS,
+        asynchronous: bool|None = False,
+        max_workers: int|None = None
+    )->None:
+    """ Create concurrently the requested clients of several interfaces
+
+    Server uri are resolved first (e.g. consul lookup), then all clients are
+    created in a thread pool.
+
+    Args:
+        interfaces (Iterable): interface objects
+        kinds (Iterable[str], optional): client kinds to create ('App', 'Std', 'Daq'). Default all
+        asynchronous (bool|None, optional): False (default) create synchronous clients,
+            True asynchronous clients, None both of them
+        max_workers (int, optional): maximum number of threads. Default one per client
+    """
+    interfaces = list(interfaces)
+    requests = _client_requests(interfaces, kinds, asynchronous)
+    if not requests:
+        return
+    with ThreadPoolExecutor(max_workers or len(requests)) as executor:
+        # resolve uri first so clients of the same interface do not race on it
+        list(executor.map(lambda i: i.uri, interfaces))
+        list(executor.map(lambda r: r[0].get_client(r[1], asynchronous=r[2]), requests))
+
+
+async def async_warmup_interfaces(
+        interfaces: Iterable[ClientInterfacer],
+        kinds: Iterable[str] = ALL_KINDS,
+        asynchronous: bool|None = True,
+    )->None:
+    """ Asynchronous version of warmup_interfaces
+
+    Clients creation is blocking and is therefore done in the loop default executor.
+    Default is to create the asynchronous clients.
+    """
+    interfaces = list(interfaces)
+    loop = asyncio.get_running_loop()
+    await asyncio.gather( *(loop.run_in_executor(None, lambda i=i: i.uri) for i in interfaces) )
+    await asyncio.gather( *(
+        loop.run_in_executor(None, lambda r=r: r[0].get_client(r[1], asynchronous=r[2]))
+        for r in _client_requests(interfaces, kinds, asynchronous)
+    ))
@@ -0,0 +1,71 @@
+"""
+@copyright EFISOFT
+@brief Lazy access to the ELT/CII middleware
+
+The middleware modules (MAL, Fcfif/Stdif/Metadaqif bindings, consul, ...) are
+heavy to import. Inside pyfcs.core they are accessed through this module so
+they are imported only on first real use (client creation, data entity, ...).
+
+Exemple::
+
+    from pyfcs.core import middleware as mw
+
+    buffer = mw.VectorfcfifSetupElem() # ModFcfif.Fcfif is imported here
+
+"""
+from __future__ import annotations
+import importlib
+import sys
+
+# attribute name -> (module, attribute in module or None for the module itself)
+_lazy_attributes = {
+    # Fcfif
+    'SetupElem': ('ModFcfif.Fcfif', 'SetupElem'),
+    'VectorfcfifSetupElem': ('ModFcfif.Fcfif', 'VectorfcfifSetupElem'),
+    'AppCmdsSync': ('ModFcfif.Fcfif.AppCmds', 'AppCmdsSync'),
+    'AppCmdsAsync': ('ModFcfif.Fcfif.AppCmds', 'AppCmdsAsync'),
+    # Stdif
+    'StdCmdsSync': ('ModStdif.Stdif.StdCmds', 'StdCmdsSync'),
+    'StdCmdsAsync': ('ModStdif.Stdif.StdCmds', 'StdCmdsAsync'),
+    # Metadaqif
+    'MetaDaqSync': ('ModMetadaqif.Metadaqif.MetaDaq', 'MetaDaqSync'),
+    'MetaDaqAsync': ('ModMetadaqif.Metadaqif.MetaDaq', 'MetaDaqAsync'),
+    # MAL
+    'pymal': ('elt.pymal', None),
+    'loadMal': ('elt.pymal', 'loadMal'),
+    'TimeoutException': ('elt.pymal', 'TimeoutException'),
+    'CiiFactory': ('elt.pymal.CiiFactoryModule', 'CiiFactory'),
+    'MalException': ('pymalcpp', 'MalException'),
+    'MalClient': ('acli.mal_client', 'MalClient'),
+    # Config and Consul
+    'CiiConfigClient': ('elt.configng', 'CiiConfigClient'),
+    'StooConsulClient': ('stooUtils.consul', 'ConsulClient'),
+    'Consul': ('consul', 'Consul'),
+}
+
+#: modules imported lazily, (e.g. to check they are not imported at start)
+lazy_modules = sorted({m for m,_ in _lazy_attributes.values()})
+
+
+def is_instance(obj, name: str)->bool:
+    """ isinstance check against a lazy middleware class, without importing it
+
+    If the middleware module is not imported yet, obj cannot be one of its instance.
+    """
+    module_name, _ = _lazy_attributes[name]
+    if module_name not in sys.modules:
+        return False
+    return isinstance(obj, __getattr__(name))
+
+def __getattr__(name: str):
+    try:
+        module_name, attr = _lazy_attributes[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    module = importlib.import_module(module_name)
+    value = module if attr is None else getattr(module, attr)
+    globals()[name] = value # next access is a normal module attribute access
+    return value
+
+def __dir__():
+    return sorted( list(globals()) + list(_lazy_attributes) )
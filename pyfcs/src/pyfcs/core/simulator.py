@@ -0,0 +1,509 @@
+"""
+@copyright EFISOFT
+@brief In-process simulated FCS device manager
+
+The simulator answers the App (AppCmds), Std (StdCmds) and Daq (MetaDaq)
+commands without any server. Devices follow a simple state machine per
+devtype. Latency, jitter and failures can be injected per call.
+
+Setup buffers are real Mal data entities: the MAL must be installed, but no
+server is needed.
+
+Exemple::
+
+    from pyfcs.core.api import SimServer, SimInterface
+    from pyfcs import DevMgrCommands
+
+    server = SimServer({'lamp1':'lamp', 'motor1':'motor'}, latency=0.005, jitter=0.002)
+    fcs = DevMgrCommands(SimInterface(server))
+
+    fcs.init()
+    fcs.enable()
+    fcs.lamp1.switch_on(50, 10)
+    print( fcs.devstatus('lamp1') )
+
+"""
+from __future__ import annotations
+import asyncio
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import random
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+from .define import ClientKind
+from .interface.interface import BaseInterface
+from .interface.mal_registry import get_mal
+from .interface.retry import RetryPolicy
+from .interface.singleflight import SingleFlight
+
+
+class SimulatedError(RuntimeError):
+    """ Error raised by the simulator when a failure is injected or a command is rejected """
+
+class SimulatedTimeout(TimeoutError):
+    """ Raised by the simulator when the call latency exceeds the client timeout """
+
+
+@dataclass
+class DevtypeBehaviour:
+    """ Define the state machine of a simulated device type
+
+    Args:
+        idle: substate of an Operational device with nothing done
+        actions: action name -> (transitional substate or None, final substate)
+        duration: time in seconds spent in the transitional substate
+    """
+    idle: str = "Ready"
+    actions: dict[str, tuple[str|None,str]] = field(default_factory=dict)
+    duration: float = 0.0
+
+    def transition(self, action: str|None)->tuple[str|None,str]:
+        return self.actions.get(action, (None, self.idle))
+
+
+_motion = {a:("Moving","Standstill") for a in ("MOVE_ABS", "MOVE_REL", "MOVE_BY_NAME", "MOVE_BY_POSNAME", "MOVE_ANGLE")}
+_motion["INIT"] = ("Initialising", "Standstill")
+
+default_behaviours: dict[str, DevtypeBehaviour] = {
+    "lamp": DevtypeBehaviour("Off", {"ON":("Warming", "On"), "OFF":("Cooling", "Off")}),
+    "shutter": DevtypeBehaviour("Closed", {"OPEN":("Opening", "Open"), "CLOSE":("Closing", "Closed")}),
+    "motor": DevtypeBehaviour("Standstill", dict(_motion)),
+    "drot": DevtypeBehaviour("Standstill", {**_motion, "START_TRACK":(None, "Tracking"), "STOP_TRACK":(None, "Standstill")}),
+    "adc": DevtypeBehaviour("Standstill", {**_motion, "START_TRACK":(None, "Tracking"), "STOP_TRACK":(None, "Standstill")}),
+    "piezo": DevtypeBehaviour("Pos", {"AUTO":(None, "Auto"), "POS":(None, "Pos")}),
+    "actuator": DevtypeBehaviour("Off", {"ON":(None, "On"), "OFF":(None, "Off")}),
+}
+
+
+@dataclass
+class SimDevice:
+    """ State of a simulated device """
+    name: str
+    devtype: str
+    behaviour: DevtypeBehaviour
+    state: str = "NotOperational"
+    substate: str = "NotReady"
+    values: dict[str,Any] = field(default_factory=dict)
+    simulated: bool = True
+    ignored: bool = False
+    # pending transition (final substate, time when reached)
+    _pending: tuple[str,float]|None = None
+
+    def update(self, now: float)->None:
+        if self._pending is not None and now >= self._pending[1]:
+            self.substate = self._pending[0]
+            self._pending = None
+
+    def set_substate(self, transitional: str|None, final: str, duration: float, now: float)->None:
+        if transitional and duration>0:
+            self.substate = transitional
+            self._pending = (final, now+duration)
+        else:
+            self.substate = final
+            self._pending = None
+
+    def status(self)->list[str]:
+        lines = [
+            f"{self.name}.simulated = {'true' if self.simulated else 'false'}",
+            f"{self.name}.ignored = {'true' if self.ignored else 'false'}",
+            f"{self.name}.lcs.state = {self.state}",
+            f"{self.name}.lcs.substate = {self.substate}",
+        ]
+        for key, value in self.values.items():
+            if isinstance(value, float):
+                value = f"{value:f}"
+            lines.append(f"{self.name}.lcs.{key} = {value}")
+        return lines
+
+
+class SimServer:
+    """ A simulated FCS device manager
+
+    Args:
+        devices (dict): devname -> devtype map of the managed devices
+        latency (float, optional): base latency of every call in seconds
+        jitter (float, optional): random latency added to every call (uniform in [0,jitter])
+        failure_rate (float, optional): probability [0-1] of any call to fail
+        latencies (dict, optional): method name -> base latency, override latency
+        failure_rates (dict, optional): method name -> failure probability, override failure_rate
+        behaviours (dict, optional): devtype -> DevtypeBehaviour, completes the default behaviours
+        operational (bool, optional): If True (default) the server and devices start
+            Operational, otherwise they need Init/Enable and HwInit/HwEnable
+        seed (int, optional): random seed for jitter and failure injection
+        name (str, optional): server name used to build the uri 'sim://<name>'
+    """
+    def __init__(self,
+            devices: dict[str,str],
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            failure_rate: float = 0.0,
+            latencies: dict[str,float]|None = None,
+            failure_rates: dict[str,float]|None = None,
+            behaviours: dict[str,DevtypeBehaviour]|None = None,
+            operational: bool = True,
+            seed: int|None = None,
+            name: str = "fcs",
+        ):
+        self.name = name
+        self.devtypes = dict(devices)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.latencies = dict(latencies or {})
+        self.failure_rates = dict(failure_rates or {})
+        self.behaviours = {**default_behaviours, **(behaviours or {})}
+        self.random = random.Random(seed)
+        self.calls: dict[str,int] = {}
+        self._lock = threading.RLock()
+        self._daq: dict[str,str] = {}
+
+        if operational:
+            self.state, self.substate = "Operational", "Idle"
+        else:
+            self.state, self.substate = "NotOperational", "NotReady"
+
+        self.devices: dict[str,SimDevice] = {}
+        for devname, devtype in self.devtypes.items():
+            behaviour = self.behaviours.get(devtype.lower(), DevtypeBehaviour())
+            device = SimDevice(devname, devtype.lower(), behaviour)
+            if operational:
+                device.state, device.substate = "Operational", behaviour.idle
+            self.devices[devname] = device
+        self._clients: dict[tuple, SimCii] = {}
+
+    @property
+    def uri(self)->str:
+        return f"sim://{self.name}"
+
+    # ~~~~~~~~~~~~~~~~ Injection ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def get_delay(self, method_name: str)->float:
+        """ Return the latency of one call (with jitter) in seconds """
+        delay = self.latencies.get(method_name, self.latency)
+        if self.jitter:
+            delay += self.random.uniform(0, self.jitter)
+        return delay
+
+    def should_fail(self, method_name: str)->bool:
+        rate = self.failure_rates.get(method_name, self.failure_rate)
+        return rate>0 and self.random.random() < rate
+
+    def execute(self, client_kind: str, method_name: str, args: tuple, kwargs: dict)->Any:
+        """ Execute a command right now (no latency), used by the simulated clients """
+        with self._lock:
+            self.calls[method_name] = self.calls.get(method_name, 0) + 1
+            if self.should_fail(method_name):
+                raise SimulatedError(f"Injected failure on {client_kind}/{method_name}")
+            handler = getattr(self, f"_{client_kind.lower()}_{method_name}", None)
+            if handler is None:
+                raise SimulatedError(f"{client_kind}/{method_name} is not simulated")
+            return handler(*args, **kwargs)
+
+    def cii(self, client_kind: str, asynchronous: bool, timeout: float|None = None)->SimCii:
+        """ Return the simulated Cii client for a client kind and a timeout in seconds """
+        key = (ClientKind(client_kind).value, asynchronous, timeout)
+        try:
+            return self._clients[key]
+        except KeyError:
+            client_class = SimAsyncClient if asynchronous else SimClient
+            cii = SimCii( client_class(self, key[0], timeout) )
+            self._clients[key] = cii
+            return cii
+
+    # ~~~~~~~~~~~~~~~~ Helpers ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _select(self, devnames)->list[SimDevice]:
+        if isinstance(devnames, str):
+            devnames = devnames.split()
+        if not devnames:
+            return list(self.devices.values())
+        try:
+            return [self.devices[d] for d in devnames]
+        except KeyError as err:
+            raise SimulatedError(f"Unknown device {err}")
+
+    def _set_devices(self, devnames, state: str, substate: str|None = None)->str:
+        for device in self._select(devnames):
+            device.state = state
+            device.substate = substate or device.behaviour.idle
+            device._pending = None
+        return "OK"
+
+    def _load_element(self, element)->tuple[str, dict[str,Any]]:
+        # import here to avoid import cycles, devices must be registered anyway
+        from .device import register
+        devname = element.getId()
+        try:
+            devtype = self.devtypes[devname]
+        except KeyError:
+            raise SimulatedError(f"Unknown device {devname!r}")
+        setup = register.setup_class(devtype.lower())(SimInterface(self), devname)
+        setup.load_buffer(element)
+        return devname, setup.get_parameter_payload()
+
+    # ~~~~~~~~~~~~~~~~ App commands ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _app_Setup(self, buffer)->str:
+        if self.state != "Operational":
+            raise SimulatedError(f"Setup rejected, server is {self.state}")
+        payloads = [self._load_element(element) for element in buffer]
+        now = time.monotonic()
+        # check everything before applying anything
+        for devname, _ in payloads:
+            device = self.devices[devname]
+            device.update(now)
+            if device.state != "Operational" and not device.ignored:
+                raise SimulatedError(f"Setup rejected, device {devname!r} is {device.state}")
+        for devname, payload in payloads:
+            device = self.devices[devname]
+            device.values.update(payload)
+            transitional, final = device.behaviour.transition(payload.get("action"))
+            device.set_substate(transitional, final, device.behaviour.duration, now)
+        return "OK"
+
+    def _app_DevStatus(self, devnames=())->str:
+        now = time.monotonic()
+        status = []
+        for device in self._select(devnames):
+            device.update(now)
+            status.extend(device.status())
+        return "\n".join(status)
+
+    def _app_DevInfo(self)->str:
+        return repr(self.devtypes)
+
+    def _app_Recover(self)->str:
+        self.state, self.substate = "Operational", "Idle"
+        return "OK"
+
+    def _app_HwInit(self, devnames=())->str:
+        return self._set_devices(devnames, "NotOperational", "Ready")
+
+    def _app_HwEnable(self, devnames=())->str:
+        return self._set_devices(devnames, "Operational")
+
+    def _app_HwDisable(self, devnames=())->str:
+        return self._set_devices(devnames, "NotOperational", "Ready")
+
+    def _app_HwReset(self, devnames=())->str:
+        return self._set_devices(devnames, "NotOperational", "NotReady")
+
+    def _app_Ignore(self, devnames=())->str:
+        for device in self._select(devnames):
+            device.ignored = True
+        return "OK"
+
+    def _app_StopIgn(self, devnames=())->str:
+        for device in self._select(devnames):
+            device.ignored = False
+        return "OK"
+
+    def _app_Simulate(self, devnames=())->str:
+        for device in self._select(devnames):
+            device.simulated = True
+        return "OK"
+
+    def _app_StopSim(self, devnames=())->str:
+        for device in self._select(devnames):
+            device.simulated = False
+        return "OK"
+
+    # ~~~~~~~~~~~~~~~~ Std commands ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _std_transition(self, allowed: tuple[str,...], state: str, substate: str)->str:
+        if allowed and self.substate not in allowed:
+            raise SimulatedError(f"Command not allowed in {self.state};{self.substate}")
+        self.state, self.substate = state, substate
+        return "OK"
+
+    def _std_GetState(self)->str:
+        return f"{self.state};{self.substate}"
+
+    def _std_GetStatus(self)->str:
+        return f"{self.state};{self.substate}"
+
+    def _std_GetVersion(self)->str:
+        return "simulator"
+
+    def _std_Init(self)->str:
+        return self._std_transition(("NotReady", "Ready"), "NotOperational", "Ready")
+
+    def _std_Enable(self)->str:
+        return self._std_transition(("Ready",), "Operational", "Idle")
+
+    def _std_Disable(self)->str:
+        return self._std_transition(("Idle", "Busy"), "NotOperational", "Ready")
+
+    def _std_Reset(self)->str:
+        return self._std_transition((), "NotOperational", "NotReady")
+
+    def _std_Stop(self)->str:
+        return "OK"
+
+    def _std_Exit(self)->str:
+        return "OK"
+
+    def _std_SetLogLevel(self, *args)->str:
+        return "OK"
+
+    # ~~~~~~~~~~~~~~~~ Daq commands ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _daq_reply(self, id: str)->SimDaqReply:
+        return SimDaqReply(id, self._daq.get(id, "Unknown"))
+
+    def _daq_StartDaq(self, id: str)->SimDaqReply:
+        if self._daq.get(id) == "Acquiring":
+            raise SimulatedError(f"Daq {id!r} already started")
+        self._daq[id] = "Acquiring"
+        return self._daq_reply(id)
+
+    def _daq_StopDaq(self, id: str)->SimDaqReply:
+        if self._daq.get(id) != "Acquiring":
+            raise SimulatedError(f"Daq {id!r} is not started")
+        self._daq[id] = "Stopped"
+        return self._daq_reply(id)
+
+    def _daq_AbortDaq(self, id: str)->SimDaqReply:
+        self._daq[id] = "Aborted"
+        return self._daq_reply(id)
+
+    def _daq_GetDaqStatus(self, id: str)->SimDaqReply:
+        return self._daq_reply(id)
+
+
+@dataclass
+class SimDaqReply:
+    """ Mimics the Metadaqif reply objects """
+    id: str
+    state: str
+    files: tuple = ()
+    keywords: str = ""
+
+    def getId(self)->str:
+        return self.id
+    GetId = getId
+
+    def getState(self)->str:
+        return self.state
+
+    def getFiles(self)->tuple:
+        return self.files
+
+    def getKeywords(self)->str:
+        return self.keywords
+
+
+class _SimMethod:
+    # A bound simulated client method
+    def __init__(self, client: SimClient, method_name: str):
+        self.client = client
+        self.method_name = method_name
+
+    def __call__(self, *args, **kwargs):
+        return self.client._call(self.method_name, args, kwargs)
+
+
+class SimClient:
+    """ Synchronous simulated client of one client kind """
+    def __init__(self, server: SimServer, client_kind: str, timeout: float|None = None):
+        self.server = server
+        self.client_kind = client_kind
+        self.timeout = timeout
+
+    def __getattr__(self, method_name: str)->Callable:
+        if method_name.startswith('_'):
+            raise AttributeError(method_name)
+        return _SimMethod(self, method_name)
+
+    def _call(self, method_name: str, args: tuple, kwargs: dict)->Any:
+        delay = self.server.get_delay(method_name)
+        if self.timeout is not None and delay > self.timeout:
+            time.sleep(self.timeout)
+            raise SimulatedTimeout(f"{self.client_kind}/{method_name} timed out after {self.timeout}s")
+        if delay>0:
+            time.sleep(delay)
+        return self.server.execute(self.client_kind, method_name, args, kwargs)
+
+
+class SimRequest:
+    """ Pending asynchronous request, mimics the object returned by Mal async clients """
+    def __init__(self, client: SimAsyncClient, method_name: str, args: tuple, kwargs: dict):
+        self.client = client
+        self.method_name = method_name
+        self.args = args
+        self.kwargs = kwargs
+
+    def create_future(self)->asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        server = self.client.server
+        delay = server.get_delay(self.method_name)
+        timeout = self.client.timeout
+
+        def resolve():
+            if future.done():
+                return
+            if timeout is not None and delay > timeout:
+                future.set_exception(SimulatedTimeout(
+                    f"{self.client.client_kind}/{self.method_name} timed out after {timeout}s"))
+                return
+            try:
+                result = server.execute(self.client.client_kind, self.method_name, self.args, self.kwargs)
+            except Exception as err:
+                future.set_exception(err)
+            else:
+                future.set_result(result)
+
+        loop.call_later(min(delay, timeout) if timeout is not None else delay, resolve)
+        return future
+
+
+class SimAsyncClient(SimClient):
+    """ Asynchronous simulated client of one client kind """
+    def _call(self, method_name: str, args: tuple, kwargs: dict)->SimRequest:
+        return SimRequest(self, method_name, args, kwargs)
+
+
+class SimCii:
+    """ Mimics acli MalClient for a simulated client """
+    def __init__(self, client: SimClient):
+        self.client = client
+
+    def get_mal_client(self)->SimClient:
+        return self.client
+
+    def get_mal(self):
+        return get_mal()
+
+
+@dataclass(frozen=True)
+class SimInterface(BaseInterface):
+    """ Interface to an in-process simulated device manager
+
+    Args:
+        server (SimServer): the simulated server
+        timeout (int, optional): client timeout in milliseconds
+        singleflight (SingleFlight, optional): coalesce concurrent read-only commands
+        retry (RetryPolicy, optional): retry policy of commands
+    """
+    server: SimServer
+    timeout: int = 10000
+    singleflight: SingleFlight|None = field(default=None, compare=False)
+    retry: RetryPolicy|None = field(default=None, compare=False)
+
+    @property
+    def uri(self)->str:
+        return self.server.uri
+
+    def _get_cii(self, client_kind: str, asynchronous: bool)->SimCii:
+        return self.server.cii(client_kind, asynchronous, self.timeout/1000.)
+
+    @contextmanager
+    def client_with_timeout(self, client_kind: str, timeout: int, asynchronous: bool = False)->Iterator[SimClient]:
+        """ Context manager returning a simulated client with an other timeout (ms) """
+        yield self.server.cii(client_kind, asynchronous, timeout/1000.).get_mal_client()
+
+    def get_mal(self, client_kind: str = ClientKind.App):
+        """ Return the local MAL, to create data entities """
+        return get_mal()
+
+    def close(self)->None:
+        for key in [k for k in self.__dict__ if isinstance(k, tuple)]:
+            del self.__dict__[key]
@@ -1,7 +1,9 @@
 from .cash_property import cash_property 
 from .buffer import BufferHolder
 from .help import class_help 
-from .payload_receiver import PayloadReceiver
+from .payload_receiver import PayloadReceiver, PayloadElementError, iter_json_elements
 from .status_handler import StatusWaiter, StatusHandler
 from .io import get_devtypes_from_cfgfile, find_config_file
 from .empty import Empty 
+from .metrics import MetricsRegistry, get_metrics_registry
+from .schema_cache import SchemaCache, get_schema_cache, set_schema_cache, export_schema
@@ -1,6 +1,9 @@
+from __future__ import annotations
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-from ModFcfif.Fcfif import  VectorfcfifSetupElem
+if TYPE_CHECKING:
+    from ModFcfif.Fcfif import  VectorfcfifSetupElem
 
 @dataclass
 class BufferHolder:
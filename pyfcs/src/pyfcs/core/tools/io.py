@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import os 
-from elt.configng import CiiConfigClient 
+
+from pyfcs.core import middleware as mw 
 
 def find_config_file(file: str)->str:
     """ Find a configfile within the directories defined in $CFGPATH
@@ -27,6 +28,7 @@ def find_config_file(file: str)->str:
 def load_cfgfile(file:str):
     """ Load a config file with the Cii Config File parser """
      # save current search path
+    CiiConfigClient = mw.CiiConfigClient
     saved_search_path = CiiConfigClient.get_search_path()
     CiiConfigClient.set_search_path(os.environ["CFGPATH"])
     try:
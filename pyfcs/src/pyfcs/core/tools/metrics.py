@@ -0,0 +1,189 @@
+"""
+@copyright EFISOFT
+@brief In-process metrics of executed commands
+
+Every command executed through a :class:`pyfcs.core.interface.command.Command`
+context manager is counted and timed, per (uri, client kind, method).
+
+Exemple::
+
+    from pyfcs.core.api import get_metrics_registry
+
+    metrics = get_metrics_registry()
+    ... # execute some commands
+    stats = metrics.snapshot()
+    print( stats[('zpb.rr://localhost:12081/fcs', 'App', 'Setup')].percentile(0.99) )
+
+    print( metrics.to_prometheus() ) # Prometheus text format
+    metrics.reset()
+
+Metrics can be disabled with ``metrics.enabled = False``
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from dataclasses import dataclass, field
+import threading
+
+# Upper bounds in seconds of the latency histogram buckets (+Inf is implicit)
+DEFAULT_BUCKETS = (
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+        0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+    )
+
+MetricKey = tuple[str,str,str] # uri, client_kind, method_name
+
+
+@dataclass
+class Histogram:
+    """ Cumulative latency histogram with fixed buckets
+
+    Args:
+        buckets (tuple): sorted bucket upper bounds in seconds
+    """
+    buckets: tuple[float,...] = DEFAULT_BUCKETS
+    counts: list[int]|None = None # one more for +Inf
+    count: int = 0
+    sum: float = 0.0
+    min: float = float('inf')
+    max: float = 0.0
+
+    def __post_init__(self):
+        if self.counts is None:
+            self.counts = [0]*(len(self.buckets)+1)
+
+    def observe(self, value: float)->None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float)->float:
+        """ Estimate the q quantile (0<=q<=1), linear interpolation inside buckets """
+        if not self.count:
+            return float('nan')
+        rank = q*self.count
+        cumulated = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulated + n >= rank:
+                low = self.buckets[i-1] if i else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                low, high = max(low, self.min), min(high, self.max)
+                return low + (high-low)*(rank-cumulated)/n
+            cumulated += n
+        return self.max
+
+    @property
+    def mean(self)->float:
+        return self.sum/self.count if self.count else float('nan')
+
+    def copy(self)->Histogram:
+        return Histogram(self.buckets, list(self.counts), self.count, self.sum, self.min, self.max)
+
+
+@dataclass
+class CommandStats:
+    """ Statistics of one (uri, client kind, method) command """
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    latency: Histogram = field(default_factory=Histogram)
+
+    def percentile(self, q: float)->float:
+        """ Estimated q quantile of the latency in seconds """
+        return self.latency.percentile(q)
+
+    def copy(self)->CommandStats:
+        return CommandStats(self.calls, self.errors, self.timeouts, self.latency.copy())
+
+
+def _labels(key: MetricKey)->str:
+    uri, client_kind, method_name = (str(k).replace('\\', '\\\\').replace('"', '\\"') for k in key)
+    return f'uri="{uri}",client="{client_kind}",method="{method_name}"'
+
+def _format_float(value: float)->str:
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """ Thread safe registry of command statistics
+
+    Args:
+        buckets (tuple, optional): latency histogram bucket upper bounds in seconds
+    """
+    def __init__(self, buckets: tuple[float,...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.enabled = True
+        self._stats: dict[MetricKey, CommandStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self,
+            key: MetricKey,
+            duration: float,
+            error: bool = False,
+            timeout: bool = False
+        )->None:
+        """ Record one command execution
+
+        Args:
+            key (tuple): (uri, client_kind, method_name)
+            duration (float): execution time in seconds
+            error (bool): True if the command raised an exception
+            timeout (bool): True if the command timed out
+        """
+        with self._lock:
+            try:
+                stats = self._stats[key]
+            except KeyError:
+                stats = self._stats[key] = CommandStats(latency=Histogram(self.buckets))
+            stats.calls += 1
+            stats.errors += error
+            stats.timeouts += timeout
+            stats.latency.observe(duration)
+
+    def snapshot(self)->dict[MetricKey, CommandStats]:
+        """ Return a copy of all statistics """
+        with self._lock:
+            return {key:stats.copy() for key, stats in self._stats.items()}
+
+    def reset(self)->None:
+        """ Clear all statistics """
+        with self._lock:
+            self._stats.clear()
+
+    def to_prometheus(self, prefix: str = "pyfcs_command")->str:
+        """ Dump all statistics in Prometheus text exposition format """
+        snapshot = self.snapshot()
+        lines = []
+        for name, attr, doc in (
+                ("calls_total", "calls", "Number of executed commands"),
+                ("errors_total", "errors", "Number of commands which raised an error"),
+                ("timeouts_total", "timeouts", "Number of commands which timed out"),
+            ):
+            lines.append(f"# HELP {prefix}_{name} {doc}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for key, stats in snapshot.items():
+                lines.append(f"{prefix}_{name}{{{_labels(key)}}} {getattr(stats, attr)}")
+
+        name = f"{prefix}_duration_seconds"
+        lines.append(f"# HELP {name} Command execution time in seconds")
+        lines.append(f"# TYPE {name} histogram")
+        for key, stats in snapshot.items():
+            labels = _labels(key)
+            cumulated = 0
+            for bound, n in zip(stats.latency.buckets, stats.latency.counts):
+                cumulated += n
+                lines.append(f'{name}_bucket{{{labels},le="{_format_float(bound)}"}} {cumulated}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats.latency.count}')
+            lines.append(f"{name}_sum{{{labels}}} {_format_float(stats.latency.sum)}")
+            lines.append(f"{name}_count{{{labels}}} {stats.latency.count}")
+        return "\n".join(lines)+"\n"
+
+
+metrics_registry = MetricsRegistry()
+
+def get_metrics_registry()->MetricsRegistry:
+    """ Return the process wide metrics registry """
+    return metrics_registry
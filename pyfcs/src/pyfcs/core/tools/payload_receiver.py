@@ -1,16 +1,392 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from json import JSONDecoder, JSONDecodeError
+import os
+import re
+import threading
+from typing import IO, Any, Callable, Iterable, Iterator
 
-from jsonschema.exceptions import ValidationError
+from jsonschema.exceptions import ValidationError, best_match
 # import json 
 import ifw.fcf.clib.json_procs as json
 import jsonschema 
 from ifw.fcf.clib import log
 
+_validators_lock = threading.Lock()
+
+class _SchemaMap(OrderedDict):
+    """ id(schema) -> (schema, value) map of the ``maxsize`` most recently used schemas 
+
+    The schema is kept to make sure its id is not re-used while it is in the map. 
+    """
+    def __init__(self, maxsize: int = 32):
+        super().__init__()
+        self.maxsize = maxsize 
+
+    def lookup(self, schema: dict)->Any:
+        """ Return the value stored for this schema object or None """
+        try:
+            cached_schema, value = self[id(schema)]
+        except KeyError:
+            return None 
+        if cached_schema is not schema:
+            return None 
+        with _validators_lock:
+            if id(schema) in self:
+                self.move_to_end(id(schema))
+        return value 
+
+    def store(self, schema: dict, value: Any)->None:
+        with _validators_lock:
+            self[id(schema)] = (schema, value)
+            self.move_to_end(id(schema))
+            while len(self) > self.maxsize:
+                self.popitem(last=False)
+
+# compiled validators 
+_validators = _SchemaMap()
+# schemas already checked against their meta-schema 
+_checked_schemas = _SchemaMap()
+
+def mark_schema_checked(schema: dict)->None:
+    """ Mark a schema as valid, get_validator will not check it again """
+    _checked_schemas.store(schema, True)
+
+def is_schema_checked(schema: dict)->bool:
+    """ True if the schema was marked as valid (see mark_schema_checked) """
+    return _checked_schemas.lookup(schema) is not None 
+
+def get_validator(schema: dict):
+    """ Return a compiled validator for the schema 
+
+    The schema is checked against its meta-schema and the validator is built only 
+    once per schema object (the last used schemas are cached). Schema must not be 
+    modified afterward. 
+    """
+    validator = _validators.lookup(schema)
+    if validator is not None:
+        return validator 
+    
+    cls = jsonschema.validators.validator_for(schema)
+    if not is_schema_checked(schema):
+        cls.check_schema(schema)
+    validator = cls(schema)
+    _validators.store(schema, validator)
+    return validator 
+
+def clear_validators()->None:
+    """ Clear the cache of compiled validators """
+    with _validators_lock:
+        _validators.clear()
+        _dispatchers.clear()
+        _checked_schemas.clear()
+
+
+def is_devtype_schema(schema: dict|None)->bool:
+    """ True if the schema is a DevMgr setup schema (see pyfcs.core.devmgr.setup.create_empty_schema) """
+    try:
+        return ('oneOf' in schema['definitions']['param'] and 
+                schema['items']['properties']['param'] == {"$ref": "#/definitions/param"})
+    except (KeyError, TypeError):
+        return False 
+
+
+class DevtypeValidator:
+    """ Validate a DevMgr setup payload element by element against its devtype schema only 
+
+    The full schema checks the param of each element against a ``oneOf`` of all devtypes. 
+    Here, the devtype key of each element is read and only the devtype schema is used. 
+    Errors have the same path as with the full schema. Elements with zero or several 
+    devtypes are checked with the full schema to get the same errors.
+    """
+    def __init__(self, schema: dict):
+        self.schema = schema 
+        self.full = get_validator(schema)
+        cls = type(self.full)
+        definitions = schema['definitions']
+        self.devtypes = frozenset(definitions['param'].get('properties', {}))
+        items = dict(schema['items'])
+        items['properties'] = {**items['properties'], 'param':{'type':'object'}}
+        self.item = cls(items)
+        self.devtype_validators = {
+            devtype: cls({"$ref": "#/definitions/"+devtype, "definitions": definitions})
+            for devtype in self.devtypes
+        }
+
+    def iter_errors(self, payload: Any):
+        if not isinstance(payload, list):
+            yield from self.full.iter_errors(payload)
+            return 
+        for i, element in enumerate(payload):
+            errors = list(self.item.iter_errors(element))
+            if not errors:
+                param = element['param']
+                found = [key for key in param if key in self.devtypes]
+                if len(found) == 1:
+                    devtype = found[0]
+                    for error in self.devtype_validators[devtype].iter_errors(param[devtype]):
+                        error.path.extendleft( ('param', devtype)[::-1] )
+                        errors.append(error)
+                else:
+                    errors = [e for e in self.full.iter_errors([element])]
+                    for error in errors:
+                        error.path.popleft()
+            for error in errors:
+                error.path.appendleft(i)
+                yield error 
+
+    def is_valid(self, payload: Any)->bool:
+        return next(self.iter_errors(payload), None) is None 
+
+# DevtypeValidator of the last used schemas 
+_dispatchers = _SchemaMap()
+
+def get_devtype_validator(schema: dict)->DevtypeValidator:
+    """ Return a cached DevtypeValidator for a DevMgr setup schema """
+    validator = _dispatchers.lookup(schema)
+    if validator is None:
+        validator = DevtypeValidator(schema)
+        _dispatchers.store(schema, validator)
+    return validator 
+
+
+class PayloadElementError(ValueError):
+    """ Error on one element of a streamed payload 
+
+    Attributes:
+        index (int): element index in the payload 
+        offset (int): character offset of the element in the stream 
+        line (int): line number (starting at 1) of the element 
+    """
+    def __init__(self, message: str, index: int, offset: int, line: int):
+        super().__init__(f"Item #{index} at offset {offset} (line {line}): {message}")
+        self.index = index 
+        self.offset = offset 
+        self.line = line 
+
+
+@dataclass
+class PayloadElement:
+    """ One element of a streamed payload and its location in the stream """
+    index: int 
+    offset: int 
+    line: int 
+    value: Any 
+
+
+_decoder = JSONDecoder()
+_whitespaces = re.compile(r'[ \t\n\r]*')
+
+class _TextStream:
+    # Minimal incremental reader, keep only the unconsumed text in memory 
+    def __init__(self, fp: IO[str], buffer_size: int):
+        self.fp = fp 
+        self.buffer_size = buffer_size 
+        self.buf = ""
+        self.pos = 0 # position in buf 
+        self.base = 0 # stream offset of buf[0]
+        self.line = 1 # line number at pos 
+        self.eof = False 
+
+    @property
+    def offset(self)->int:
+        return self.base + self.pos 
+
+    def advance(self, pos: int)->None:
+        self.line += self.buf.count("\n", self.pos, pos)
+        self.pos = pos 
+
+    def read(self, size: int|None = None)->bool:
+        if self.eof:
+            return False 
+        data = self.fp.read(size or self.buffer_size)
+        if not data:
+            self.eof = True 
+            return False 
+        self.base += self.pos 
+        self.buf = self.buf[self.pos:] + data 
+        self.pos = 0 
+        return True 
+
+    def peek(self)->str|None:
+        """ skip whitespaces and return the next character, None at end of stream """
+        while True:
+            self.advance( _whitespaces.match(self.buf, self.pos).end() )
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.read():
+                return None 
+
+    def _truncated(self, err: JSONDecodeError)->bool:
+        # the error is at the end of the text (at most a partial literal as "-Infinit"), 
+        # or a string is not terminated before the end of the text 
+        return len(self.buf)-err.pos < 10 or err.msg.startswith("Unterminated string")
+
+    def decode(self)->Any:
+        """ decode the next JSON value, reading more text until it is complete """
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except JSONDecodeError as err:
+                # value may be truncated, grow geometrically to stay linear on large elements. 
+                # An error before the end of the text is raised without reading further 
+                if self._truncated(err) and self.read( max(self.buffer_size, len(self.buf)-self.pos) ):
+                    continue 
+                raise ValueError(f"{err.msg} at offset {self.base+err.pos}") from None 
+            # a number may continue in the next read (e.g. "1." + "5") 
+            if end > len(self.buf)-3 and self.read():
+                continue 
+            self.advance(end)
+            return value 
+
+
+def iter_json_elements(fp: IO[str], buffer_size: int = 1<<16)->Iterator[PayloadElement]:
+    """ Iterate incrementally over the elements of a JSON array or of NDJSON text 
+
+    A stream starting with ``[`` is read as a JSON array, otherwise as a sequence of 
+    JSON values (one per line for NDJSON). Only the element being decoded is kept in memory. 
+
+    Args:
+        fp: text file like object with a read method 
+        buffer_size (int, optional): size of reads 
+
+    Raises:
+        PayloadElementError: on malformed JSON, with the location of the faulty element 
+
+    Exemple::
+
+        with open('plan.ndjson') as f:
+            for element in iter_json_elements(f):
+                print( element.line, element.value['id'] )
+    """
+    stream = _TextStream(fp, buffer_size)
+
+    def decode(index: int)->PayloadElement:
+        stream.peek()
+        offset, line = stream.offset, stream.line 
+        try:
+            return PayloadElement(index, offset, line, stream.decode())
+        except ValueError as err:
+            raise PayloadElementError(str(err), index, offset, line) from None 
+
+    def fail(index: int, message: str):
+        return PayloadElementError(message, index, stream.offset, stream.line)
+
+    char = stream.peek()
+    if char != '[':
+        index = 0 
+        while char is not None:
+            yield decode(index)
+            index += 1 
+            char = stream.peek()
+        return 
+
+    stream.advance(stream.pos+1)
+    index = 0 
+    if stream.peek() == ']':
+        stream.advance(stream.pos+1)
+    else:
+        while True:
+            yield decode(index)
+            index += 1 
+            char = stream.peek()
+            if char == ']':
+                stream.advance(stream.pos+1)
+                break 
+            if char != ',':
+                raise fail(index, "expecting ',' or ']' after element" if char else "unterminated JSON array")
+            stream.advance(stream.pos+1)
+    if stream.peek() is not None:
+        raise fail(index, "extra data after the JSON array")
+
+
+def portable_error(err: Exception)->Exception:
+    """ Return a picklable copy of an exception raised in a worker process 
+
+    ValidationError keeps its message, path and schema path. Other errors are 
+    returned as ValueError with the message of their cause appended. 
+    """
+    if isinstance(err, ValidationError):
+        return ValidationError(
+                err.message, validator=err.validator, path=err.path, schema_path=err.schema_path, 
+                instance=err.instance, validator_value=err.validator_value, schema=err.schema
+            )
+    message = str(err)
+    if err.__cause__ is not None:
+        message = f"{message}: {err.__cause__}"
+    return ValueError(message)
+
+def run_in_pool(
+        func: Callable, 
+        items: list[Any], 
+        workers: int, 
+        initializer: Callable, 
+        initargs: tuple, 
+        chunksize: int = 16
+    )->list[Any]:
+    """ map func over items in a pool of processes initialised once with initializer(*initargs)
+
+    Results are returned in order. With the 'spawn' start method the initializer 
+    arguments must be picklable. 
+    """
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as pool:
+        return list(pool.map(func, items, chunksize=max(1, chunksize)))
+
+def collect_results(values: list[Any], errors: list[Exception|None], return_exceptions: bool)->list[Any]:
+    """ Return values with errors in place, raise the first error if return_exceptions is False """
+    if not return_exceptions:
+        for i, error in enumerate(errors):
+            if error is not None:
+                log.error(f"Payload #{i} is invalid: {error}")
+                raise error 
+    return [value if error is None else error for value, error in zip(values, errors)]
+
+
+_worker_receiver: PayloadReceiver | None = None 
+
+def _init_worker(schema: dict)->None:
+    global _worker_receiver
+    _worker_receiver = PayloadReceiver(schema)
+    _worker_receiver.validator # compile once per process 
+
+def _check_in_worker(payload: Any)->Exception|None:
+    try:
+        _worker_receiver._check(payload)
+    except ValidationError as err:
+        return portable_error(err)
+    return None 
+
+
 @dataclass
 class PayloadReceiver:
     schema: dict | None
+    # (schema, validator), the receiver keeps its validator 
+    _validator: tuple | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def validator(self):
+        """ compiled validator of the schema 
+
+        For a DevMgr setup schema, elements are validated against their devtype schema only 
+        """
+        cached = self._validator 
+        if cached is not None and cached[0] is self.schema:
+            return cached[1]
+        if is_devtype_schema(self.schema):
+            validator = get_devtype_validator(self.schema)
+        else:
+            validator = get_validator(self.schema)
+        self._validator = (self.schema, validator)
+        return validator 
+
+    def _check(self, payload)->None:
+        # same as jsonschema.validate but with a cached validator 
+        error = best_match( self.validator.iter_errors(payload) )
+        if error is not None:
+            raise error 
     
     def load_json_string(self, json_str: str)->dict:
         """ Load from a  json string and validate it agains the schema 
@@ -39,6 +415,43 @@ class PayloadReceiver:
             data = json.load(f)
         return self.parse( data ) 
     
+    def iter_json(self, 
+            source: str | os.PathLike | IO[str], 
+            validate: bool = True, 
+            buffer_size: int = 1<<16
+        )->Iterator[PayloadElement]:
+        """ Stream the elements of a JSON array or NDJSON payload, validate them one by one 
+
+        Each element is checked as a one element payload against the schema as soon as 
+        it is read, nothing else is kept in memory.
+
+        Args:
+            source: file path or text file like object 
+            validate (bool, optional): If False elements are not validated 
+            buffer_size (int, optional): size of reads 
+
+        Raises:
+            PayloadElementError: if an element is malformed or invalid. The 
+                jsonschema ValidationError, if any, is the cause of the error 
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'r') as f:
+                yield from self.iter_json(f, validate, buffer_size)
+            return 
+
+        validator = self.validator if validate and self.schema is not None else None 
+        for element in iter_json_elements(source, buffer_size):
+            if validator is not None:
+                error = best_match( validator.iter_errors([element.value]) )
+                if error is not None:
+                    if error.path:
+                        error.path[0] = element.index 
+                    log.error(f"Given json data is Invalid: {error}")
+                    raise PayloadElementError(
+                            error.message, element.index, element.offset, element.line
+                        ) from error 
+            yield element 
+    
     def load_spf_string(self, spf: str, devtypes: dict[str,str]):
 
         # TODO: Check, I think it was dropped in v5 
@@ -76,19 +489,64 @@ class PayloadReceiver:
     
 
     def validate(self, payload):
-        try:
-            jsonschema.validate( instance=payload, schema=self.schema)
-        except ValidationError:
-            return False  
+        if self.schema is None:
+            return True 
+        return self.validator.is_valid(payload)
+
+    def validate_many(self, payloads: Iterable[Any])->list[bool]:
+        """ Validate several payloads, return a list of True/False """
+        if self.schema is None:
+            return [True for _ in payloads]
+        is_valid = self.validator.is_valid
+        return [is_valid(payload) for payload in payloads]
+
+    def parse_many(self, 
+            payloads: Iterable[Any], 
+            workers: int | None = None, 
+            return_exceptions: bool = False, 
+            chunksize: int = 16
+        )->list[Any]:
+        """ Validate a batch of payloads, optionally in a pool of processes 
+
+        Args:
+            payloads (Iterable): payloads to validate 
+            workers (int, optional): number of worker processes. None or 1 validates in 
+                this process. The workers compile the schema validator once. 
+            return_exceptions (bool, optional): If True, invalid payloads are returned as 
+                ValidationError instances, otherwise the first error is raised 
+            chunksize (int, optional): number of payloads sent at once to a worker 
+
+        Returns:
+            payloads (list): the payloads (or errors) in order 
+
+        Exemple::
+
+            receiver = PayloadReceiver(DevMgrSetup.get_schema())
+            results = receiver.parse_many(payloads, workers=8, return_exceptions=True)
+            invalid = [i for i,r in enumerate(results) if isinstance(r, Exception)]
+        """
+        payloads = list(payloads)
+        if self.schema is None:
+            return payloads 
+        if workers is None or workers <= 1 or len(payloads) < 2:
+            errors = []
+            for payload in payloads:
+                try:
+                    self._check(payload)
+                except ValidationError as err:
+                    errors.append(err)
+                else:
+                    errors.append(None)
         else:
-            return True
+            errors = run_in_pool(_check_in_worker, payloads, workers, _init_worker, (self.schema,), chunksize)
+        return collect_results(payloads, errors, return_exceptions)
 
     def parse(self, payload):
         if self.schema is None:
             return payload 
 
         try:
-            jsonschema.validate( instance=payload, schema=self.schema)
+            self._check(payload)
         except ValidationError as er:
             log.error(f"Given json data is Invalid: {er}")
             raise 
@@ -0,0 +1,154 @@
+"""
+@copyright EFISOFT
+@brief On-disk cache of generated JSON schemas
+
+Schemas are stored as JSON files named after a fingerprint of what they are 
+generated from (device classes, parameter schemas, payload_parser contexts and 
+the source of the schema generators). A changed device class gives a new 
+fingerprint, stale files are simply not used anymore.
+
+The cache is disabled unless the ``PYFCS_SCHEMA_CACHE`` environment variable 
+is set to a directory, or a cache is set with ``set_schema_cache``.
+
+Exemple::
+
+    $ export PYFCS_SCHEMA_CACHE=$HOME/.cache/pyfcs/schemas
+
+    from pyfcs import DevMgrSetup
+    from pyfcs.core.api import export_schema
+
+    DevMgrSetup.get_schema() # generated once, then loaded from the cache 
+    export_schema(DevMgrSetup, 'fcs_schema.json') # for other tools 
+"""
+from __future__ import annotations
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from functools import lru_cache
+from typing import Any, Callable
+
+from ifw.fcf.clib import log
+
+from .payload_receiver import mark_schema_checked
+
+ENV_VARIABLE = "PYFCS_SCHEMA_CACHE"
+
+
+def fingerprint(*descriptions: str)->str:
+    """ Return a hex digest of text descriptions """
+    h = hashlib.sha256()
+    for description in descriptions:
+        h.update(description.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+@lru_cache(maxsize=None)
+def source_digest(func: Callable)->str:
+    """ Return a hex digest of the source code of a function 
+
+    Used in fingerprints so a change of the schema generator code gives new keys. 
+    The qualified name is used when the source is not available.
+    """
+    func = getattr(func, "__func__", func)
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = f"{func.__module__}.{func.__qualname__}"
+    return fingerprint(source)
+
+
+class SchemaCache:
+    """ Directory of JSON schemas keyed by fingerprint 
+
+    Args:
+        directory (str): cache directory, created when needed 
+    """
+    def __init__(self, directory: str | os.PathLike):
+        self.directory = os.fspath(directory)
+
+    def path(self, key: str)->str:
+        return os.path.join(self.directory, key+".json")
+
+    def get(self, key: str)->dict | None:
+        """ Return the cached schema or None. The schema is known to be valid """
+        try:
+            with open(self.path(key), 'r') as f:
+                schema = json.load(f)
+        except FileNotFoundError:
+            return None 
+        except (OSError, ValueError) as err:
+            log.warning(f"Cannot read cached schema {self.path(key)!r}: {err}")
+            return None 
+        mark_schema_checked(schema)
+        return schema 
+
+    def put(self, key: str, schema: dict)->None:
+        """ Store a schema, the write is atomic. Errors are logged not raised """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(schema, f)
+                os.replace(tmp, self.path(key))
+            except BaseException:
+                os.unlink(tmp)
+                raise 
+        except OSError as err:
+            log.warning(f"Cannot write schema cache in {self.directory!r}: {err}")
+
+    def get_or_create(self, key: str, create: Callable[[], dict])->dict:
+        """ Return the cached schema or create, check and store it """
+        schema = self.get(key)
+        if schema is None:
+            schema = create()
+            check_schema(schema)
+            self.put(key, schema)
+        return schema 
+
+    def clear(self)->None:
+        """ Remove all cached schemas """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 
+        for name in names:
+            if name.endswith(".json"):
+                os.unlink(os.path.join(self.directory, name))
+
+
+def check_schema(schema: dict)->None:
+    """ Check a schema against its meta-schema and remember it has been checked """
+    import jsonschema 
+    jsonschema.validators.validator_for(schema).check_schema(schema)
+    mark_schema_checked(schema)
+
+
+_schema_cache: SchemaCache | None = None 
+
+def set_schema_cache(cache: SchemaCache | str | os.PathLike | None)->None:
+    """ Set the process wide schema cache (a SchemaCache or a directory), None to disable it """
+    global _schema_cache 
+    if cache is not None and not isinstance(cache, SchemaCache):
+        cache = SchemaCache(cache)
+    _schema_cache = cache 
+
+def get_schema_cache()->SchemaCache | None:
+    """ Return the process wide schema cache, None if disabled """
+    if _schema_cache is None and os.environ.get(ENV_VARIABLE):
+        set_schema_cache(os.environ[ENV_VARIABLE])
+    return _schema_cache 
+
+
+def export_schema(setup_class: Any, file_path: str | os.PathLike, indent: int | None = 2)->None:
+    """ Write the JSON schema of a setup class (DevMgr, device or assembly) to a file 
+
+    Args:
+        setup_class: class with a get_schema class method 
+        file_path (str): output file 
+        indent (int, optional): JSON indentation 
+    """
+    with open(file_path, 'w') as f:
+        json.dump(setup_class.get_schema(), f, indent=indent)
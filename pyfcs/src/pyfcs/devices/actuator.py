@@ -22,6 +22,7 @@ ActuatorMalIf = create_mal_if(
 
 # This device class is registered at the end of this file 
 class ActuatorSetup(BaseDeviceSetup):
+    __slots__ = ()
     devtype = "actuator"
     MalIf = ActuatorMalIf 
      
@@ -34,6 +34,7 @@ AdcMalIf = create_mal_if(
 
 # This device class is registered at the end of this file 
 class AdcSetup(BaseDeviceSetup):
+    __slots__ = ()
     devtype = "adc"
     MalIf = AdcMalIf 
      
@@ -34,6 +34,7 @@ DrotMalIf = create_mal_if(
 
 # This device class is registered at the end of this file 
 class DrotSetup(MotorSetup):
+    __slots__ = ()
     devtype = "drot"
     MalIf = DrotMalIf 
      
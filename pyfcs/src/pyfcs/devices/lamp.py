@@ -24,6 +24,7 @@ LampMalIf = create_mal_if(
 
 # This device class is registered at the end of this file 
 class LampSetup(BaseDeviceSetup):
+    __slots__ = ()
     devtype = "lamp"
     MalIf = LampMalIf 
      
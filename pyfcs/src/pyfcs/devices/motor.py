@@ -29,6 +29,7 @@ MotorMalIf = create_mal_if(
 
 # This device class is registered at the end of this file 
 class MotorSetup(BaseDeviceSetup):
+    __slots__ = ()
     devtype = "motor"
     MalIf = MotorMalIf 
      
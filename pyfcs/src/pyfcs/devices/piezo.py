@@ -28,6 +28,7 @@ PiezoMalIf = create_mal_if(
 
 # This device class is registered at the end of this file 
 class PiezoSetup(BaseDeviceSetup):
+    __slots__ = ()
     devtype = "piezo"
     MalIf = PiezoMalIf 
      
@@ -22,6 +22,7 @@ ShutterMalIf = create_mal_if(
 
 # This device class is registered at the end of this file 
 class ShutterSetup(BaseDeviceSetup):
+    __slots__ = ()
     devtype = "shutter"
     MalIf = ShutterMalIf 
      
@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+import threading
+import time
+import pytest
+
+from pyfcs.core.interface import pool as pool_module
+from pyfcs.core.interface.interface import Interface
+from pyfcs.core.interface.pool import ClientPool, ClientKey, ClientPoolFull
+
+
+class FakeCii:
+    closed = False
+    def close(self):
+        self.closed = True
+    def get_mal_client(self):
+        return self
+
+
+def key(uri="zpb.rr://localhost:12081/fcs", kind="App", asynchronous=False, timeout=10000):
+    return ClientKey(uri, kind, asynchronous, timeout)
+
+
+def test_client_is_shared_and_ref_counted():
+    pool = ClientPool(idle_timeout=None)
+    c1 = pool.acquire(key(), FakeCii)
+    c2 = pool.acquire(key(), FakeCii)
+    assert c1 is c2
+    assert pool.info()[0].refcount == 2
+
+    c3 = pool.acquire(key(asynchronous=True), FakeCii)
+    assert c3 is not c1
+
+    pool.release(key())
+    pool.release(key())
+    assert pool.info()[0].refcount == 0
+    assert not c1.closed
+    pool.close()
+    assert c1.closed and c3.closed
+    assert len(pool) == 0
+
+def test_idle_clients_are_reaped():
+    pool = ClientPool(idle_timeout=0.01)
+    c1 = pool.acquire(key(), FakeCii)
+    pool.release(key())
+    time.sleep(0.02)
+    assert pool.reap() == 1
+    assert c1.closed
+
+def test_max_size():
+    with ClientPool(max_size=1, idle_timeout=None) as pool:
+        c1 = pool.acquire(key(), FakeCii)
+        with pytest.raises(ClientPoolFull):
+            pool.acquire(key(kind="Std"), FakeCii)
+        pool.release(key())
+        c2 = pool.acquire(key(kind="Std"), FakeCii)
+        assert c1.closed
+    assert c2.closed
+
+def test_invalidate_uri():
+    pool = ClientPool()
+    c1 = pool.acquire(key(), FakeCii)
+    c2 = pool.acquire(key(uri="other"), FakeCii)
+    assert pool.invalidate("other") == 1
+    # still in use: closed at the last release 
+    assert not c2.closed and not c1.closed
+    assert not pool.holds(key(uri="other"), c2) and pool.holds(key(), c1)
+    c3 = pool.acquire(key(uri="other"), FakeCii)
+    assert c3 is not c2
+    pool.release(key(uri="other"), c2)
+    assert c2.closed and not c3.closed
+    pool.release(key(uri="other"), c2) # ignored
+    assert pool.info()[1].refcount == 1
+    pool.invalidate(None)
+    assert not c1.closed and not c3.closed
+    pool.close()
+    assert c1.closed and c3.closed
+
+
+@dataclass(frozen=True)
+class FakeInterface(Interface):
+    def _create_std_cii(self, timeout=None):
+        return FakeCii()
+
+def test_invalidate_leased_client(monkeypatch):
+    pool = ClientPool(idle_timeout=None)
+    monkeypatch.setattr(pool_module, "client_pool", pool)
+    interface = FakeInterface("zpb.rr://localhost:12081/fcs")
+    cii = interface.std_cii
+    assert interface.std_cii is cii and pool.info()[0].refcount == 1
+
+    pool.invalidate(interface.uri)
+    assert not cii.closed # leased by the interface 
+    new_cii = interface.std_cii # same uri, the interface notices the invalidation 
+    assert new_cii is not cii and cii.closed and not new_cii.closed
+    assert interface.std_cii is new_cii
+    interface.close()
+    assert pool.info()[0].refcount == 0 and not new_cii.closed
+
+def test_clients_are_created_outside_the_lock():
+    pool = ClientPool(idle_timeout=None)
+    started = threading.Event()
+    go = threading.Event()
+    def slow_constructor():
+        started.set()
+        go.wait(1)
+        return FakeCii()
+
+    results = []
+    builder = threading.Thread(target=lambda: results.append(pool.acquire(key(), slow_constructor)))
+    waiter = threading.Thread(target=lambda: results.append(pool.acquire(key(), FakeCii)))
+    builder.start()
+    started.wait(1)
+    waiter.start()
+    # other keys are not blocked by the client being created
+    other = pool.acquire(key(kind="Std"), FakeCii)
+    pool.release(key(kind="Std"), other)
+    assert len(results) == 0
+    go.set()
+    builder.join()
+    waiter.join()
+    assert results[0] is results[1] and pool.info()[-1].refcount == 2
+
+def test_invalidate_during_creation():
+    pool = ClientPool(idle_timeout=None)
+    def constructor():
+        pool.invalidate(None)
+        return FakeCii()
+    cii = pool.acquire(key(), constructor)
+    assert not pool.holds(key(), cii) and not cii.closed
+    pool.release(key(), cii)
+    assert cii.closed and len(pool) == 0
+
+def test_failed_creation():
+    pool = ClientPool(idle_timeout=None)
+    def constructor():
+        raise ConnectionError("no server")
+    with pytest.raises(ConnectionError):
+        pool.acquire(key(), constructor)
+    assert pool.acquire(key(), FakeCii) is pool.info()[0].cii
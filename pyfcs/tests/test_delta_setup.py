@@ -0,0 +1,95 @@
+import asyncio
+import io
+import json
+import pytest
+
+from pyfcs.core import middleware as mw
+from pyfcs.core.api import BaseDevMgrSetup
+from pyfcs.core.simulator import SimServer, SimInterface
+
+
+class EmptySetup(BaseDevMgrSetup, devtypes=[], generate_methods=False):
+    pass
+
+class FakeDevice:
+    def __init__(self, id, value):
+        self.id, self.value = id, value
+    def get_payload(self, force=False):
+        return list(self.iter_payload(force))
+    def iter_payload(self, force=False):
+        yield {'id':self.id, 'param':{'fake':{'value':self.value}}}
+    def get_buffer(self):
+        return [self.id]
+
+class SetupRecorder(SimServer):
+    def _app_Setup(self, buffer):
+        self.received = list(buffer)
+        return "OK"
+
+
+@pytest.fixture(autouse=True)
+def list_buffer(monkeypatch):
+    monkeypatch.setitem(vars(mw), "VectorfcfifSetupElem", list)
+
+
+def test_delta_setup():
+    server = SetupRecorder({})
+    setup = EmptySetup(SimInterface(server))
+    setup.add(FakeDevice("a", 1), FakeDevice("b", 1))
+    assert setup.setup(keep=True, delta=True) == "OK"
+    assert server.received == ["a", "b"]
+
+    setup.add(FakeDevice("b", 2), override=True)
+    setup.setup(keep=True, delta=True)
+    assert server.received == ["b"]
+
+    server.calls.clear()
+    assert setup.setup(keep=True, delta=True) == ""
+    assert 'Setup' not in server.calls
+
+    setup.reset_delta()
+    asyncio.run(setup.async_setup(delta=True))
+    assert server.received == ["a", "b"]
+    assert len(setup) == 0
+
+
+def test_dump_payload():
+    setup = EmptySetup(SimInterface(SetupRecorder({})))
+    setup.add(*(FakeDevice(f"d{i}", i) for i in range(3)))
+    fp = io.StringIO()
+    assert setup.dump_payload(fp) == 3
+    assert json.loads(fp.getvalue()) == setup.get_payload()
+    fp = io.StringIO()
+    setup.dump_payload(fp, lines=True)
+    assert [json.loads(l) for l in fp.getvalue().splitlines()] == setup.get_payload()
+
+
+class BufferDevice:
+    """ device with a parameter buffer, its payload is never dumped for delta setups """
+    def __init__(self, id, **params):
+        self.id = id 
+        self._params_buffer = dict(params)
+        self._device_cash = {}
+    def is_setup_valid(self):
+        return 'action' in self._params_buffer 
+    def get_payload(self, force=False):
+        raise AssertionError("payload dumped")
+    def get_buffer(self):
+        return [self.id]
+
+
+def test_delta_from_params_buffer():
+    server = SetupRecorder({})
+    setup = EmptySetup(SimInterface(server))
+    a, b, c = BufferDevice("a", action="ON"), BufferDevice("b", action="ON"), BufferDevice("c")
+    b._device_cash['lamp1'] = BufferDevice("lamp1", intensity=1.0)
+    setup.add(a, b, c)
+    setup.setup(keep=True, delta=True)
+    assert server.received == ["a", "b"] # c has no action 
+    a._params_buffer['intensity'] = 2.0
+    b._device_cash['lamp1']._params_buffer['intensity'] = 2.0 # assembly member 
+    setup.setup(keep=True, delta=True)
+    assert server.received == ["a", "b"]
+    server.received = None 
+    assert setup.setup(keep=True, delta=True) == ""
+    assert server.received is None 
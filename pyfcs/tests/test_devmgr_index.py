@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+import pytest
+
+from pyfcs.core.api import BaseDevMgrSetup, DummyInterface
+
+
+class EmptySetup(BaseDevMgrSetup, devtypes=[], generate_methods=False):
+    pass
+
+def _dev(id, n=0):
+    return SimpleNamespace(id=id, n=n)
+
+
+def test_order_and_lookup():
+    setup = EmptySetup(DummyInterface())
+    setup.add(*(_dev(f"d{i}") for i in range(100)))
+    assert [d.id for d in setup] == [f"d{i}" for i in range(100)]
+    assert setup.get("d42").id == "d42"
+    assert "d99" in setup and len(setup) == 100
+
+def test_override_keeps_position():
+    setup = EmptySetup(DummyInterface())
+    setup.add(_dev("a"), _dev("b"), _dev("c"))
+    setup.add(_dev("b", 1), override=True)
+    assert [(d.id, d.n) for d in setup] == [("a", 0), ("b", 1), ("c", 0)]
+
+def test_duplicate_policies():
+    setup = EmptySetup(DummyInterface())
+    setup.add(_dev("a"), _dev("a", 1))
+    assert len(setup) == 2
+    setup.add(_dev("a", 2), override=True)
+    assert [(d.id, d.n) for d in setup] == [("a", 2)]
+
+    setup = EmptySetup(DummyInterface(), duplicate="error")
+    setup.add(_dev("a"))
+    with pytest.raises(ValueError):
+        setup.add(_dev("a"))
+
+def test_remove():
+    setup = EmptySetup(DummyInterface())
+    setup.add(_dev("a"), _dev("b"), _dev("a"))
+    assert setup.remove("a") == 2
+    assert [d.id for d in setup] == ["b"]
+    setup.clear()
+    assert len(setup) == 0
+
+def test_positions_and_read_only_buffer():
+    setup = EmptySetup(DummyInterface())
+    setup.add(_dev("a"), _dev("b"), _dev("c"), _dev("d"))
+    setup.remove("b")
+    assert [setup[i].id for i in range(3)] == ["a", "c", "d"]
+    assert setup[-1].id == "d" and [d.id for d in setup[1:]] == ["c", "d"]
+    with pytest.raises(IndexError):
+        setup[3]
+    setup.add(_dev("e"))
+    assert setup[3].id == "e" and setup.get("e").id == "e"
+    setup.add(_dev("c", 1), override=True)
+    assert setup[1].n == 1
+
+    buffer = setup._buffer
+    assert len(buffer) == 4 and buffer[0].id == "a" and buffer == list(setup)
+    with pytest.raises(TypeError):
+        buffer.append(_dev("f"))
+    with pytest.raises(TypeError):
+        buffer.clear()
+    assert len(setup) == 4
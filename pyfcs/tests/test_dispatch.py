@@ -0,0 +1,64 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from pyfcs.core.device.class_inspector import SetupClassDefinition
+
+
+def legacy_find(lookup, ordered_keys, get):
+    # reference: first context keys (in priority order) with matching values 
+    for context_keys in ordered_keys:
+        values = tuple(get(k) for k in context_keys)
+        if values in lookup[context_keys]:
+            return context_keys, lookup[context_keys][values]
+    return tuple(), None
+
+
+LOOKUP = {
+    ('action',): {('MOVE_ABS',):'move_abs', ('MOVE_REL',):'move_rel', ('STOP',):'stop'},
+    ('action', 'unit'): {('MOVE_ABS','UU'):'move_abs_uu', ('MOVE_ABS','ENC'):'move_abs_enc', ('MOVE_REL','UU'):'move_rel_uu'},
+    ('mode',): {('FAST',):'fast'},
+    ('action', 'mode'): {('STOP','FAST'):'stop_fast'},
+    ('action', 'mode', 'unit'): {('MOVE_ABS','FAST','UU'):'move_abs_fast_uu'},
+}
+
+PAYLOADS = [
+    dict(zip(('action','unit','mode'), values))
+    for values in itertools.product(['MOVE_ABS','MOVE_REL','STOP','INIT',None], ['UU','ENC',None], ['FAST','SLOW',None])
+]
+
+@pytest.fixture
+def definition():
+    return SetupClassDefinition(payload_parser_loockup=LOOKUP, payload_maker_loockup=LOOKUP)
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_parser_dispatch(definition, payload):
+    payload = {k:v for k,v in payload.items() if v is not None}
+    expected = legacy_find(LOOKUP, definition.parser_context_keys, payload.get)
+    assert definition.find_payload_parser_method(payload) == expected
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_maker_dispatch(definition, payload):
+    setup = SimpleNamespace(**{k:v for k,v in payload.items() if v is not None})
+    expected = legacy_find(LOOKUP, definition.maker_context_keys, lambda k: getattr(setup, k, None))
+    assert definition.find_payload_maker_method(setup) == expected[1]
+
+def test_merge(definition):
+    other = SetupClassDefinition()
+    other.merge(definition)
+    other.merge(SetupClassDefinition(payload_parser_loockup={('action',): {('INIT',):'init'}}))
+    assert other.find_payload_parser_method({'action':'INIT'}) == (('action',), 'init')
+    assert other.find_payload_parser_method({'action':'MOVE_ABS', 'unit':'UU'}) == (('action','unit'), 'move_abs_uu')
+
+def test_parser_dispatch_memo(definition):
+    dispatch = definition._parser_dispatch
+    assert dispatch.keys == ('action', 'mode', 'unit')
+    for payload in PAYLOADS * 2:
+        payload = {k:v for k,v in payload.items() if v is not None}
+        expected = legacy_find(LOOKUP, definition.parser_context_keys, payload.get)
+        assert definition.find_payload_parser_method(payload) == expected
+    assert len(dispatch.memo) == len(PAYLOADS)
+    # unhashable values are matched without memo
+    assert definition.find_payload_parser_method({'action':'STOP', 'unit':['UU']}) == (('action',), 'stop')
+    assert len(dispatch.memo) == len(PAYLOADS)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from pyfcs.core.api import BaseDeviceSetup, ParamProperty, DummyInterface
+from pyfcs.core.device.parser import FloatParser, StringParser
+
+
+class CountingSetup(BaseDeviceSetup):
+    devtype = "counting"
+    action = ParamProperty(StringParser())
+    intensity = ParamProperty(FloatParser())
+    builds = 0
+
+    def get_malif(self):
+        # no MAL needed, return a new element each time
+        self.builds += 1
+        return SimpleNamespace(element=object())
+
+
+def test_element_is_cached():
+    s = CountingSetup(DummyInterface(), "c1")
+    s.action = "ON"
+    e1 = s.get_element_buffer()
+    assert s.get_element_buffer() is e1
+    assert s.builds == 1
+
+def test_element_is_rebuilt_when_dirty():
+    s = CountingSetup(DummyInterface(), "c1")
+    s.action = "ON"
+    e1 = s.get_element_buffer()
+    s.intensity = 10.0
+    e2 = s.get_element_buffer()
+    assert e2 is not e1
+    del s.intensity
+    assert s.get_element_buffer() is not e2
+    e3 = s.get_element_buffer()
+    s.id = "c2"
+    assert s.get_element_buffer() is not e3
+    s.clear()
+    assert s._element_cache is None
+
+def test_element_is_rebuilt_when_buffer_changes():
+    s = CountingSetup(DummyInterface(), "c1")
+    s.action = "ON"
+    e1 = s.get_element_buffer()
+    s._params_buffer['intensity'] = 7.0
+    e2 = s.get_element_buffer()
+    assert e2 is not e1
+    s._params_buffer.pop('intensity')
+    assert s.get_element_buffer() is not e2
+    e3 = s.get_element_buffer()
+    s._params_buffer.update(action="OFF")
+    assert s.get_element_buffer() is not e3
+    assert s.builds == 4
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+# Import time budget of pyfcs.core.api in seconds. Can be adjusted on slow machines
+IMPORT_BUDGET = float(os.environ.get("PYFCS_IMPORT_BUDGET", "1.0"))
+
+SCRIPT = """
+import sys, time
+tic = time.perf_counter()
+import pyfcs.core.api
+print(time.perf_counter()-tic)
+from pyfcs.core import middleware
+print(",".join(m for m in middleware.lazy_modules if m in sys.modules))
+"""
+
+def _run():
+    output = subprocess.run([sys.executable, "-c", SCRIPT], check=True,
+                            capture_output=True, text=True).stdout.splitlines()
+    return float(output[0]), [m for m in output[1].split(",") if m]
+
+
+def test_middleware_is_not_imported():
+    _, imported = _run()
+    assert imported == []
+
+def test_import_time_budget():
+    # take the best of 3 to reduce noise
+    best = min(_run()[0] for _ in range(3))
+    assert best < IMPORT_BUDGET, f"import pyfcs.core.api took {best:.3f}s, budget is {IMPORT_BUDGET}s"
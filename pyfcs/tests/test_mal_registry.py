@@ -0,0 +1,33 @@
+from pyfcs.core.interface.mal_registry import MalRegistry
+
+
+class FakeFactory:
+    def __init__(self):
+        self.registered = []
+    def registerMal(self, kind, mal):
+        self.registered.append( (kind, mal) )
+
+
+def test_mal_is_loaded_once():
+    loaded = []
+    factory = FakeFactory()
+    def loader(kind, properties):
+        loaded.append( (kind, properties) )
+        return object()
+
+    registry = MalRegistry(loader, lambda: factory)
+
+    f1 = registry.get_factory('zpb', {'zpb.domain':'100'})
+    f2 = registry.get_factory('zpb', {'zpb.domain':'100'})
+    assert f1 is f2 is factory
+    assert len(loaded) == 1
+    assert len(factory.registered) == 1
+
+    registry.get_factory('zpb', {'zpb.domain':'200'})
+    assert len(loaded) == 2
+    assert len(registry.info()) == 2
+
+    registry.reset()
+    assert len(registry) == 0
+    registry.get_factory('zpb', {'zpb.domain':'100'})
+    assert len(loaded) == 3
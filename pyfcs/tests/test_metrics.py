@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+
+from pyfcs.core.tools.metrics import Histogram, MetricsRegistry, get_metrics_registry
+from pyfcs.core.simulator import SimServer, SimInterface, SimulatedError
+
+
+def test_histogram_percentile():
+    h = Histogram((0.1, 0.2, 0.3))
+    for v in (0.05, 0.15, 0.15, 0.25):
+        h.observe(v)
+    assert h.count == 4
+    assert 0.1 <= h.percentile(0.5) <= 0.2
+    assert h.percentile(1.0) == 0.25
+
+def test_prometheus_dump():
+    registry = MetricsRegistry()
+    registry.observe(("sim://fcs", "App", "Setup"), 0.01, error=True)
+    text = registry.to_prometheus()
+    assert 'pyfcs_command_errors_total{uri="sim://fcs",client="App",method="Setup"} 1' in text
+    assert 'pyfcs_command_duration_seconds_count{uri="sim://fcs",client="App",method="Setup"} 1' in text
+
+def test_command_metrics():
+    metrics = get_metrics_registry()
+    metrics.reset()
+    server = SimServer({'lamp1':'lamp'}, failure_rates={'Stop':1.0})
+    interface = SimInterface(server)
+    interface.command('Std', 'GetState').exec()
+    with pytest.raises(SimulatedError):
+        interface.command('Std', 'Stop').exec()
+
+    async def run():
+        await asyncio.gather(*(interface.command('Std', 'GetState').async_exec() for _ in range(3)))
+    asyncio.run(run())
+
+    stats = metrics.snapshot()
+    assert stats[(server.uri, 'Std', 'GetState')].calls == 4
+    assert stats[(server.uri, 'Std', 'Stop')].errors == 1
+    metrics.reset()
+    assert metrics.snapshot() == {}
@@ -0,0 +1,70 @@
+import pytest
+
+from pyfcs.core.api import BaseDeviceSetup, ParamProperty
+from pyfcs.core.device.parser import FloatParser, StringParser
+from pyfcs.core.device.params_buffer import ParamLayout, ParamsBuffer
+
+
+class Compact(BaseDeviceSetup):
+    __slots__ = ()
+    devtype = "compact"
+    action = ParamProperty(StringParser(), required=True)
+    pos = ParamProperty(FloatParser())
+    label = ParamProperty(StringParser(), name="LABEL")
+
+class CompactChild(Compact):
+    __slots__ = ()
+    speed = ParamProperty(FloatParser())
+
+
+def test_buffer_dict_semantic():
+    buffer = ParamsBuffer(ParamLayout(["a", "b", "c"]))
+    reference = {}
+    for target in (buffer, reference):
+        target["c"] = 3
+        target["extra0"] = 0
+        target["a"] = 1
+        target["extra"] = "x"
+        del target["c"]
+        del target["extra0"]
+        target["b"] = None
+        target["a"] = 2
+    assert dict(buffer) == reference
+    assert list(buffer) == list(reference) == ["a", "extra", "b"]
+    assert len(buffer) == 3
+    assert "c" not in buffer and "b" in buffer
+    assert buffer.get("c", 0) == 0
+    assert buffer.pop("a") == 2 and buffer.pop("a", None) is None
+    with pytest.raises(KeyError):
+        buffer["c"]
+    with pytest.raises(KeyError):
+        del buffer["c"]
+    copy = buffer.copy()
+    assert copy == buffer and copy == dict(buffer)
+    copy.clear()
+    assert len(copy) == 0 and len(buffer) == 2
+
+
+def test_layout_inheritance():
+    assert Compact.__param_layout__.names == ("action", "pos", "LABEL")
+    assert CompactChild.__param_layout__.names == ("action", "pos", "LABEL", "speed")
+
+
+def test_setup_storage():
+    setup = CompactChild.from_dummy("dev")
+    assert not hasattr(setup, "__dict__")
+    setup.set({'action':'MOVE', 'speed':2, 'label':'x'})
+    assert setup.is_param_set('speed') and not setup.is_param_set('pos')
+    assert isinstance(setup._params_buffer, ParamsBuffer)
+    assert dict(setup._params_buffer) == {'action':'MOVE', 'LABEL':'x', 'speed':2.0}
+    setup.speed = None
+    assert not setup.is_param_set('speed')
+
+def test_insertion_order():
+    setup = Compact.from_dummy("dev")
+    setup.pos = 3.0
+    setup.action = "MOVE"
+    setup.pos = 4.0
+    assert list(setup._params_buffer) == ['pos', 'action']
+    assert setup.get_parameter_payload() == {'pos':4.0, 'action':'MOVE'}
+    assert list(setup.get_parameter_payload()) == ['pos', 'action']
@@ -0,0 +1,102 @@
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from pyfcs.core.api import BaseAssemblySetup, BaseDeviceSetup, BaseDevMgrSetup, DeviceProperty, ParamProperty, DummyInterface, payload_parser
+from pyfcs.core.device.parser import FloatParser, StringParser
+
+
+class FakeLampSetup(BaseDeviceSetup):
+    devtype = "fakelamp"
+    action = ParamProperty(StringParser(), required=True)
+    intensity = ParamProperty(FloatParser(minimum=0, maximum=100))
+
+    @payload_parser(action="ON")
+    def switch_on(self, intensity):
+        self.action = "ON"
+        self.intensity = intensity
+
+class RenamedSetup(BaseDeviceSetup):
+    devtype = "renamed"
+    action = ParamProperty(StringParser(), required=True)
+    label = ParamProperty(FloatParser(), name="LABEL")
+
+    @payload_parser(action="SET")
+    def set_label(self, LABEL):
+        self.action = "SET"
+        self.label = LABEL
+
+class FakeRegister:
+    def setup_class(self, devtype):
+        return {"renamed":RenamedSetup, "source":SourceSetup}.get(devtype, FakeLampSetup)
+
+class SourceSetup(BaseAssemblySetup, register=FakeRegister()):
+    devtype = "source"
+    action = ParamProperty(StringParser(), required=True)
+    intensity = ParamProperty(FloatParser(minimum=0))
+    lamp1 = DeviceProperty('fakelamp')
+    lamp2 = DeviceProperty('fakelamp')
+
+    @payload_parser(action="ON")
+    def switch_on(self, intensity):
+        self.action = "ON"
+        self.intensity = intensity
+        self.lamp1.switch_on(intensity)
+        self.lamp2.switch_on(intensity/2)
+
+    def apply(self, setup):
+        setup.add(self.lamp1, self.lamp2)
+
+class FakeSetup(BaseDevMgrSetup, devtypes=["fakelamp", "renamed", "source"], generate_methods=False, register=FakeRegister()):
+    pass
+
+
+def payload(i, intensity=10):
+    return [{'id':f'lamp{i}', 'param':{'fakelamp':{'action':'ON', 'intensity':intensity}}}]
+
+PAYLOADS = [payload(0), payload(1, 500), payload(2), payload(3, -1), payload(4)]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_parse_many(workers):
+    receiver = FakeSetup(DummyInterface()).payload_receiver
+    results = receiver.parse_many(PAYLOADS, workers=workers, return_exceptions=True)
+    assert [isinstance(r, ValidationError) for r in results] == [False, True, False, True, False]
+    assert results[0] is PAYLOADS[0] or results[0] == PAYLOADS[0]
+    assert list(results[1].path) == [0, 'param', 'fakelamp', 'intensity']
+    with pytest.raises(ValidationError):
+        receiver.parse_many(PAYLOADS, workers=workers)
+
+@pytest.mark.parametrize("workers", [None, 2])
+@pytest.mark.parametrize("trusted", [False, True])
+def test_set_many_payloads(workers, trusted):
+    setup = FakeSetup(DummyInterface())
+    results = setup.set_many_payloads(PAYLOADS, workers=workers, trusted=trusted, return_exceptions=True)
+    assert results[0] == ['lamp0'] and results[4] == ['lamp4']
+    assert isinstance(results[1], (ValueError, ValidationError))
+    assert [ds.id for ds in setup] == ['lamp0', 'lamp2', 'lamp4']
+    assert setup.get_payload()[1] == {'id':'lamp2', 'param':{'fakelamp':{'action':'ON', 'intensity':10.0}}}
+
+    setup.clear()
+    with pytest.raises((ValueError, ValidationError)):
+        setup.set_many_payloads(PAYLOADS, workers=workers, trusted=trusted)
+    assert len(setup) == 0
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_set_many_renamed(workers):
+    setup = FakeSetup(DummyInterface())
+    payloads = [[{'id':f'dev{i}', 'param':{'renamed':{'action':'SET', 'LABEL':i}}}] for i in range(4)]
+    results = setup.set_many_payloads(payloads, workers=workers, return_exceptions=True)
+    assert results == [['dev0'], ['dev1'], ['dev2'], ['dev3']]
+    assert type(setup[3]) is RenamedSetup and setup[3].label == 3.0
+    assert dict(setup[3]._params_buffer) == {'action':'SET', 'LABEL':3.0}
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_set_many_assembly(workers):
+    setup = FakeSetup(DummyInterface())
+    payloads = [[{'id':f'source{i}', 'param':{'source':{'action':'ON', 'intensity':10*i}}}] for i in range(3)]
+    assert setup.set_many_payloads(payloads, workers=workers) == [['source0'], ['source1'], ['source2']]
+    source = setup[2]
+    assert type(source) is SourceSetup and source.action == "ON"
+    # member device setups filled by the payload parser 
+    assert source.lamp1.intensity == 20.0 and source.lamp2.intensity == 10.0
+    assert source.lamp1.action == "ON" and source.lamp1.interface is setup.interface
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+
+from pyfcs.core.interface.retry import RetryPolicy
+from pyfcs.core.simulator import SimServer, SimInterface, SimulatedError
+from pyfcs.core.tools.metrics import get_metrics_registry
+
+
+def test_pipeline_order_and_limit():
+    server = SimServer({}, latency=0.002, jitter=0.005, seed=2)
+    interface = SimInterface(server)
+    ids = [f"d{i}" for i in range(20)]
+
+    async def run():
+        pipe = interface.pipeline(max_in_flight=4)
+        async with pipe:
+            for id in ids:
+                await pipe.submit('Daq', 'StartDaq', id)
+                assert pipe.in_flight <= 4
+        return pipe.results
+    replies = asyncio.run(run())
+    assert [r.getId() for r in replies] == ids
+
+def test_pipeline_timeout():
+    server = SimServer({}, latencies={'GetState':0.05})
+    interface = SimInterface(server)
+
+    async def run():
+        return await interface.pipeline(timeout=0.01).map('Std', 'GetState', [(), ()], return_exceptions=True)
+    replies = asyncio.run(run())
+    assert all(isinstance(r, asyncio.TimeoutError) for r in replies)
+
+def test_pipeline_uses_commands():
+    metrics = get_metrics_registry()
+    metrics.reset()
+    server = SimServer({}, failure_rates={'GetState':1.0})
+    policy = RetryPolicy(max_attempts=3, backoff=0.001, retry_on=(SimulatedError,))
+    interface = SimInterface(server, retry=policy)
+    errors = []
+
+    async def run():
+        pipe = interface.pipeline()
+        failed = await pipe.map('Std', 'GetState', [(), ()], return_exceptions=True)
+        # the client is taken from the interface at each request (e.g. after a reconnection)
+        server._clients.clear()
+        server.failure_rates.clear()
+        await pipe.submit('Std', 'GetState', callback=errors.append)
+        return failed, await pipe.gather()
+    failed, replies = asyncio.run(run())
+    assert all(isinstance(r, SimulatedError) for r in failed)
+    assert server.calls['GetState'] == 7 # retry policy of the interface
+    assert replies == [server._std_GetState()] and errors == [None]
+    assert list(server._clients) == [('Std', True, interface.timeout/1000.)]
+    stats = metrics.snapshot()[(server.uri, 'Std', 'GetState')]
+    assert stats.calls == 3 and stats.errors == 2
+    metrics.reset()
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from pyfcs.core.interface import pool as pool_module
+from pyfcs.core.interface.pool import ClientPool, ClientKey
+from pyfcs.core.interface.resolver import ConsulResolver
+
+
+class FakeConsul:
+    """ consul client answering from a service -> uri dictionary """
+    def __init__(self, uris, delay=0.0):
+        self.uris = uris
+        self.delay = delay
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def get_uri(self, service):
+        with self._lock:
+            self.queries += 1
+        time.sleep(self.delay)
+        return self.uris[service]
+
+class FakeFactory:
+    def __init__(self, uris, delay=0.0):
+        self.uris = uris
+        self.delay = delay
+        self.clients = []
+
+    def __call__(self, host, port):
+        time.sleep(self.delay) # widen the race window 
+        client = FakeConsul(self.uris, self.delay)
+        self.clients.append(client)
+        return client
+
+class FakeCii:
+    closed = False
+    def close(self):
+        self.closed = True
+
+
+def test_ttl_expiry():
+    factory = FakeFactory({'fcs1-req':'zpb.rr://host1:12081/fcs'})
+    resolver = ConsulResolver(ttl=0.05, client_factory=factory)
+    assert resolver.resolve('fcs1-req') == 'zpb.rr://host1:12081/fcs'
+    assert resolver.resolve('fcs1-req') == 'zpb.rr://host1:12081/fcs'
+    assert factory.clients[0].queries == 1
+    time.sleep(0.06)
+    resolver.resolve('fcs1-req')
+    assert factory.clients[0].queries == 2
+    resolver.invalidate('fcs1-req')
+    resolver.resolve('fcs1-req')
+    assert factory.clients[0].queries == 3
+
+def test_change_invalidates_pool(monkeypatch):
+    pool = ClientPool(idle_timeout=None)
+    monkeypatch.setattr(pool_module, "client_pool", pool)
+    uris = {'fcs1-req':'zpb.rr://host1:12081/fcs'}
+    resolver = ConsulResolver(ttl=60, client_factory=FakeFactory(uris))
+    old_uri = resolver.resolve('fcs1-req')
+    key = ClientKey(old_uri, 'Std', False, 10000)
+    cii = pool.acquire(key, FakeCii)
+    pool.release(key, cii)
+
+    uris['fcs1-req'] = 'zpb.rr://host2:12081/fcs'
+    resolver.refresh()
+    assert resolver.resolve('fcs1-req') == 'zpb.rr://host2:12081/fcs'
+    assert key not in pool and cii.closed
+
+def test_resolve_all_shares_consul_client():
+    uris = {f'fcs{i}-req':f'zpb.rr://host{i}:12081/fcs' for i in range(8)}
+    factory = FakeFactory(uris, delay=0.01)
+    resolver = ConsulResolver(client_factory=factory)
+    assert resolver.resolve_all(uris) == uris
+    # one consul client per (host, port) even with concurrent resolutions 
+    assert len(factory.clients) == 1 and factory.clients[0].queries == 8
+    resolver.resolve_all(uris, consul_port=8501)
+    assert len(factory.clients) == 2
@@ -0,0 +1,67 @@
+import asyncio
+import time
+import pytest
+
+from pyfcs.core.interface.command import CommandWithArgs
+from pyfcs.core.interface.retry import RetryPolicy, DeadlineExceeded, attempt_timeout
+from pyfcs.core.simulator import SimServer, SimInterface, SimulatedError
+
+
+def test_retry_read_only_methods():
+    server = SimServer({}, failure_rates={'GetState':1.0, 'Stop':1.0})
+    policy = RetryPolicy(max_attempts=3, backoff=0.001, retry_on=(SimulatedError,))
+    interface = SimInterface(server, retry=policy)
+    with pytest.raises(SimulatedError):
+        interface.command('Std', 'GetState').exec()
+    assert server.calls['GetState'] == 3
+    # Stop is not read-only
+    with pytest.raises(SimulatedError):
+        interface.command('Std', 'Stop').exec()
+    assert server.calls['Stop'] == 1
+
+def test_retry_idempotent_and_command_policy():
+    server = SimServer({}, failure_rates={'Stop':1.0})
+    policy = RetryPolicy(max_attempts=2, backoff=0.001, retry_on=(SimulatedError,), idempotent={('Std', 'Stop')})
+    command = SimInterface(server).command('Std', 'Stop').with_retry(policy)
+    with pytest.raises(SimulatedError):
+        command.exec()
+    assert server.calls['Stop'] == 2
+
+def test_async_deadline():
+    server = SimServer({}, latency=0.05)
+    interface = SimInterface(server, retry=RetryPolicy(deadline=0.02))
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(interface.command('Std', 'GetState').async_exec())
+
+def test_sync_deadline():
+    server = SimServer({}, latency=0.5)
+    interface = SimInterface(server, retry=RetryPolicy(deadline=0.1))
+    tic = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        interface.command('Std', 'GetState').exec()
+    assert time.perf_counter()-tic < 0.3
+    # without deadline the usual timeout applies
+    assert SimInterface(server, retry=RetryPolicy()).command('Std', 'GetState').exec()
+
+def test_attempt_timeout():
+    assert attempt_timeout(None, 1000) is None
+    assert attempt_timeout(2.0, 1000) is None
+    assert attempt_timeout(0.8567, 1000) == 512
+    assert attempt_timeout(0.0421, 1000) == 32
+    assert attempt_timeout(0.0, 1000) == 1
+    # few distinct client timeouts 
+    assert len({attempt_timeout(ms/1000., 10000) for ms in range(10000)}) == 14
+
+def test_backoff_delays():
+    policy = RetryPolicy(max_attempts=4, backoff=0.1, multiplier=2, max_backoff=0.3, jitter=0)
+    assert list(policy.delays()) == [0.1, 0.2, 0.3]
+
+def test_command_with_args_positional():
+    server = SimServer({'lamp1':'lamp'})
+    interface = SimInterface(server)
+    command = CommandWithArgs(interface, 'App', 'DevStatus', None, (['lamp1'],))
+    assert command.args == (['lamp1'],) and command.retry is None
+    policy = RetryPolicy(max_attempts=2)
+    partial = interface.command('App', 'DevStatus').with_retry(policy).partial(['lamp1'])
+    assert partial.retry is policy and partial.args == (['lamp1'],)
+    assert partial.exec() == command.exec()
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from pyfcs.core.api import BaseDeviceSetup, BaseDevMgrSetup, ParamProperty, payload_parser, set_schema_cache, export_schema
+from pyfcs.core.device.parser import BaseParser, FloatParser, StringParser
+from pyfcs.core.tools.payload_receiver import get_validator, is_schema_checked
+
+
+def make_classes(maximum=100):
+    class FakeLampSetup(BaseDeviceSetup):
+        devtype = "fakelamp"
+        action = ParamProperty(StringParser(), required=True)
+        intensity = ParamProperty(FloatParser(minimum=0, maximum=maximum))
+
+        @payload_parser(action="ON")
+        def switch_on(self, intensity):
+            self.action = "ON"
+            self.intensity = intensity
+
+    class FakeRegister:
+        def setup_class(self, devtype):
+            return FakeLampSetup
+
+    class FakeSetup(BaseDevMgrSetup, devtypes=["fakelamp"], generate_methods=False, register=FakeRegister()):
+        pass
+    return FakeLampSetup, FakeSetup
+
+@pytest.fixture
+def cache(tmp_path):
+    set_schema_cache(tmp_path)
+    yield tmp_path
+    set_schema_cache(None)
+
+
+def test_schema_cache(cache):
+    Lamp, Setup = make_classes()
+    schema = Setup.get_schema()
+    assert [p.name for p in cache.iterdir()] == [Setup.get_schema_fingerprint()+".json"]
+
+    Lamp2, Setup2 = make_classes()
+    assert Setup2.get_schema_fingerprint() == Setup.get_schema_fingerprint()
+    cached = Setup2.get_schema()
+    assert cached == schema and cached is not schema
+    assert Lamp2.__schema__ == Lamp.get_schema()
+    assert is_schema_checked(cached)
+    get_validator(cached)
+
+    _, Setup3 = make_classes(maximum=50)
+    assert Setup3.get_schema_fingerprint() != Setup.get_schema_fingerprint()
+    assert Setup3.get_schema()['definitions']['fakelamp']['properties']['intensity']['maximum'] == 50
+    assert len(list(cache.iterdir())) == 2
+
+def test_corrupted_cache(cache):
+    _, Setup = make_classes()
+    (cache/(Setup.get_schema_fingerprint()+".json")).write_text("{not json")
+    assert Setup.get_schema()['type'] == 'array'
+
+def test_export_schema(tmp_path):
+    _, Setup = make_classes()
+    export_schema(Setup, tmp_path/"schema.json")
+    assert json.loads((tmp_path/"schema.json").read_text()) == Setup.get_schema()
+
+class StepParser(BaseParser):
+    """ custom parser without a value repr """
+    def __init__(self, step):
+        self.step = step
+
+    def parse_in(self, value):
+        return round(value/self.step)*self.step
+
+    def get_schema(self):
+        return {"type":"number", "multipleOf":self.step}
+
+def make_step_setup(step):
+    class StepSetup(BaseDeviceSetup):
+        devtype = "step"
+        position = ParamProperty(StepParser(step))
+
+    class StepRegister:
+        def setup_class(self, devtype):
+            return StepSetup
+
+    class Setup(BaseDevMgrSetup, devtypes=["step"], generate_methods=False, register=StepRegister()):
+        pass
+    return Setup
+
+def test_custom_parser_fingerprint():
+    # the key does not depend on parser instances (their addresses) but on their constraints 
+    assert make_step_setup(0.5).get_schema_fingerprint() == make_step_setup(0.5).get_schema_fingerprint()
+    assert make_step_setup(0.25).get_schema_fingerprint() != make_step_setup(0.5).get_schema_fingerprint()
@@ -0,0 +1,60 @@
+import time
+import pytest
+
+from pyfcs.core import middleware as mw
+from pyfcs.core.interface.setup_command import SetupCommand, SetupCommandGroup, SetupGroupError
+from pyfcs.core.simulator import SimServer, SimInterface, SimulatedError
+from pyfcs.core.tools import BufferHolder
+
+
+class SetupRecorder(SimServer):
+    # Record setup buffers instead of decoding them
+    def _app_Setup(self, buffer):
+        if "bad" in buffer:
+            raise SimulatedError("bad setup")
+        self.received = list(buffer)
+        return "OK"
+
+
+@pytest.fixture(autouse=True)
+def list_buffer(monkeypatch):
+    monkeypatch.setitem(vars(mw), "VectorfcfifSetupElem", list)
+
+def _setup(interface, *elements):
+    return SetupCommand(interface, BufferHolder(list(elements)))
+
+
+def test_parallel_exec():
+    servers = [SetupRecorder({}, latency=0.05, name=f"fcs{i}") for i in range(5)]
+    interfaces = [SimInterface(s) for s in servers]
+    group = SetupCommandGroup(
+            [_setup(i, "a") for i in interfaces] + [_setup(interfaces[0], "b")]
+        )
+    tic = time.perf_counter()
+    replies = group.exec()
+    assert time.perf_counter()-tic < 0.2
+    assert replies == {i:"OK" for i in interfaces}
+    assert servers[0].received == ["a", "b"]
+
+def test_collect_errors():
+    interfaces = [SimInterface(SetupRecorder({}, name=f"fcs{i}")) for i in range(3)]
+    group = SetupCommandGroup([_setup(interfaces[0], "bad"), _setup(interfaces[1], "a"), _setup(interfaces[2], "a")])
+    with pytest.raises(SetupGroupError) as info:
+        group.exec(group_error=True)
+    assert set(info.value.errors) == {interfaces[0]}
+    assert set(info.value.replies) == set(interfaces[1:])
+    # default: the exception of the failing setup, as a sequential execution 
+    with pytest.raises(SimulatedError):
+        group.exec()
+    with pytest.raises(SimulatedError):
+        group.exec(fail_fast=True)
+
+def test_fail_fast():
+    slow = SetupRecorder({}, latency=0.5, name="slow")
+    bad = SimInterface(SetupRecorder({}, name="bad"))
+    group = SetupCommandGroup([_setup(SimInterface(slow), "a"), _setup(bad, "bad")])
+    tic = time.perf_counter()
+    with pytest.raises(SimulatedError):
+        group.exec(fail_fast=True)
+    assert time.perf_counter()-tic < 0.3
+    assert not hasattr(slow, "received")
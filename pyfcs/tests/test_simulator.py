@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+
+from pyfcs.core.simulator import SimServer, SimInterface, SimulatedError, SimulatedTimeout
+from pyfcs.core.tools import StatusHandler
+
+
+def test_std_state_machine():
+    server = SimServer({'lamp1':'lamp'}, operational=False)
+    interface = SimInterface(server)
+    assert interface.command('Std', 'GetState').exec() == "NotOperational;NotReady"
+    interface.command('Std', 'Init').exec()
+    interface.command('Std', 'Enable').exec()
+    assert interface.command('Std', 'GetState').exec() == "Operational;Idle"
+    with pytest.raises(SimulatedError):
+        interface.command('Std', 'Enable').exec()
+
+def test_device_status():
+    server = SimServer({'lamp1':'lamp', 'motor1':'motor'})
+    interface = SimInterface(server)
+    interface.command('App', 'HwReset').exec(['lamp1'])
+    status = StatusHandler( interface.command('App', 'DevStatus').exec([]).split("\n") )
+    assert status.get('lamp1.lcs.state') == 'NotOperational'
+    assert status.get('motor1.lcs.substate') == 'Standstill'
+    assert eval(interface.command('App', 'DevInfo').exec()) == {'lamp1':'lamp', 'motor1':'motor'}
+
+def test_failure_and_timeout_injection():
+    server = SimServer({'lamp1':'lamp'}, failure_rates={'GetState':1.0}, latencies={'GetStatus':0.05})
+    with pytest.raises(SimulatedError):
+        SimInterface(server).command('Std', 'GetState').exec()
+    with pytest.raises(SimulatedTimeout):
+        SimInterface(server, timeout=10).command('Std', 'GetStatus').exec()
+    assert server.calls['GetState'] == 1
+
+def test_async_daq():
+    server = SimServer({}, latency=0.001, jitter=0.001, seed=1)
+    interface = SimInterface(server)
+
+    async def run():
+        await interface.command('Daq', 'StartDaq').async_exec('d1')
+        return await interface.command('Daq', 'GetDaqStatus').async_exec('d1')
+    assert asyncio.run(run()).getState() == "Acquiring"
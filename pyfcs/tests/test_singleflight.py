@@ -0,0 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from pyfcs.core.interface.singleflight import SingleFlight
+from pyfcs.core.simulator import SimServer, SimInterface
+
+
+def test_async_coalescing():
+    server = SimServer({'lamp1':'lamp'}, latency=0.01)
+    interface = SimInterface(server, singleflight=SingleFlight())
+
+    async def run():
+        return await asyncio.gather(*(interface.command('App', 'DevStatus').async_exec(['lamp1']) for _ in range(10)))
+    replies = asyncio.run(run())
+    assert len(set(replies)) == 1
+    assert server.calls['DevStatus'] == 1
+
+def test_sync_coalescing_and_cache():
+    server = SimServer({'lamp1':'lamp'}, latency=0.02)
+    singleflight = SingleFlight(ttl=10.0)
+    interface = SimInterface(server, singleflight=singleflight)
+    with ThreadPoolExecutor(8) as executor:
+        replies = list(executor.map(lambda _: interface.command('Std', 'GetState').exec(), range(8)))
+    assert replies == ["Operational;Idle"]*8
+    assert server.calls['GetState'] == 1
+    interface.command('Std', 'GetState').exec()
+    assert server.calls['GetState'] == 1
+    singleflight.clear()
+    interface.command('Std', 'GetState').exec()
+    assert server.calls['GetState'] == 2
+
+def test_write_commands_are_not_coalesced():
+    server = SimServer({'lamp1':'lamp'})
+    interface = SimInterface(server, singleflight=SingleFlight(ttl=10.0))
+    interface.command('Std', 'Stop').exec()
+    interface.command('Std', 'Stop').exec()
+    assert server.calls['Stop'] == 2
@@ -0,0 +1,108 @@
+import io
+import json
+
+import pytest
+
+from pyfcs.core.api import BaseDeviceSetup, BaseDevMgrSetup, ParamProperty, DummyInterface, payload_parser, PayloadElementError
+from pyfcs.core.device.parser import FloatParser, StringParser
+from pyfcs.core.tools.payload_receiver import iter_json_elements
+
+
+class FakeLampSetup(BaseDeviceSetup):
+    devtype = "fakelamp"
+    action = ParamProperty(StringParser(), required=True)
+    intensity = ParamProperty(FloatParser(minimum=0, maximum=100))
+
+    @payload_parser(action="ON")
+    def switch_on(self, intensity):
+        self.action = "ON"
+        self.intensity = intensity
+
+class FakeRegister:
+    def setup_class(self, devtype):
+        return FakeLampSetup
+
+class FakeSetup(BaseDevMgrSetup, devtypes=["fakelamp"], generate_methods=False, register=FakeRegister()):
+    pass
+
+
+def element(i, intensity=10):
+    return {'id':f'lamp{i}', 'param':{'fakelamp':{'action':'ON', 'intensity':intensity}}}
+
+def as_array(elements):
+    return "[\n" + ",\n".join(json.dumps(e) for e in elements) + "\n]\n"
+
+def as_lines(elements):
+    return "".join(json.dumps(e)+"\n" for e in elements)
+
+
+@pytest.mark.parametrize("dump", [as_array, as_lines])
+@pytest.mark.parametrize("buffer_size", [1, 7, 1<<16])
+def test_iter_json_elements(dump, buffer_size):
+    elements = [element(i) for i in range(20)] + [12345, "x"]
+    text = dump(elements)
+    streamed = list(iter_json_elements(io.StringIO(text), buffer_size))
+    assert [e.value for e in streamed] == elements
+    for e in streamed:
+        assert json.loads(text[e.offset:].split("\n")[0].rstrip(",")) == e.value
+        assert text.count("\n", 0, e.offset) + 1 == e.line
+
+def test_empty_array():
+    assert list(iter_json_elements(io.StringIO(" [ ] "))) == []
+    assert list(iter_json_elements(io.StringIO(""))) == []
+
+@pytest.mark.parametrize("text, index, line", [
+        ('[{"a":1},\n{"a":}]', 1, 2),
+        ('[{"a":1}\n{"a":2}]', 1, 2),
+        ('[{"a":1}', 1, 1),
+        ('[{"a":1}] x', 1, 1),
+        ('{"a":1}\n{"a":2\n', 1, 2),
+    ])
+def test_malformed(text, index, line):
+    with pytest.raises(PayloadElementError) as err:
+        list(iter_json_elements(io.StringIO(text), 3))
+    assert err.value.index == index
+    assert err.value.line == line
+
+class CountingReader(io.StringIO):
+    read_size = 0 
+    def read(self, size=-1):
+        data = super().read(size)
+        self.read_size += len(data)
+        return data 
+
+@pytest.mark.parametrize("buffer_size", [16, 1<<10])
+def test_malformed_does_not_read_further(buffer_size):
+    tail = "".join(json.dumps(element(i))+"\n" for i in range(2000))
+    fp = CountingReader('{"a":1}\n{"a": x, "b": 1}\n' + tail)
+    with pytest.raises(PayloadElementError) as err:
+        list(iter_json_elements(fp, buffer_size))
+    assert err.value.index == 1
+    assert fp.read_size <= 4*buffer_size + 32 < len(tail)
+
+def test_numbers_across_reads():
+    assert [e.value for e in iter_json_elements(io.StringIO("1.5\n-2e-3\n10"), 2)] == [1.5, -2e-3, 10]
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_iter_load_payload(trusted):
+    setup = FakeSetup(DummyInterface())
+    text = as_lines([element(i) for i in range(10)])
+    chunks = list(setup.iter_load_payload(io.StringIO(text), chunk_size=4, trusted=trusted))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert len(setup) == 10
+    assert setup.get_payload()[9] == {'id':'lamp9', 'param':{'fakelamp':{'action':'ON', 'intensity':10.0}}}
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_load_payload_error(tmp_path, trusted):
+    path = tmp_path/"plan.json"
+    path.write_text(as_array([element(0), element(1), element(2, intensity=500), element(3)]))
+    setup = FakeSetup(DummyInterface())
+    with pytest.raises(PayloadElementError) as err:
+        setup.load_payload(path, chunk_size=2, trusted=trusted)
+    assert (err.value.index, err.value.line) == (2, 4)
+    assert len(setup) == 2 # first chunk is kept
+
+    setup.clear()
+    path.write_text(as_array([element(i) for i in range(5)]))
+    assert setup.load_payload(str(path), trusted=trusted) == 5
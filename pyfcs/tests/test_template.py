@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+
+from ModFcfif.Fcfif import ActionLamp
+
+from pyfcs.core.api import BaseDeviceSetup, ParamProperty, payload_parser, parser, SimServer, SimInterface
+from pyfcs.core.devmgr.template import SetupTemplate
+from pyfcs.devices.lamp import LampMalIf
+from pyfcs.devmgr_setup import DevMgrSetup
+
+
+@pytest.fixture
+def server():
+    return SimServer({'lamp1':'lamp', 'motor1':'motor'})
+
+@pytest.fixture
+def fcs(server):
+    fcs = DevMgrSetup(SimInterface(server))
+    fcs.add_motor_move_abs('motor1', 0.0)
+    fcs.add_lamp_switch_on('lamp1', 50, 10)
+    return fcs
+
+
+def test_patch_slots(server, fcs):
+    template = SetupTemplate.from_setup(fcs)
+    assert ('motor1', 'pos') in template.slots and ('lamp1', 'intensity') in template.slots
+    # payload parser context keys are not slots
+    assert ('motor1', 'action') not in template.slots
+
+    template['motor1', 'pos'] = 3
+    template.update({('lamp1', 'intensity'):40}, lamp1={'time':5})
+    assert template['motor1', 'pos'] == 3.0
+    assert template.setup() == "OK"
+    assert server.devices['motor1'].values['pos'] == 3.0
+    assert server.devices['lamp1'].values == {'action':'ON', 'intensity':40.0, 'time':5}
+
+    template['motor1', 'pos'] = 4
+    template.create_setup_command().exec()
+    assert server.devices['motor1'].values['pos'] == 4.0
+    template['motor1', 'pos'] = 5
+    assert asyncio.run(template.async_setup()) == "OK"
+    assert server.devices['motor1'].values['pos'] == 5.0
+
+def test_source_unchanged(fcs):
+    element = fcs[0].get_element_buffer()
+    payload = fcs.get_payload()
+    template = SetupTemplate.from_setup(fcs)
+    template['motor1', 'pos'] = 3
+    template.get_buffer()
+    assert fcs.get_payload() == payload
+    assert fcs[0].get_element_buffer() is element
+    copy = type(fcs[0])(fcs.interface, 'motor1')
+    copy.load_buffer(element)
+    assert copy.pos == 0.0
+
+def test_unknown_slot(fcs):
+    template = SetupTemplate.from_setup(fcs)
+    with pytest.raises(KeyError):
+        template['motor1', 'action'] = 'MOVE_REL'
+    with pytest.raises(KeyError):
+        template['lamp2', 'intensity']
+    with pytest.raises(KeyError):
+        template.update(motor1={'speed_of_light':1})
+
+
+class DimmedLampSetup(BaseDeviceSetup):
+    devtype = "dimmedlamp"
+    MalIf = LampMalIf
+    action = ParamProperty(parser.EnumNameParser(ActionLamp), required=True)
+    level = ParamProperty(parser.FloatParser(minimum=0, maximum=100), name="intensity")
+    time = ParamProperty(parser.IntParser(minimum=1))
+
+    @payload_parser(action='ON')
+    def switch_on(self, intensity, time):
+        self.action = "ON"
+        self.level = intensity
+        self.time = time
+
+class DimmedRegister:
+    def setup_class(self, devtype):
+        return DimmedLampSetup
+
+def test_renamed_parameter(server):
+    interface = SimInterface(server)
+    lamp = DimmedLampSetup(interface, 'lamp1')
+    lamp.switch_on(50, 10)
+    template = SetupTemplate(interface, lamp.get_buffer(), {'lamp1':'dimmedlamp'}, register=DimmedRegister())
+    assert sorted(template.slots) == [('lamp1', 'intensity'), ('lamp1', 'time')]
+    template['lamp1', 'intensity'] = 70
+    assert template['lamp1', 'intensity'] == 70.0
+    with pytest.raises(ValueError):
+        template['lamp1', 'intensity'] = 700
+    copy = DimmedLampSetup(interface, 'lamp1')
+    copy.load_buffer(template.get_buffer())
+    assert copy.level == 70.0 and lamp.level == 50.0
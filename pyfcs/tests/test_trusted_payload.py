@@ -0,0 +1,69 @@
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from pyfcs.core.api import BaseDeviceSetup, BaseDevMgrSetup, ParamProperty, DummyInterface, payload_parser
+from pyfcs.core.device.parser import FloatParser, StringParser
+
+
+class FakeLampSetup(BaseDeviceSetup):
+    devtype = "fakelamp"
+    action = ParamProperty(StringParser(), required=True)
+    intensity = ParamProperty(FloatParser(minimum=0, maximum=100))
+    time = ParamProperty(FloatParser())
+
+    @payload_parser(action="ON")
+    def switch_on(self, intensity, time):
+        self.action = "ON"
+        self.intensity = intensity
+        self.time = time
+
+class FakeRegister:
+    def setup_class(self, devtype):
+        return FakeLampSetup
+
+class FakeSetup(BaseDevMgrSetup, devtypes=["fakelamp"], generate_methods=False, register=FakeRegister()):
+    pass
+
+
+VALID = [{'id':'lamp1', 'param':{'fakelamp':{'action':'ON', 'intensity':50, 'time':10}}}]
+
+INVALIDS = [
+    {'id':'lamp1'},
+    [{'id':'lamp1', 'param':{'fakelamp':{'action':'ON', 'intensity':50, 'time':10}}, 'x':1}],
+    [{'id':'lamp1', 'param':{'motor':{'action':'ON'}}}],
+    [{'id':'lamp1', 'param':{'fakelamp':{'intensity':50}}}],
+    [{'id':'lamp1', 'param':{'fakelamp':{'action':'ON', 'color':'red'}}}],
+    [{'id':'lamp1', 'param':{'fakelamp':{'action':'ON', 'intensity':500, 'time':10}}}],
+    [{'id':'lamp1', 'param':{'fakelamp':{'action':'ON', 'intensity':50}}}],
+]
+
+# schema invalid values accepted by the parsers (float(True), float('5'), str(5))
+TYPE_INVALIDS = [
+    [{'id':'lamp1', 'param':{'fakelamp':{'action':'ON', 'intensity':True, 'time':10}}}],
+    [{'id':'lamp1', 'param':{'fakelamp':{'action':'ON', 'intensity':'50', 'time':10}}}],
+    [{'id':'lamp1', 'param':{'fakelamp':{'action':'ON', 'intensity':50, 'time':None}}}],
+    [{'id':'lamp1', 'param':{'fakelamp':{'action':5}}}],
+]
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_valid_payload(trusted):
+    setup = FakeSetup(DummyInterface())
+    setup.set_payload(VALID, trusted=trusted)
+    assert setup.get_payload() == [{'id':'lamp1', 'param':{'fakelamp':{'action':'ON', 'intensity':50.0, 'time':10.0}}}]
+
+@pytest.mark.parametrize("payload", INVALIDS)
+def test_invalid_payload(payload):
+    setup = FakeSetup(DummyInterface())
+    with pytest.raises(ValueError):
+        setup.set_payload(payload, trusted=True)
+    with pytest.raises((ValueError, ValidationError)):
+        setup.set_payload(payload)
+    assert len(setup) == 0
+
+@pytest.mark.parametrize("trusted", [False, True])
+@pytest.mark.parametrize("payload", TYPE_INVALIDS)
+def test_invalid_type(payload, trusted):
+    setup = FakeSetup(DummyInterface())
+    with pytest.raises((ValueError, ValidationError)):
+        setup.set_payload(payload, trusted=trusted)
+    assert len(setup) == 0
@@ -0,0 +1,64 @@
+import pytest
+from jsonschema.exceptions import ValidationError, best_match
+
+from pyfcs.core.tools.payload_receiver import PayloadReceiver, get_validator, _validators
+
+SCHEMA = {
+    "type": "array",
+    "items": {"type": "object", "properties": {"id": {"type": "string"}}, "required": ["id"]}
+}
+
+def test_validator_is_cached():
+    assert get_validator(SCHEMA) is get_validator(SCHEMA)
+    assert PayloadReceiver(SCHEMA).validator is PayloadReceiver(SCHEMA).validator
+
+def test_validator_cache_is_bounded():
+    receiver = PayloadReceiver({"type": "array"})
+    validator = receiver.validator
+    for i in range(2*_validators.maxsize):
+        get_validator({"type": "array", "maxItems": i})
+    assert len(_validators) == _validators.maxsize
+    assert receiver.validator is validator # kept by the receiver 
+    assert get_validator(SCHEMA) is get_validator(SCHEMA)
+
+def test_validate_and_parse():
+    pr = PayloadReceiver(SCHEMA)
+    assert pr.validate([{"id": "lamp1"}])
+    assert pr.validate_many([[{"id": "lamp1"}], [{}], []]) == [True, False, True]
+    with pytest.raises(ValidationError):
+        pr.parse([{"id": 1}])
+
+
+def _devmgr_schema():
+    from pyfcs.core.devmgr.setup import create_empty_schema
+    schema = create_empty_schema()
+    definitions = schema['definitions']
+    for devtype, actions in (('lamp', ['ON', 'OFF']), ('shutter', ['OPEN', 'CLOSE'])):
+        definitions[devtype] = {
+            'type': 'object', 'additionalProperties': False, 'required': ['action'],
+            'properties': {'action': {'enum': actions}, 'time': {'type': 'integer'}}
+        }
+        definitions['param']['oneOf'].append({'required': [devtype]})
+        definitions['param']['properties'][devtype] = {'$ref': '#/definitions/'+devtype}
+    return schema
+
+@pytest.mark.parametrize("payload", [
+    [{'id': 'lamp1', 'param': {'lamp': {'action': 'ON'}}}, {'id': 's1', 'param': {'shutter': {'action': 'OPEN'}}}],
+    [{'id': 'lamp1', 'param': {'lamp': {'action': 'OPEN'}}}],
+    [{'id': 'lamp1', 'param': {'lamp': {'action': 'ON', 'time': 'x'}}}],
+    [{'id': 'lamp1', 'param': {'motor': {'action': 'ON'}}}],
+    [{'id': 'lamp1', 'param': {'lamp': {'action': 'ON'}, 'shutter': {'action': 'OPEN'}}}],
+    [{'id': 1, 'param': {'lamp': {'action': 'ON'}}}],
+    {'id': 'lamp1'},
+])
+def test_devtype_dispatch_is_equivalent(payload):
+    import jsonschema
+    schema = _devmgr_schema()
+    pr = PayloadReceiver(schema)
+    expected = jsonschema.validators.validator_for(schema)(schema)
+    assert pr.validate(payload) == expected.is_valid(payload)
+    if not expected.is_valid(payload):
+        with pytest.raises(ValidationError) as info:
+            pr.parse(payload)
+        error = best_match(expected.iter_errors(payload))
+        assert (list(info.value.path), info.value.message) == (list(error.path), error.message)
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from dataclasses import dataclass
+import pytest
+
+from pyfcs.core.api import warm_all, async_warm_all
+from pyfcs.core.interface import pool as pool_module
+from pyfcs.core.interface.interface import Interface
+from pyfcs.core.interface.pool import ClientPool
+from pyfcs.core.interface.warmup import warmup_interfaces
+from pyfcs.core.simulator import SimServer, SimCii, SimClient, SimAsyncClient
+from pyfcs.devmgr_async_commands import DevMgrAsyncCommands
+from pyfcs.devmgr_commands import DevMgrCommands
+
+
+servers = {}
+created = [] # (uri, kind, asynchronous) of created clients 
+connect_time = {'delay':0.0} # simulated connection time of a client 
+
+@dataclass(frozen=True)
+class PooledSimInterface(Interface):
+    """ Interface with pooled clients of a simulated server """
+    def _new_cii(self, kind, asynchronous, timeout):
+        time.sleep(connect_time['delay'])
+        created.append((self.uri, kind, asynchronous))
+        client_class = SimAsyncClient if asynchronous else SimClient
+        return SimCii(client_class(servers[self.uri], kind, int(timeout or self.timeout)/1000.))
+
+    def _create_app_cii(self, timeout=None):
+        return self._new_cii('App', False, timeout)
+    def _create_async_app_cii(self, timeout=None):
+        return self._new_cii('App', True, timeout)
+    def _create_std_cii(self, timeout=None):
+        return self._new_cii('Std', False, timeout)
+    def _create_async_std_cii(self, timeout=None):
+        return self._new_cii('Std', True, timeout)
+    def _create_daq_cii(self, timeout=None):
+        return self._new_cii('Daq', False, timeout)
+    def _create_async_daq_cii(self, timeout=None):
+        return self._new_cii('Daq', True, timeout)
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = ClientPool(idle_timeout=None, closer=lambda cii: None) # simulated clients have no close
+    monkeypatch.setattr(pool_module, "client_pool", pool)
+    servers.clear()
+    created.clear()
+    connect_time['delay'] = 0.0
+    for name in ("fcs1", "fcs2"):
+        server = SimServer({'lamp1':'lamp'}, name=name)
+        servers[server.uri] = server
+    yield pool
+    pool.close()
+
+
+def test_warmup_interfaces(pool):
+    interfaces = [PooledSimInterface(uri) for uri in servers]
+    warmup_interfaces(interfaces, kinds=['App', 'Std'], asynchronous=None)
+    assert sorted(created) == sorted((uri, k, a) for uri in servers for k in ('App', 'Std') for a in (False, True))
+    assert len(pool) == 8 and all(e.refcount == 1 for e in pool.info())
+
+    # commands re-use the warm clients 
+    assert interfaces[0].command('Std', 'GetState').exec() == "Operational;Idle"
+    asyncio.run(interfaces[1].command('App', 'DevStatus').async_exec(['lamp1']))
+    assert len(created) == 8
+    assert servers['sim://fcs1'].calls == {'GetState':1}
+
+def test_warm_all(pool):
+    objects = [DevMgrCommands(PooledSimInterface(uri)) for uri in servers]
+    warm_all(objects, kinds=['App'])
+    assert sorted(created) == [('sim://fcs1', 'App', False), ('sim://fcs2', 'App', False)]
+    # devtypes are prefetched 
+    assert all(server.calls == {'DevInfo':1} for server in servers.values())
+    assert objects[0].get_devtype('lamp1') == 'lamp'
+    objects[0].interface.command('App', 'DevStatus').exec(['lamp1'])
+    assert len(created) == 2
+
+def test_async_warm_all(pool):
+    objects = [DevMgrAsyncCommands(PooledSimInterface(uri)) for uri in servers]
+    asyncio.run(async_warm_all(objects, kinds=['App', 'Std']))
+    assert sorted(created) == sorted((uri, k, True) for uri in servers for k in ('App', 'Std'))
+    assert all(server.calls == {'DevInfo':1} for server in servers.values())
+    asyncio.run(objects[1].interface.command('Std', 'GetState').async_exec())
+    assert len(created) == 4
+
+def test_warmup_is_concurrent(pool):
+    connect_time['delay'] = 0.1
+    interfaces = [PooledSimInterface(uri) for uri in servers]
+    tic = time.perf_counter()
+    warmup_interfaces(interfaces, kinds=['App', 'Std', 'Daq'])
+    # 6 clients created in parallel, about one connection time 
+    assert len(created) == 6 and time.perf_counter()-tic < 0.3
+
+    objects = [DevMgrCommands(PooledSimInterface(uri, timeout=5000)) for uri in servers]
+    tic = time.perf_counter()
+    warm_all(objects, kinds=['App', 'Std'], devtypes=False)
+    assert len(created) == 10 and time.perf_counter()-tic < 0.3
+
+    objects = [DevMgrAsyncCommands(PooledSimInterface(uri, timeout=2000)) for uri in servers]
+    tic = time.perf_counter()
+    asyncio.run(async_warm_all(objects, kinds=['App', 'Std'], devtypes=False))
+    assert len(created) == 14 and time.perf_counter()-tic < 0.3